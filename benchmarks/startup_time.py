@@ -0,0 +1,102 @@
+"""Benchmark of the startup time of ``kedro run --pipeline data_processing``.
+
+Every measure runs in a fresh interpreter, as a ``kedro run`` does, and reports the time to
+create the session, its context and catalog and to register the pipelines, i.e. everything
+done before the first node runs, and which heavy dependencies were imported by then. With
+``--run`` the wall time of the whole ``kedro run`` command is measured too.
+
+The catalog imports the class of every dataset when it is created, so the datasets whose class
+imports a heavy dependency, e.g. ``matplotlib.MatplotlibWriter``, are wrapped in
+``ml_explainer.datasets.LazyDataset`` to keep it out of the startup.
+
+Usage, from the project root::
+
+    python benchmarks/startup_time.py --repeat 5
+    python benchmarks/startup_time.py --pipeline data_processing --run
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_PATH = Path(__file__).resolve().parents[1]
+
+# dependencies only some pipelines use, so a short ETL run shouldn't import them
+HEAVY_MODULES = ["shap", "sklearn", "xgboost", "langchain", "openai", "matplotlib"]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from pathlib import Path
+from kedro.framework.project import pipelines
+from kedro.framework.session import KedroSession
+from kedro.framework.startup import bootstrap_project
+
+bootstrap_project(Path({project_path!r}))
+with KedroSession.create(project_path={project_path!r}) as session:
+    context = session.load_context()
+    catalog = context.catalog
+    pipeline = pipelines[{pipeline!r}]
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy_modules!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy, "nodes": len(pipeline.nodes)}}))
+"""
+
+
+def measure_startup(pipeline: str) -> dict:
+    """Measure the startup of a run of ``pipeline`` in a fresh interpreter."""
+    script = STARTUP_SCRIPT.format(
+        project_path=str(PROJECT_PATH), pipeline=pipeline, heavy_modules=HEAVY_MODULES
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PROJECT_PATH,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_run(pipeline: str) -> float:
+    """Measure the wall time of ``kedro run --pipeline pipeline``."""
+    start = time.perf_counter()
+    subprocess.run(
+        ["kedro", "run", "--pipeline", pipeline],
+        cwd=PROJECT_PATH,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pipeline", default="data_processing")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--run", action="store_true", help="also time the whole kedro run")
+    args = parser.parse_args()
+
+    startups = [measure_startup(args.pipeline) for _ in range(args.repeat)]
+    seconds = [startup["seconds"] for startup in startups]
+    print(  # noqa: T201
+        f"startup of {args.pipeline} ({startups[0]['nodes']} nodes): "
+        f"median {statistics.median(seconds):.2f}s, min {min(seconds):.2f}s"
+    )
+    heavy_modules = ", ".join(startups[0]["heavy_modules"]) or "none"
+    print(f"heavy modules imported: {heavy_modules}")  # noqa: T201
+    if args.run:
+        runs = [measure_run(args.pipeline) for _ in range(args.repeat)]
+        print(  # noqa: T201
+            f"kedro run --pipeline {args.pipeline}: "
+            f"median {statistics.median(runs):.2f}s, min {min(runs):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Custom Kedro datasets of the project."""
+
+from .cached_excel_dataset import CachedExcelDataset  # NOQA
+from .lazy_dataset import LazyDataset  # NOQA
+from .partitioned_parquet_dataset import LazyParquetFrame, PartitionedParquetDataset  # NOQA
+from .watermarked_csv_dataset import WatermarkedCSVDataset  # NOQA
@@ -0,0 +1,184 @@
+"""``CachedExcelDataset`` loads an Excel workbook through a columnar sidecar, converted once and
+re-converted only when the workbook changes.
+"""
+import hashlib
+import json
+import logging
+import typing as tp
+from copy import deepcopy
+from pathlib import PurePosixPath
+
+import fsspec
+import pandas as pd
+import pyarrow as pa
+from kedro.io import AbstractDataset
+from kedro.io.core import DatasetError, get_filepath_str, get_protocol_and_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+SIDECAR_TEMPLATE = "{stem}-{sha256:.16}.arrow"
+
+
+class CachedExcelDataset(AbstractDataset):
+    """``CachedExcelDataset`` reads an Excel workbook with ``pandas.read_excel`` once, stores the
+    DataFrame as an uncompressed Arrow IPC sidecar, and serves the later loads from the sidecar,
+    memory-mapped on local filesystems, instead of parsing the XML of the workbook again.
+
+    The sidecar is keyed by the size, modification time and SHA-256 of the workbook, and by the
+    load arguments. A workbook of another size or modification time is hashed again, and
+    re-converted only if its content changed, so touching it costs a hash, not a parse.
+
+    Example usage for the
+    `YAML API <https://kedro.readthedocs.io/en/stable/data/\
+    data_catalog_yaml_examples.html>`_:
+
+    .. code-block:: yaml
+
+        shuttles:
+          type: ml_explainer.datasets.CachedExcelDataset
+          filepath: data/01_raw/shuttles.xlsx
+          sidecar_dir: data/02_intermediate/shuttles_sidecar
+          load_args:
+            engine: openpyxl
+
+    Workbooks whose columns Arrow can't store, e.g. mixing numbers and strings, are loaded
+    from the workbook every time, with a warning.
+    """
+
+    DEFAULT_LOAD_ARGS: tp.Dict[str, tp.Any] = {"engine": "openpyxl"}
+
+    def __init__(  # noqa: PLR0913
+        self,
+        filepath: str,
+        sidecar_dir: tp.Optional[str] = None,
+        load_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        credentials: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        fs_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+    ) -> None:
+        """Creates a new instance of ``CachedExcelDataset`` pointing to a workbook.
+
+        Args:
+            filepath: Path to the Excel workbook, prefixed with a protocol like `s3://` for
+                remote data.
+            sidecar_dir: Directory of the sidecar and its manifest, on the filesystem of the
+                workbook, ``<filepath>.sidecar`` by default.
+            load_args: Arguments of ``pandas.read_excel``, part of the key of the sidecar.
+            credentials: Credentials required to get access to the underlying filesystem.
+            fs_args: Extra arguments to pass into underlying filesystem class constructor.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+
+        self._protocol = protocol
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        if sidecar_dir is None:
+            self._sidecar_dir = self._filepath.with_name(self._filepath.name + ".sidecar")
+        else:
+            self._sidecar_dir = PurePosixPath(get_protocol_and_path(sidecar_dir)[1])
+        self._load_args = {**self.DEFAULT_LOAD_ARGS, **(load_args or {})}
+
+    def _describe(self) -> tp.Dict[str, tp.Any]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            sidecar_dir=self._sidecar_dir,
+            load_args=self._load_args,
+        )
+
+    def _load(self) -> pd.DataFrame:
+        filepath = get_filepath_str(self._filepath, self._protocol)
+        key = self._key(filepath)
+        manifest = self._read_manifest()
+        sidecar = self._sidecar_path(manifest)
+
+        fresh = (
+            sidecar is not None
+            and manifest.get("load_args") == key["load_args"]
+            and self._fs.exists(sidecar)
+        )
+        if fresh and (manifest.get("size"), manifest.get("mtime")) != (key["size"], key["mtime"]):
+            key["sha256"] = self._hash(filepath)
+            fresh = manifest.get("sha256") == key["sha256"]
+            if fresh:  # touched but unchanged, skip the hash next time
+                self._write_manifest({**manifest, **key})
+        if fresh:
+            return self._read_sidecar(sidecar)
+
+        logger.info("Converting '%s' to a columnar sidecar in '%s'.", filepath, self._sidecar_dir)
+        with self._fs.open(filepath, mode="rb") as fs_file:
+            data = pd.read_excel(fs_file, **self._load_args)
+        key.setdefault("sha256", self._hash(filepath))
+        self._write_sidecar(data, key, previous=sidecar)
+        return data
+
+    def _save(self, data: pd.DataFrame) -> None:
+        raise DatasetError(f"'{self.__class__.__name__}' is a read only dataset type")
+
+    def _exists(self) -> bool:
+        return self._fs.exists(get_filepath_str(self._filepath, self._protocol))
+
+    def _key(self, filepath: str) -> tp.Dict[str, tp.Any]:
+        info = self._fs.info(filepath)
+        load_args = json.dumps(self._load_args, sort_keys=True, default=str)
+        return {
+            "size": info["size"],
+            "mtime": str(info.get("mtime", info.get("LastModified"))),
+            "load_args": hashlib.sha256(load_args.encode()).hexdigest(),
+        }
+
+    def _hash(self, filepath: str) -> str:
+        sha256 = hashlib.sha256()
+        with self._fs.open(filepath, mode="rb") as fs_file:
+            for block in iter(lambda: fs_file.read(1 << 20), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def _sidecar_path(self, manifest: tp.Dict[str, tp.Any]) -> tp.Optional[str]:
+        if "sidecar" not in manifest:
+            return None
+        return get_filepath_str(self._sidecar_dir / manifest["sidecar"], self._protocol)
+
+    def _read_manifest(self) -> tp.Dict[str, tp.Any]:
+        path = get_filepath_str(self._sidecar_dir / MANIFEST_NAME, self._protocol)
+        if not self._fs.exists(path):
+            return {}
+        with self._fs.open(path, mode="r") as fs_file:
+            return json.load(fs_file)
+
+    def _write_manifest(self, manifest: tp.Dict[str, tp.Any]) -> None:
+        path = get_filepath_str(self._sidecar_dir / MANIFEST_NAME, self._protocol)
+        with self._fs.open(path, mode="w") as fs_file:
+            json.dump(manifest, fs_file, indent=2)
+
+    def _read_sidecar(self, path: str) -> pd.DataFrame:
+        if self._protocol == "file":
+            # the Arrow columns are read from the page cache, without a copy to a buffer
+            return pa.ipc.open_file(pa.memory_map(path)).read_all().to_pandas()
+        with self._fs.open(path, mode="rb") as fs_file:
+            return pa.ipc.open_file(fs_file).read_all().to_pandas()
+
+    def _write_sidecar(
+        self, data: pd.DataFrame, key: tp.Dict[str, tp.Any], previous: tp.Optional[str]
+    ) -> None:
+        try:
+            table = pa.Table.from_pandas(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as error:
+            logger.warning("'%s' can't be cached as Arrow (%s).", self._filepath, error)
+            return
+
+        name = SIDECAR_TEMPLATE.format(stem=self._filepath.stem, sha256=key["sha256"])
+        path = get_filepath_str(self._sidecar_dir / name, self._protocol)
+        self._fs.makedirs(get_filepath_str(self._sidecar_dir, self._protocol), exist_ok=True)
+        with self._fs.open(path, mode="wb") as fs_file:
+            with pa.ipc.new_file(fs_file, table.schema) as writer:
+                writer.write_table(table)
+        # the manifest points to the sidecar once it is complete
+        self._write_manifest({**key, "sidecar": name})
+        if previous is not None and previous != path and self._fs.exists(previous):
+            self._fs.rm(previous)
@@ -0,0 +1,64 @@
+"""``LazyDataset`` builds the dataset it wraps on first use, so the catalog doesn't import its
+dependencies.
+"""
+import typing as tp
+from copy import deepcopy
+
+from kedro.io import AbstractDataset
+
+
+class LazyDataset(AbstractDataset):
+    """``LazyDataset`` wraps a dataset whose class imports heavy dependencies at import time,
+    e.g. ``matplotlib.MatplotlibWriter`` importing matplotlib, and builds it on its first load,
+    save or ``exists``. The catalog is created without importing the class, so the pipelines
+    that don't use the dataset don't pay for its import.
+
+    The wrapped configuration is only checked when the dataset is first used, e.g. a wrong
+    ``type`` fails the node writing it rather than the creation of the catalog.
+
+    Example usage for the
+    `YAML API <https://kedro.readthedocs.io/en/stable/data/\
+    data_catalog_yaml_examples.html>`_:
+
+    .. code-block:: yaml
+
+        fig_shap_train:
+          type: ml_explainer.datasets.LazyDataset
+          dataset:
+            type: matplotlib.MatplotlibWriter
+            filepath: data/08_reporting/fig_shap_train.png
+    """
+
+    def __init__(self, dataset: tp.Dict[str, tp.Any]) -> None:
+        """Creates a new instance of ``LazyDataset`` wrapping a dataset configuration.
+
+        Args:
+            dataset: Configuration of the wrapped dataset, as in the catalog, with its ``type``.
+        """
+        self._config = deepcopy(dataset)
+        self._dataset: tp.Optional[AbstractDataset] = None
+
+    @property
+    def dataset(self) -> AbstractDataset:
+        """The wrapped dataset, built on first access."""
+        if self._dataset is None:
+            self._dataset = AbstractDataset.from_config(
+                f"lazy {self._config.get('type')}", deepcopy(self._config)
+            )
+        return self._dataset
+
+    def _describe(self) -> tp.Dict[str, tp.Any]:
+        return dict(dataset=self._config)
+
+    def _load(self) -> tp.Any:
+        return self.dataset.load()
+
+    def _save(self, data: tp.Any) -> None:
+        self.dataset.save(data)
+
+    def _exists(self) -> bool:
+        return self.dataset.exists()
+
+    def _release(self) -> None:
+        if self._dataset is not None:
+            self._dataset.release()
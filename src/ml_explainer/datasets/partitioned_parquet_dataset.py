@@ -0,0 +1,223 @@
+"""``PartitionedParquetDataset`` streams DataFrame chunks to a directory of Parquet files and
+reads them back either eagerly or lazily.
+"""
+import typing as tp
+import uuid
+from copy import deepcopy
+from pathlib import PurePosixPath
+
+import fsspec
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from kedro.io import AbstractDataset
+from kedro.io.core import get_filepath_str, get_protocol_and_path
+
+PART_TEMPLATE = "part-{:05d}.parquet"
+
+
+class LazyParquetFrame:
+    """
+    Lazy, read-only view of the Parquet files written by ``PartitionedParquetDataset``.
+
+    Nothing but the Parquet footers is read until the rows are requested, so consumers can
+    aggregate the data batch by batch or read only the first rows. The files are only open
+    while they are read.
+
+    Parameters:
+    - fs (fsspec.AbstractFileSystem): Filesystem of the files.
+    - paths (list of str): Parquet files, in row order.
+    """
+
+    def __init__(self, fs: fsspec.AbstractFileSystem, paths: tp.List[str]):
+        self._fs = fs
+        self._paths = paths
+        self._metadata = []
+        for path in paths:
+            with fs.open(path, mode="rb") as fs_file:
+                self._metadata.append(pq.read_metadata(fs_file))
+
+    @property
+    def columns(self) -> tp.List[str]:
+        if not self._metadata:
+            return []
+        return list(self._metadata[0].schema.to_arrow_schema().names)
+
+    def __len__(self) -> int:
+        return sum(metadata.num_rows for metadata in self._metadata)
+
+    def iter_batches(
+        self, columns: tp.Optional[tp.List[str]] = None, batch_size: int = 65536
+    ) -> tp.Iterator[pd.DataFrame]:
+        """
+        Iterate over the rows in order, ``batch_size`` rows at a time at most.
+
+        Parameters:
+        - columns (list of str): Columns to read, all of them by default.
+        - batch_size (int): Maximum number of rows of each batch.
+
+        Returns:
+        - iterator of pd.DataFrame: Batches of rows, indexed by their position in the data.
+        """
+        offset = 0
+        for path, metadata in zip(self._paths, self._metadata):
+            with self._fs.open(path, mode="rb") as fs_file:
+                file = pq.ParquetFile(fs_file, metadata=metadata)
+                for batch in file.iter_batches(batch_size=batch_size, columns=columns):
+                    frame = batch.to_pandas()
+                    frame.index = pd.RangeIndex(offset, offset + len(frame))
+                    offset += len(frame)
+                    yield frame
+
+    def head(self, n: int = 5, columns: tp.Optional[tp.List[str]] = None) -> pd.DataFrame:
+        """Read the first ``n`` rows only."""
+        batches, n_rows = [], 0
+        for batch in self.iter_batches(columns=columns, batch_size=max(n, 1)):
+            if n_rows >= n:
+                break
+            batches.append(batch.iloc[: n - n_rows])
+            n_rows += len(batches[-1])
+        return self._concat(batches, columns=columns)
+
+    def to_pandas(self, columns: tp.Optional[tp.List[str]] = None) -> pd.DataFrame:
+        """Read all the rows."""
+        return self._concat(list(self.iter_batches(columns=columns)), columns=columns)
+
+    def _concat(self, batches: tp.List[pd.DataFrame], columns: tp.Optional[tp.List[str]]):
+        if not batches:
+            return pd.DataFrame(columns=columns or self.columns)
+        return pd.concat(batches)
+
+
+class PartitionedParquetDataset(AbstractDataset):
+    """``PartitionedParquetDataset`` saves a DataFrame, or any iterable of DataFrame chunks, as a
+    directory of Parquet files (one file per chunk, written with row group statistics) as the
+    chunks are produced, so the whole data never has to be held in memory.
+
+    Example usage for the
+    `YAML API <https://kedro.readthedocs.io/en/stable/data/\
+    data_catalog_yaml_examples.html>`_:
+
+    .. code-block:: yaml
+
+        shap_values_df_test:
+          type: ml_explainer.datasets.PartitionedParquetDataset
+          filepath: data/07_model_output/shap_values_df_test
+          load_args:
+            lazy: True
+          save_args:
+            row_group_size: 10000
+
+    ``load`` returns a ``pd.DataFrame`` unless ``lazy`` is set, in which case it returns a
+    ``LazyParquetFrame``. With the ``append`` save mode, every save adds its chunks after the
+    existing files instead of replacing them, e.g. for tables built incrementally.
+
+    The chunks are written to a staging directory and moved in place once all of them are
+    written, so an iterable failing midway leaves the existing files as they were.
+    """
+
+    DEFAULT_LOAD_ARGS: tp.Dict[str, tp.Any] = {"lazy": False, "columns": None}
+    DEFAULT_SAVE_ARGS: tp.Dict[str, tp.Any] = {
+        "row_group_size": None,
+        "compression": "snappy",
+        "mode": "overwrite",
+    }
+
+    def __init__(  # noqa: PLR0913
+        self,
+        filepath: str,
+        load_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        save_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        credentials: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        fs_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+    ) -> None:
+        """Creates a new instance of ``PartitionedParquetDataset`` pointing to a directory.
+
+        Args:
+            filepath: Directory of the Parquet files, prefixed with a protocol like `s3://`
+                for remote data.
+            load_args: ``lazy`` returns a ``LazyParquetFrame`` instead of a DataFrame,
+                ``columns`` the columns of the DataFrame, all of them by default.
+            save_args: ``row_group_size`` and ``compression`` of the Parquet files, and the
+                ``mode``, "overwrite" to replace the existing files or "append" to add to them.
+            credentials: Credentials required to get access to the underlying filesystem.
+            fs_args: Extra arguments to pass into underlying filesystem class constructor.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+
+        self._protocol = protocol
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        self._load_args = {**self.DEFAULT_LOAD_ARGS, **(load_args or {})}
+        self._save_args = {**self.DEFAULT_SAVE_ARGS, **(save_args or {})}
+
+    def _describe(self) -> tp.Dict[str, tp.Any]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            load_args=self._load_args,
+            save_args=self._save_args,
+        )
+
+    def _load(self) -> tp.Union[pd.DataFrame, LazyParquetFrame]:
+        frame = LazyParquetFrame(fs=self._fs, paths=self._list_parts())
+        if self._load_args["lazy"]:
+            return frame
+        return frame.to_pandas(columns=self._load_args["columns"]).reset_index(drop=True)
+
+    def _save(self, data: tp.Union[pd.DataFrame, tp.Iterable[pd.DataFrame]]) -> None:
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        directory = get_filepath_str(self._filepath, self._protocol)
+        append = self._save_args["mode"] == "append"
+        first_part = 0
+        if append:
+            parts = self._list_parts()
+            first_part = int(PurePosixPath(parts[-1]).stem.split("-")[-1]) + 1 if parts else 0
+            # nothing new, no empty file
+            chunks = (chunk for chunk in chunks if len(chunk))
+
+        staging = f"{directory}/_staging-{uuid.uuid4().hex}"
+        self._fs.makedirs(staging, exist_ok=True)
+        try:
+            names = [
+                self._write_part(chunk, staging, PART_TEMPLATE.format(part))
+                for part, chunk in enumerate(chunks, start=first_part)
+            ]
+            if not append:
+                self.reset()
+            for name in names:
+                self._fs.mv(f"{staging}/{name}", f"{directory}/{name}")
+        finally:
+            if self._fs.exists(staging):
+                self._fs.rm(staging, recursive=True)
+
+    def _write_part(self, chunk: pd.DataFrame, directory: str, name: str) -> str:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        with self._fs.open(f"{directory}/{name}", mode="wb") as fs_file:
+            pq.write_table(
+                table,
+                fs_file,
+                row_group_size=self._save_args["row_group_size"],
+                compression=self._save_args["compression"],
+                write_statistics=True,
+            )
+        return name
+
+    def _exists(self) -> bool:
+        return bool(self._list_parts())
+
+    def reset(self) -> None:
+        """Remove the Parquet files of the dataset."""
+        for path in self._list_parts():
+            self._fs.rm(path)
+
+    def _list_parts(self) -> tp.List[str]:
+        directory = get_filepath_str(self._filepath, self._protocol)
+        if not self._fs.exists(directory):
+            return []
+        return sorted(self._fs.glob(f"{directory}/part-*.parquet"))
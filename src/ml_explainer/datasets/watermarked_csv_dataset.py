@@ -0,0 +1,150 @@
+"""``WatermarkedCSVDataset`` loads only the rows appended to a CSV file since the last confirmed
+load.
+"""
+import io
+import json
+import logging
+import typing as tp
+from copy import deepcopy
+from pathlib import PurePosixPath
+
+import fsspec
+import pandas as pd
+from kedro.io import AbstractDataset
+from kedro.io.core import DatasetError, get_filepath_str, get_protocol_and_path
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkedCSVDataset(AbstractDataset):
+    """``WatermarkedCSVDataset`` reads an append-only CSV file from its watermark, the byte
+    offset of the first row not processed yet, so every load parses the new rows only. The
+    rows are indexed by their position in the file.
+
+    The watermark moves past the loaded rows when the dataset is confirmed, i.e. by the node
+    declaring it in ``confirms`` once the rows are processed and saved, so the rows of a failed
+    run are loaded again by the next one. ``reset`` removes the watermark, the next load
+    reading the whole file.
+
+    Example usage for the
+    `YAML API <https://kedro.readthedocs.io/en/stable/data/\
+    data_catalog_yaml_examples.html>`_:
+
+    .. code-block:: yaml
+
+        reviews_delta:
+          type: ml_explainer.datasets.WatermarkedCSVDataset
+          filepath: data/01_raw/reviews.csv
+          watermark_filepath: data/02_intermediate/watermarks/reviews.json
+
+    Rows are expected one per line: a last line without its line break is being written and
+    waits for the next load. A file whose header changed, or shorter than its watermark, was
+    rewritten instead of appended to and fails to load until the watermark is reset.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        filepath: str,
+        watermark_filepath: tp.Optional[str] = None,
+        load_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        credentials: tp.Optional[tp.Dict[str, tp.Any]] = None,
+        fs_args: tp.Optional[tp.Dict[str, tp.Any]] = None,
+    ) -> None:
+        """Creates a new instance of ``WatermarkedCSVDataset`` pointing to a CSV file.
+
+        Args:
+            filepath: Path to the CSV file, prefixed with a protocol like `s3://` for remote
+                data.
+            watermark_filepath: JSON file of the watermark, on the filesystem of the CSV file,
+                ``<filepath>.watermark.json`` by default.
+            load_args: Arguments of ``pandas.read_csv``.
+            credentials: Credentials required to get access to the underlying filesystem.
+            fs_args: Extra arguments to pass into underlying filesystem class constructor.
+        """
+        _fs_args = deepcopy(fs_args) or {}
+        _credentials = deepcopy(credentials) or {}
+
+        protocol, path = get_protocol_and_path(filepath)
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+
+        self._protocol = protocol
+        self._fs = fsspec.filesystem(self._protocol, **_credentials, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        if watermark_filepath is None:
+            self._watermark_filepath = self._filepath.with_name(
+                self._filepath.name + ".watermark.json"
+            )
+        else:
+            self._watermark_filepath = PurePosixPath(get_protocol_and_path(watermark_filepath)[1])
+        self._load_args = deepcopy(load_args) or {}
+        self._pending: tp.Optional[tp.Dict[str, tp.Any]] = None
+
+    def _describe(self) -> tp.Dict[str, tp.Any]:
+        return dict(
+            filepath=self._filepath,
+            protocol=self._protocol,
+            watermark_filepath=self._watermark_filepath,
+            load_args=self._load_args,
+        )
+
+    def _load(self) -> pd.DataFrame:
+        filepath = get_filepath_str(self._filepath, self._protocol)
+        watermark = self._read_watermark()
+        with self._fs.open(filepath, mode="rb") as fs_file:
+            header = fs_file.readline()
+            offset = watermark.get("offset", len(header))
+            if watermark and (
+                watermark["header"] != header.decode() or self._fs.size(filepath) < offset
+            ):
+                raise DatasetError(
+                    f"'{filepath}' was rewritten since its watermark, reset it with a full "
+                    f"refresh."
+                )
+            fs_file.seek(offset)
+            appended = fs_file.read()
+
+        complete = appended[: appended.rfind(b"\n") + 1]
+        data = pd.read_csv(io.BytesIO(header + complete), **self._load_args)
+        start = watermark.get("rows", 0)
+        data.index = pd.RangeIndex(start, start + len(data))
+        self._pending = {
+            "offset": offset + len(complete),
+            "rows": start + len(data),
+            "header": header.decode(),
+        }
+        logger.info("Loaded %d new rows of '%s' after row %d.", len(data), filepath, start)
+        return data
+
+    def _save(self, data: pd.DataFrame) -> None:
+        raise DatasetError(f"'{self.__class__.__name__}' is a read only dataset type")
+
+    def _exists(self) -> bool:
+        return self._fs.exists(get_filepath_str(self._filepath, self._protocol))
+
+    def confirm(self) -> None:
+        """Move the watermark past the rows of the last load."""
+        if self._pending is None:
+            return
+        path = get_filepath_str(self._watermark_filepath, self._protocol)
+        with self._fs.open(path, mode="w") as fs_file:
+            json.dump(self._pending, fs_file, indent=2)
+        self._pending = None
+
+    def has_watermark(self) -> bool:
+        """Whether loaded rows were confirmed since the watermark was created or reset."""
+        return bool(self._read_watermark())
+
+    def reset(self) -> None:
+        """Remove the watermark, the next load reads the whole file."""
+        path = get_filepath_str(self._watermark_filepath, self._protocol)
+        if self._fs.exists(path):
+            self._fs.rm(path)
+        self._pending = None
+
+    def _read_watermark(self) -> tp.Dict[str, tp.Any]:
+        path = get_filepath_str(self._watermark_filepath, self._protocol)
+        if not self._fs.exists(path):
+            return {}
+        with self._fs.open(path, mode="r") as fs_file:
+            return json.load(fs_file)
@@ -0,0 +1,143 @@
+"""Project hooks."""
+import logging
+import typing as tp
+from copy import deepcopy
+
+from kedro.framework.hooks import hook_impl
+from kedro.io import AbstractDataset, DataCatalog, DatasetError
+from kedro.pipeline import Pipeline
+
+from ml_explainer.datasets import WatermarkedCSVDataset
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnProjection:
+    """
+    ``usecols`` callable of ``pandas.read_csv`` and ``pandas.read_excel`` keeping the
+    ``columns`` a table holds, unlike a list, which fails on the columns it doesn't hold.
+
+    Parameters:
+    - columns (iterable of str): Columns to load.
+    """
+
+    def __init__(self, columns: tp.Iterable[str]):
+        self.columns = frozenset(columns)
+
+    def __call__(self, column: str) -> bool:
+        return column in self.columns
+
+    def __repr__(self) -> str:
+        # stable, it is part of the key of the cached datasets
+        return f"ColumnProjection({sorted(self.columns)})"
+
+
+class ProjectionPushdownHooks:
+    """
+    Load only the columns the model uses, from the ``features`` and ``target`` of the
+    ``model_hyperparameters``, so the joins and the null checks of the data processing don't
+    handle the other columns of the raw tables.
+
+    Configured by ``data_processing.projection``: the ``raw_datasets`` (CSV and Excel) load the
+    features, the target and the ``join_keys`` they hold, and the ``feature_datasets``
+    (Parquet), holding every feature, load the features and the target only.
+    """
+
+    @hook_impl
+    def after_catalog_created(
+        self,
+        catalog: DataCatalog,
+        conf_catalog: tp.Dict[str, tp.Any],
+        conf_creds: tp.Dict[str, tp.Any],
+        feed_dict: tp.Dict[str, tp.Any],
+    ) -> None:
+        projection = (feed_dict.get("params:data_processing") or {}).get("projection") or {}
+        model_params = feed_dict.get("params:model_hyperparameters") or {}
+        if not projection.get("enabled", False) or "features" not in model_params:
+            return
+
+        model_columns = [*model_params["features"], model_params["target"]]
+        raw_columns = ColumnProjection([*model_columns, *projection.get("join_keys", [])])
+        for name in projection.get("raw_datasets", []):
+            self._project(catalog, conf_catalog, conf_creds, name, {"usecols": raw_columns})
+        for name in projection.get("feature_datasets", []):
+            self._project(catalog, conf_catalog, conf_creds, name, {"columns": model_columns})
+
+    @staticmethod
+    def _project(
+        catalog: DataCatalog,
+        conf_catalog: tp.Dict[str, tp.Any],
+        conf_creds: tp.Dict[str, tp.Any],
+        name: str,
+        load_args: tp.Dict[str, tp.Any],
+    ) -> None:
+        if name not in conf_catalog:
+            return
+        config = deepcopy(conf_catalog[name])
+        if isinstance(config.get("credentials"), str):
+            config["credentials"] = (conf_creds or {})[config["credentials"]]
+        config["load_args"] = {**(config.get("load_args") or {}), **load_args}
+        catalog.add(name, AbstractDataset.from_config(name, config), replace=True)
+        logger.info("Loading %s with %s.", name, load_args)
+
+
+class FullRefreshHooks:
+    """
+    Reset the incremental datasets of the pipeline about to run when
+    ``data_processing.incremental.full_refresh`` is set, so the raw inputs are processed again
+    from their first row and the incremental outputs rebuilt instead of appended to.
+
+    The datasets reset are the ``incremental.reset_datasets`` the pipeline uses, the watermarks
+    of the ``WatermarkedCSVDataset`` inputs and the files of the ``PartitionedParquetDataset``
+    outputs appended to.
+
+    Without a full refresh, the watermarks and the outputs appended to must agree: a pipeline
+    saving one of the ``incremental.rebuilt_datasets`` resets the watermarks, and a pipeline
+    reading an input without watermark fails if its outputs appended to hold rows already,
+    instead of appending them again.
+    """
+
+    @hook_impl
+    def before_pipeline_run(self, pipeline: Pipeline, catalog: DataCatalog) -> None:
+        if "params:data_processing" not in catalog.list():
+            return
+        incremental = catalog.load("params:data_processing").get("incremental") or {}
+        reset_datasets = [
+            name for name in incremental.get("reset_datasets", []) if name in catalog.list()
+        ]
+        if set(incremental.get("rebuilt_datasets", [])) & pipeline.all_outputs():
+            for name in reset_datasets:
+                dataset = getattr(catalog.datasets, name)
+                if isinstance(dataset, WatermarkedCSVDataset):
+                    logger.info("Rebuilding the incremental outputs: resetting %s.", name)
+                    dataset.reset()
+
+        used = pipeline.data_sets()
+        datasets = {
+            name: getattr(catalog.datasets, name) for name in reset_datasets if name in used
+        }
+        if incremental.get("full_refresh", False):
+            for name, dataset in datasets.items():
+                logger.info("Full refresh: resetting %s.", name)
+                dataset.reset()
+            return
+
+        watermarked = {
+            name: dataset
+            for name, dataset in datasets.items()
+            if isinstance(dataset, WatermarkedCSVDataset)
+        }
+        unwatermarked = [
+            name for name, dataset in watermarked.items() if not dataset.has_watermark()
+        ]
+        filled = [
+            name
+            for name, dataset in datasets.items()
+            if name not in watermarked and dataset.exists()
+        ]
+        if unwatermarked and filled:
+            raise DatasetError(
+                f"{unwatermarked} have no watermark but {filled} hold rows already, which the "
+                f"run would append again. Rebuild them with a full refresh "
+                f"(--params data_processing.incremental.full_refresh:true)."
+            )
@@ -0,0 +1,152 @@
+"""Model agnostic permutation SHAP values with a convergence-driven evaluation budget."""
+import logging
+import typing as tp
+
+import numpy as np
+import pandas as pd
+import shap
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePermutationExplainer:
+    """
+    Interventional permutation SHAP values that stop sampling once every row has converged.
+
+    Every sample is an antithetic pair of permutations, a random feature ordering and its
+    reverse, whose marginal contributions are averaged, so each sample already satisfies the
+    additivity of the SHAP values. Pairs are drawn for all the rows still running at once
+    until the standard error of every SHAP value of a row is below ``tolerance`` or the row
+    spent ``max_evals`` evaluations of the masked model, so rows that settle quickly stop
+    early while the hard ones get the whole budget.
+
+    Parameters:
+    - predict (callable): Prediction function of the model to explain.
+    - background (pd.DataFrame): Background data integrating out the missing features.
+    - tolerance (float): Target standard error of every SHAP value, in units of the output.
+    - max_evals (int): Maximum number of evaluations of the masked model for each row, one
+      evaluation being the average prediction over the background of a coalition.
+    - min_permutations (int): Minimum number of antithetic pairs per row, at least 2 to
+      estimate the standard error.
+    - max_batch_rows (int): Maximum number of rows of each call to ``predict``.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        predict: tp.Callable[[pd.DataFrame], np.ndarray],
+        background: pd.DataFrame,
+        tolerance: float = 0.01,
+        max_evals: int = 1000,
+        min_permutations: int = 4,
+        max_batch_rows: int = 500_000,
+    ):
+        self.predict = predict
+        self.background = background.to_numpy(dtype=float)
+        self.feature_names = list(background.columns)
+        self.tolerance = tolerance
+        self.max_evals = max_evals
+        self.min_permutations = max(2, min_permutations)
+        self.max_batch_rows = max_batch_rows
+
+    def __call__(self, X: pd.DataFrame) -> shap.Explanation:
+        """
+        Explain the rows of ``X``.
+
+        Parameters:
+        - X (pd.DataFrame): Data to explain.
+
+        Returns:
+        - shap.Explanation: The SHAP values, with their standard error in ``error_std``.
+        """
+        data = X[self.feature_names].to_numpy(dtype=float)
+        n_rows, n_features = data.shape
+        base_value = float(np.mean(self._predict(self.background)))
+        full_values = np.ravel(self._predict(data)) if n_rows else np.empty(0)
+
+        # running mean and sum of squared deviations of the samples (Welford's algorithm)
+        means = np.zeros((n_rows, n_features))
+        deviations = np.zeros((n_rows, n_features))
+        n_pairs = np.zeros(n_rows, dtype=int)
+        n_evals = np.ones(n_rows, dtype=int)
+        # coalitions of a pair that are neither empty nor full, both of them being shared
+        cost = 2 * (n_features - 1)
+
+        active = np.arange(n_rows) if n_features > 1 else np.empty(0, dtype=int)
+        if n_features == 1:
+            means[:, 0], n_pairs[:] = full_values - base_value, 1
+        while active.size:
+            batch_size = max(1, self.max_batch_rows // (cost * len(self.background)))
+            for start in range(0, len(active), batch_size):
+                rows = active[start : start + batch_size]
+                samples = self._sample_pairs(data[rows], base_value, full_values[rows])
+                delta = samples - means[rows]
+                means[rows] += delta / (n_pairs[rows, None] + 1)
+                deviations[rows] += delta * (samples - means[rows])
+            n_pairs[active] += 1
+            n_evals[active] += cost
+
+            errors = _standard_error(deviations[active], n_pairs[active])
+            converged = (n_pairs[active] >= self.min_permutations) & (
+                errors.max(axis=1) <= self.tolerance
+            )
+            exhausted = n_evals[active] + cost > self.max_evals
+            active = active[~(converged | exhausted)]
+
+        errors = _standard_error(deviations, n_pairs)
+        if n_features == 1:
+            # a single feature gets the whole prediction, without sampling
+            errors[:] = 0.0
+        if n_rows:
+            logger.info(
+                "Adaptive permutation SHAP: %.1f evaluations per row on average, %s rows over "
+                "the tolerance.",
+                n_evals.mean(),
+                int((errors.max(axis=1) > self.tolerance).sum()),
+            )
+        return shap.Explanation(
+            values=means,
+            base_values=np.full(n_rows, base_value),
+            data=data,
+            feature_names=self.feature_names,
+            error_std=errors,
+        )
+
+    def _sample_pairs(
+        self, data: np.ndarray, base_value: float, full_values: np.ndarray
+    ) -> np.ndarray:
+        """Marginal contributions of one antithetic pair of permutations per row."""
+        n_rows, n_features = data.shape
+        order = np.argsort(np.random.random((n_rows, n_features)), axis=1)
+        ranks = np.argsort(order, axis=1)
+
+        # the k first features of the permutation and, for the reverse one, their complement
+        forward = ranks[:, None, :] < np.arange(1, n_features)[None, :, None]
+        values = self._coalition_values(data, np.concatenate([forward, ~forward], axis=1))
+        base = np.full((n_rows, 1), base_value)
+        full = full_values[:, None]
+        forward_values = np.hstack([base, values[:, : n_features - 1], full])
+        reverse_values = np.hstack([full, values[:, n_features - 1 :], base])
+
+        # contribution of the feature at every position, then moved back to feature order
+        contributions = (np.diff(forward_values, axis=1) - np.diff(reverse_values, axis=1)) / 2
+        return np.take_along_axis(contributions, ranks, axis=1)
+
+    def _coalition_values(self, data: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """Average prediction over the background of every coalition of every row."""
+        n_rows, n_coalitions, n_features = masks.shape
+        masked = np.where(
+            masks[:, :, None, :], data[:, None, None, :], self.background[None, None, :, :]
+        )
+        predictions = self._predict(masked.reshape(-1, n_features))
+        return np.reshape(predictions, (n_rows, n_coalitions, -1)).mean(axis=2)
+
+    def _predict(self, data: np.ndarray) -> np.ndarray:
+        return np.ravel(self.predict(pd.DataFrame(data, columns=self.feature_names)))
+
+
+def _standard_error(deviations: np.ndarray, n_pairs: np.ndarray) -> np.ndarray:
+    n_pairs = n_pairs[:, None].astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        errors = np.sqrt(deviations / (n_pairs - 1) / n_pairs)
+    # the error of a single pair is unknown
+    return np.where(n_pairs > 1, errors, np.nan)
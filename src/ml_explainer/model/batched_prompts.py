@@ -0,0 +1,71 @@
+"""Prompts explaining several observations at once, and the split of their answers."""
+import re
+import typing as tp
+
+MARKER = "OBSERVATION {index}"
+
+# a marker alone on its line, whatever the Markdown emphasis or heading around it
+_MARKER_LINE = re.compile(r"^[\W_]*OBSERVATION\s+(\d+)[\W_]*$", re.IGNORECASE | re.MULTILINE)
+
+
+def build_batched_shap_message(shap_prediction_msgs: tp.Dict[int, str]) -> str:
+    """
+    Concatenate the SHAP messages of several observations, each after its marker line.
+
+    Args:
+        shap_prediction_msgs (tp.Dict[int, str]): SHAP message of every observation, by index.
+
+    Returns:
+        str: The message of the batch.
+    """
+    return "".join(
+        f"{MARKER.format(index=index)}\n{message.rstrip()}\n\n"
+        for index, message in shap_prediction_msgs.items()
+    )
+
+
+def build_batched_question(question: str, indices: tp.List[int]) -> str:
+    """
+    Ask ``question`` for every observation of a batch, in a format ``split_batched_answer``
+    parses.
+
+    Args:
+        question (str): The question asked about one observation.
+        indices (list of int): Indices of the observations of the batch.
+
+    Returns:
+        str: The question of the batch.
+    """
+    markers = ", ".join(MARKER.format(index=index) for index in indices)
+    return (
+        f"{question}\n"
+        f"The SHAP values below are of {len(indices)} observations, each one after its "
+        f"line 'OBSERVATION <number>'. Answer the question for every observation "
+        f"separately, in this order: {markers}. Start the answer of every observation with "
+        f"its 'OBSERVATION <number>' alone on one line and don't write these lines elsewhere."
+    )
+
+
+def split_batched_answer(answer: str, indices: tp.List[int]) -> tp.Dict[int, str]:
+    """
+    Split the answer of a batch into the answer of every observation.
+
+    The answer of an observation is the text between its marker line and the next one. Text
+    before the first marker, markers of observations outside the batch and empty answers are
+    ignored, so the observations missing from the result have to be asked again.
+
+    Args:
+        answer (str): The answer of the batch.
+        indices (list of int): Indices of the observations of the batch.
+
+    Returns:
+        tp.Dict[int, str]: The answer of every observation found, by index.
+    """
+    markers = [match for match in _MARKER_LINE.finditer(answer) if int(match.group(1)) in indices]
+    answers = {}
+    for marker, following in zip(markers, markers[1:] + [None]):
+        text = answer[marker.end() : following.start() if following else len(answer)].strip()
+        index = int(marker.group(1))
+        if text and index not in answers:
+            answers[index] = text + "\n"
+    return answers
@@ -0,0 +1,189 @@
+"""Disk-backed key-value cache with size and age based eviction."""
+import logging
+import sqlite3
+import threading
+import time
+import typing as tp
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of variables of a statement
+_MAX_VARIABLES = 900
+# bytes an entry takes besides its key and value: the row header, the numeric columns, the
+# rowid and the entry of the index on ``accessed``
+_ENTRY_OVERHEAD = 48
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('total_size', 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE meta SET value = value + new.size WHERE name = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE meta SET value = value + new.size - old.size WHERE name = 'total_size';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE meta SET value = value - old.size WHERE name = 'total_size';
+END;
+"""
+
+
+class SqliteCache:
+    """
+    Persistent key-value cache stored in a SQLite file.
+
+    When the total size of the entries exceeds ``max_size_bytes`` the least recently used
+    entries are evicted until the cache is back to 90% of its maximum size, and entries stored
+    more than ``ttl_seconds`` ago are treated as missing and evicted. The cache can be shared
+    by several threads.
+
+    Parameters:
+    - filepath (str): Path of the SQLite file, created if it doesn't exist.
+    - max_size_bytes (int): Maximum total size of the entries, unbounded if None. An entry
+      counts its value, its key twice, in the table and in the index of the primary key, and
+      the fixed overhead of its row.
+    - ttl_seconds (float): Maximum age of the entries, unbounded if None.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        max_size_bytes: tp.Optional[int] = None,
+        ttl_seconds: tp.Optional[float] = None,
+    ):
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        self.filepath = filepath
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        # the streaming writers may consume the cache from another thread than the node one
+        self._connection = sqlite3.connect(filepath, timeout=60, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+
+    def get_many(self, keys: tp.Sequence[str]) -> tp.Dict[str, bytes]:
+        """Return the cached values of ``keys``, missing and expired keys are left out."""
+        found = {}
+        with self._lock:
+            for batch in _batches(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders}) "
+                    "AND created >= ?",
+                    [*batch, self._oldest()],
+                )
+                found.update(rows.fetchall())
+            self._touch(list(found))
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def contains_many(self, keys: tp.Sequence[str]) -> tp.Set[str]:
+        """Return the subset of ``keys`` that is cached, without reading the values."""
+        found = set()
+        with self._lock:
+            for batch in _batches(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key FROM entries WHERE key IN ({placeholders}) AND created >= ?",
+                    [*batch, self._oldest()],
+                )
+                found.update(key for (key,) in rows)
+        return found
+
+    def set_many(self, items: tp.Dict[str, bytes]) -> None:
+        """Store ``items`` and evict old entries if the cache grew over its maximum size."""
+        now = time.time()
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO entries (key, value, size, accessed, created) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "value = excluded.value, size = excluded.size, "
+                    "accessed = excluded.accessed, created = excluded.created",
+                    [
+                        (key, value, _entry_size(key, value), now, now)
+                        for key, value in items.items()
+                    ],
+                )
+            self.evict()
+
+    def get(self, key: str) -> tp.Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.set_many({key: value})
+
+    @property
+    def total_size(self) -> int:
+        (total_size,) = self._connection.execute(
+            "SELECT value FROM meta WHERE name = 'total_size'"
+        ).fetchone()
+        return total_size
+
+    def evict(self) -> int:
+        """Evict the expired entries, then the least recently used entries if the cache is
+        over its maximum size.
+
+        Returns:
+            The number of evicted entries.
+        """
+        with self._lock:
+            evicted = 0
+            if self.ttl_seconds is not None:
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "DELETE FROM entries WHERE created < ?", (self._oldest(),)
+                    )
+                evicted += cursor.rowcount
+            if self.max_size_bytes is not None and self.total_size > self.max_size_bytes:
+                excess = self.total_size - int(0.9 * self.max_size_bytes)
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "DELETE FROM entries WHERE key IN (SELECT key FROM ("
+                        "SELECT key, size, SUM(size) OVER (ORDER BY accessed ROWS UNBOUNDED "
+                        "PRECEDING) AS freed FROM entries) WHERE freed - size < ?)",
+                        (excess,),
+                    )
+                evicted += cursor.rowcount
+        if evicted:
+            logger.info("Evicted %s entries from the cache %s.", evicted, self.filepath)
+        return evicted
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _oldest(self) -> float:
+        """Creation time of the oldest entry that isn't expired."""
+        return -float("inf") if self.ttl_seconds is None else time.time() - self.ttl_seconds
+
+    def _touch(self, keys: tp.List[str]) -> None:
+        now = time.time()
+        with self._connection:
+            for batch in _batches(keys):
+                placeholders = ",".join("?" * len(batch))
+                self._connection.execute(
+                    f"UPDATE entries SET accessed = ? WHERE key IN ({placeholders})",
+                    [now, *batch],
+                )
+
+
+def _entry_size(key: str, value: bytes) -> int:
+    return 2 * len(key.encode()) + len(value) + _ENTRY_OVERHEAD
+
+
+def _batches(keys: tp.Sequence[str]) -> tp.Iterator[tp.List[str]]:
+    keys = list(keys)
+    for start in range(0, len(keys), _MAX_VARIABLES):
+        yield keys[start : start + _MAX_VARIABLES]
@@ -0,0 +1,208 @@
+"""Compilation of a fitted stacked regressor into a flat NumPy / booster predictor."""
+import logging
+import pickle
+import typing as tp
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import MaxAbsScaler, RobustScaler, StandardScaler
+
+from ml_explainer.model.stacking_shap import _flatten_steps, _is_linear_model
+
+logger = logging.getLogger(__name__)
+
+
+class StackCompilationError(ValueError):
+    """Raised when a regressor cannot be compiled into a ``CompiledStack``."""
+
+
+class CompiledStack:
+    """
+    Flat predictor equivalent to a fitted ``StackingRegressor`` with a linear final estimator.
+
+    The preprocessing of the branches runs as array math, once per distinct fitted
+    preprocessing, tree ensembles are evaluated directly by their XGBoost booster and linear
+    branches as a dot product, so a prediction skips the sklearn validation and DataFrame
+    conversions of every pipeline step.
+
+    Parameters:
+    - features (list of str): Columns of the input, in the order the stack was fitted on.
+    - preprocessors (list of list): Compiled preprocessing steps, see ``_compile_step``.
+    - branches (list of tuple): Index of the preprocessing and compiled model of every branch.
+    - final_estimator (callable): Compiled linear final estimator, see ``_compile_model``.
+    """
+
+    def __init__(
+        self,
+        features: tp.List[str],
+        preprocessors: tp.List[tp.List[tp.Tuple[str, np.ndarray, np.ndarray]]],
+        branches: tp.List[tp.Tuple[int, tp.Callable[[np.ndarray], np.ndarray]]],
+        final_estimator: tp.Callable[[np.ndarray], np.ndarray],
+    ):
+        self.features = features
+        self.preprocessors = preprocessors
+        self.branches = branches
+        self.final_estimator = final_estimator
+
+    def predict(self, X: tp.Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Predict the rows of ``X``.
+
+        Parameters:
+        - X (pd.DataFrame or numpy.ndarray): Data to predict, arrays must have the columns in
+          the order of ``features``.
+
+        Returns:
+        - numpy.ndarray: The prediction of every row.
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = np.asarray(X, dtype=float)
+
+        transformed = [_preprocess(X, steps) for steps in self.preprocessors]
+        predictions = np.column_stack([model(transformed[index]) for index, model in self.branches])
+        return self.final_estimator(predictions)
+
+
+def compile_stack(
+    regressor: tp.Any,
+    X_check: tp.Optional[pd.DataFrame] = None,
+    rtol: float = 1e-5,
+    atol: float = 1e-6,
+) -> CompiledStack:
+    """
+    Compile a fitted stack of feature-wise pipelines into a ``CompiledStack``.
+
+    Parameters:
+    - regressor (StackingRegressor): Fitted stack whose final estimator is linear and whose
+      branches are imputers and scalers followed by an XGBoost model or a linear model.
+    - X_check (pd.DataFrame): Rows on which the compiled predictions are checked against
+      ``regressor.predict``, not checked if None.
+    - rtol (float): Relative tolerance of the check.
+    - atol (float): Absolute tolerance of the check.
+
+    Returns:
+    - CompiledStack: The compiled predictor.
+
+    Raises:
+    - StackCompilationError: If the stack has an unsupported step or the compiled predictions
+      differ from the ones of the regressor.
+    """
+    final_estimator = getattr(regressor, "final_estimator_", None)
+    if final_estimator is None or not hasattr(regressor, "estimators_"):
+        raise StackCompilationError("the regressor is not a fitted stacking model")
+    if getattr(regressor, "passthrough", False):
+        raise StackCompilationError("stacks with passthrough=True are not supported")
+    if any(method != "predict" for method in regressor.stack_method_):
+        raise StackCompilationError("only stack_method='predict' is supported")
+    if not _is_linear_model(final_estimator):
+        raise StackCompilationError("the final estimator is not a linear model")
+
+    preprocessors, branches, signatures = [], [], []
+    for estimator in regressor.estimators_:
+        steps = _flatten_steps(estimator)
+        preprocessing = [_compile_step(name, step) for name, step in steps[:-1]]
+        signature = pickle.dumps([step for _, step in steps[:-1]])
+        if signature not in signatures:
+            signatures.append(signature)
+            preprocessors.append(preprocessing)
+        branches.append((signatures.index(signature), _compile_model(steps[-1][1])))
+
+    compiled = CompiledStack(
+        features=list(regressor.feature_names_in_),
+        preprocessors=preprocessors,
+        branches=branches,
+        final_estimator=_compile_model(final_estimator),
+    )
+    logger.info(
+        "Compiled the stack: %s branches sharing %s preprocessing passes.",
+        len(branches),
+        len(preprocessors),
+    )
+
+    if X_check is not None:
+        expected = np.ravel(regressor.predict(X_check))
+        actual = compiled.predict(X_check)
+        if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+            error = np.abs(actual - expected).max()
+            raise StackCompilationError(f"compiled predictions differ by up to {error:.3g}")
+    return compiled
+
+
+def _compile_step(name: str, step: tp.Any) -> tp.Tuple[str, np.ndarray, np.ndarray]:
+    """Compile a preprocessing step into ``("impute", fill values)`` or ``("scale", offset,
+    divisor)``, the latter computing ``(X - offset) / divisor``."""
+    if isinstance(step, SimpleImputer):
+        statistics = step.statistics_.astype(float)
+        missing_values = step.missing_values
+        if step.add_indicator or np.isnan(statistics).any():
+            raise StackCompilationError(f"imputer `{name}` changes the feature layout")
+        if not (isinstance(missing_values, float) and np.isnan(missing_values)):
+            raise StackCompilationError(f"imputer `{name}` doesn't impute NaN values")
+        return ("impute", statistics, None)
+    if isinstance(step, StandardScaler):
+        n_features = step.n_features_in_
+        # mean_ is fitted even when the scaler doesn't center
+        offset = step.mean_ if step.with_mean else np.zeros(n_features)
+        divisor = step.scale_ if step.with_std else np.ones(n_features)
+        return ("scale", offset, divisor)
+    if isinstance(step, RobustScaler):
+        n_features = step.n_features_in_
+        offset = step.center_ if step.center_ is not None else np.zeros(n_features)
+        divisor = step.scale_ if step.scale_ is not None else np.ones(n_features)
+        return ("scale", offset, divisor)
+    if isinstance(step, MaxAbsScaler):
+        return ("scale", np.zeros(step.n_features_in_), step.scale_)
+    raise StackCompilationError(f"step `{name}` of type `{type(step).__name__}` is not supported")
+
+
+def _compile_model(model: tp.Any) -> tp.Callable[[np.ndarray], np.ndarray]:
+    if _is_linear_model(model):
+        return _LinearModel(
+            coefficients=np.ravel(model.coef_).astype(float),
+            intercept=float(np.ravel(model.intercept_)[0]),
+        )
+    if hasattr(model, "get_booster"):
+        try:
+            # set only when the model was fitted with early stopping
+            iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+        return _BoosterModel(
+            booster=model.get_booster(), iteration_range=iteration_range, missing=model.missing
+        )
+    raise StackCompilationError(f"model `{type(model).__name__}` is not supported")
+
+
+class _LinearModel:
+    def __init__(self, coefficients: np.ndarray, intercept: float):
+        self.coefficients = coefficients
+        self.intercept = intercept
+
+    def __call__(self, Z: np.ndarray) -> np.ndarray:
+        return Z @ self.coefficients + self.intercept
+
+
+class _BoosterModel:
+    def __init__(self, booster: tp.Any, iteration_range: tp.Tuple[int, int], missing: float):
+        self.booster = booster
+        self.iteration_range = iteration_range
+        self.missing = missing
+
+    def __call__(self, Z: np.ndarray) -> np.ndarray:
+        return self.booster.inplace_predict(
+            Z,
+            iteration_range=self.iteration_range,
+            missing=self.missing,
+            validate_features=False,
+        )
+
+
+def _preprocess(X: np.ndarray, steps: tp.List[tp.Tuple[str, np.ndarray, np.ndarray]]):
+    for kind, first, second in steps:
+        if kind == "impute":
+            X = np.where(np.isnan(X), first, X)
+        else:
+            X = (X - first) / second
+    return X
@@ -1,30 +1,72 @@
-import os
-
-import openai
+import contextlib
+import functools
 import logging
+import os
+import time
 import typing as tp
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from dotenv import find_dotenv, load_dotenv
-from langchain.chains.llm import LLMChain
-from langchain.llms import OpenAI
-from langchain.prompts.prompt import PromptTemplate
 
-from ml_explainer.model.shap_values import generate_msg_by_index, generate_shap_message
+from ml_explainer.datasets import LazyParquetFrame
+from ml_explainer.model.batched_prompts import (
+    build_batched_question,
+    build_batched_shap_message,
+    split_batched_answer,
+)
+from ml_explainer.model.llm_cache import (
+    LLMResponseCache,
+    load_response_cache,
+    prompt_key,
+)
+from ml_explainer.model.llm_metrics import LLMCallMetrics
+from ml_explainer.model.llm_scheduler import LLMScheduler, load_scheduler
+from ml_explainer.model.object_inyection import load_object
+from ml_explainer.model.prompt_builder import (
+    estimate_tokens,
+    generate_compact_msg_by_index,
+    generate_compact_shap_messages,
+)
+from ml_explainer.model.report_checkpoint import (
+    ReportCheckpoint,
+    load_report_checkpoint,
+)
+from ml_explainer.model.report_formatter import render_markdown_report
+from ml_explainer.model.shap_values import generate_msg_by_index, generate_shap_messages
 
-_ = load_dotenv(find_dotenv())
-openai.api_base = os.environ["OPENAI_API_KEY"]
-openai.api_key = os.environ["OPENAI_API_BASE"]
+if tp.TYPE_CHECKING:
+    from langchain.chains.llm import LLMChain
+    from langchain.prompts.prompt import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def configure_openai() -> None:
+    """
+    Configure the OpenAI client from the environment and the ``.env`` file, once.
+
+    Called when the language model is loaded rather than at import time, so the pipelines
+    that don't query it neither import the client nor need its credentials.
+    """
+    import openai
+    from dotenv import find_dotenv, load_dotenv
+
+    load_dotenv(find_dotenv())
+    if os.environ.get("OPENAI_API_KEY"):
+        openai.api_key = os.environ["OPENAI_API_KEY"]
+    if os.environ.get("OPENAI_API_BASE"):
+        openai.api_base = os.environ["OPENAI_API_BASE"]
+
+
 def answer_question_with_llm(
-    template: PromptTemplate,
+    template: "PromptTemplate",
     feature_description_msg: str,
     feature_importance_msg: str,
     shap_prediction_msg: str,
-    llm: LLMChain,
+    llm: "LLMChain",
     question: str,
+    services: tp.Optional[tp.Dict[str, tp.Any]] = None,
 ):
     """
     Generate a final answer to a question using an LLM (Language Model).
@@ -36,6 +78,7 @@ def answer_question_with_llm(
         shap_prediction_msg (str): Message explaining predictions using SHAP values.
         llm: The language model (LLM) to use for generating responses.
         question (str): The question to be answered.
+        services (tp.Dict[str, tp.Any]): Optional services of the call, see ``run_chain``.
 
     Returns:
         str: The final answer to the question.
@@ -51,6 +94,39 @@ def answer_question_with_llm(
         )
         print(final_answer)
     """
+    chain = build_chain(
+        template=template,
+        feature_description_msg=feature_description_msg,
+        feature_importance_msg=feature_importance_msg,
+        shap_prediction_msg=shap_prediction_msg,
+        llm=llm,
+    )
+    return run_chain(chain=chain, question=question, services=services)
+
+
+def build_chain(
+    template: str,
+    feature_description_msg: str,
+    feature_importance_msg: str,
+    shap_prediction_msg: str,
+    llm: tp.Any,
+) -> "LLMChain":
+    """
+    Build the chain answering questions about one set of messages.
+
+    Args:
+        template (str): The template for generating prompts.
+        feature_description_msg (str): Message explaining feature names.
+        feature_importance_msg (str): Message explaining feature importance.
+        shap_prediction_msg (str): Message explaining predictions using SHAP values.
+        llm: The language model (LLM) to use for generating responses.
+
+    Returns:
+        LLMChain: A chain whose only input variable is the question.
+    """
+    from langchain.chains.llm import LLMChain
+    from langchain.prompts.prompt import PromptTemplate
+
     # Format the template with provided messages
     template_formatted = template.format(
         feature_description_msg=feature_description_msg,
@@ -61,33 +137,181 @@ def answer_question_with_llm(
     prompt = PromptTemplate(input_variables=["question"], template=template_formatted)
 
     # Initialize an LLMChain
-    chain = LLMChain(llm=llm, prompt=prompt)
+    return LLMChain(llm=llm, prompt=prompt)
+
+
+def run_chain(
+    chain: "LLMChain",
+    question: str,
+    question_key: str = "",
+    services: tp.Optional[tp.Dict[str, tp.Any]] = None,
+) -> str:
+    """Answer a question with a chain built by ``build_chain``, through the ``services``, all
+    optional: the LLMResponseCache ``cache`` of the responses, the ReportCheckpoint
+    ``checkpoint`` from which an answer already completed is resumed and to which a new one is
+    written, the LLMScheduler ``scheduler`` of the calls actually sent to the LLM and the
+    LLMCallMetrics ``metrics`` recording the source, timings and sizes of the answer under
+    ``question_key``."""
+    services = services or {}
+    cache: tp.Optional[LLMResponseCache] = services.get("cache")
+    checkpoint: tp.Optional[ReportCheckpoint] = services.get("checkpoint")
+    scheduler: tp.Optional[LLMScheduler] = services.get("scheduler")
+    metrics: tp.Optional[LLMCallMetrics] = services.get("metrics")
+    prompt = chain.prompt.format(question=question)
+    # the innermost step reached sets the source of the answer
+    record = dict(source="checkpoint", started=time.perf_counter())
 
-    # Generate the response based on the provided question
-    result = chain.run(question=question)
-    # Combine the result into the final answer
-    final_answer = result + "\n"
+    def call() -> str:
+        record.update(source="llm")
+        start = time.perf_counter()
+        if scheduler is None:
+            result = chain.run(question=question)
+        else:
+            result = scheduler.call(
+                lambda: chain.run(question=question),
+                prompt_tokens=estimate_tokens(prompt),
+                stats=record,
+            )
+        record.update(latency_seconds=time.perf_counter() - start)
+        return result
+
+    def answer() -> str:
+        # Generate the response based on the provided question
+        if cache is None:
+            result = call()
+        else:
+            record.update(source="cache")
+            result = cache.generate(prompt=prompt, llm=chain.llm, call=call)
+        # Combine the result into the final answer
+        return result + "\n"
 
+    if checkpoint is None:
+        final_answer = answer()
+    else:
+        final_answer = checkpoint.run(
+            key=prompt_key(prompt=prompt, llm=chain.llm), call=answer, label=question[:80]
+        )
+    if metrics is not None:
+        metrics.record(question_key=question_key, prompt=prompt, answer=final_answer, stats=record)
     return final_answer
 
 
+def load_llm(parameters: tp.Dict[str, tp.Any], replay: bool = False) -> tp.Any:
+    """
+    Load the language model shared by all the questions of the report.
+
+    Args:
+        parameters (tp.Dict[str, tp.Any]): Parameters of the chain, ``llm`` holds the ``class``
+            and ``kwargs`` of the model, ``OpenAI(temperature=0)`` if missing.
+        replay (bool): Whether the answers are only replayed from the response cache. The model
+            is never called then, so the credentials are not read and a placeholder key is
+            given to the client, which keeps its settings and therefore the cache keys.
+
+    Returns:
+        The language model.
+    """
+    if replay:
+        with _placeholder_credentials():
+            return _build_llm(parameters)
+    configure_openai()
+    return _build_llm(parameters)
+
+
+def _build_llm(parameters: tp.Dict[str, tp.Any]) -> tp.Any:
+    if parameters.get("llm") is None:
+        from langchain.llms import OpenAI
+
+        return OpenAI(temperature=0)
+    return load_object(parameters["llm"])
+
+
+@contextlib.contextmanager
+def _placeholder_credentials() -> tp.Iterator[None]:
+    missing = "OPENAI_API_KEY" not in os.environ
+    if missing:
+        os.environ["OPENAI_API_KEY"] = "replay-only"
+    try:
+        yield
+    finally:
+        if missing:
+            os.environ.pop("OPENAI_API_KEY", None)
+
+
+def run_concurrently(
+    func: tp.Callable[..., str],
+    tasks: tp.List[tp.Dict[str, tp.Any]],
+    max_concurrency: int = 1,
+    priorities: tp.Optional[tp.List[int]] = None,
+) -> tp.List[str]:
+    """
+    Call ``func`` with the keyword arguments of every task, at most ``max_concurrency`` at a time.
+
+    Args:
+        func (callable): Function to call, e.g. ``run_chain``.
+        tasks (list of dict): Keyword arguments of every call.
+        max_concurrency (int): Maximum number of calls in flight, ``1`` runs them sequentially.
+        priorities (list of int): Priority of every task, the lowest started first, then in
+            the order of ``tasks``. The tasks are sorted once and submitted in that order,
+            there is no priority queue: the priorities only order the tasks of one call of
+            this function and a started task isn't preempted.
+
+    Returns:
+        list of str: The result of every task, in the order of ``tasks`` whatever the order in
+        which the calls complete.
+    """
+    priorities = priorities or [0] * len(tasks)
+    order = sorted(range(len(tasks)), key=priorities.__getitem__)
+    if max_concurrency <= 1 or len(tasks) <= 1:
+        results = [func(**tasks[i]) for i in order]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(tasks))) as executor:
+            results = list(executor.map(lambda i: func(**tasks[i]), order))
+    answers = [None] * len(tasks)
+    for i, result in zip(order, results):
+        answers[i] = result
+    return answers
+
+
 def generate_explainability_report(
     shap_df: pd.DataFrame,
     feature_importance_df: pd.DataFrame,
     parameters: tp.Dict[str, tp.Any],
     report_params: tp.Dict[str, tp.Dict],
+    clusters_df: tp.Optional[pd.DataFrame] = None,
 ):
     """
     Generate an explainability report and final answer for a machine learning model.
 
     Args:
-        shap_df (pd.DataFrame): DataFrame containing SHAP values.
+        shap_df (pd.DataFrame): DataFrame containing SHAP values, or a ``LazyParquetFrame`` from
+            which only the explained rows are read.
         feature_importance_df (pd.DataFrame): DataFrame containing feature importance values.
-        parameters (tp.Dict[str, tp.Any]): Parameters for the report generation.
+        parameters (tp.Dict[str, tp.Any]): Parameters for the report generation. ``llm`` is the
+            language model shared by all the questions and ``max_concurrency`` the maximum
+            number of questions sent to it at the same time. ``response_cache`` configures
+            the disk cache of the responses. ``prompt_budget`` enables the compact messages
+            of ``prompt_builder``: ``top_k`` features per SHAP message within
+            ``max_shap_tokens``, and the feature descriptions only in the starter questions
+            unless ``repeat_feature_description``. ``scheduler`` configures the rate limits
+            and retries of the calls, see ``LLMScheduler``, the starter questions
+            being sent first. ``batching.observations_per_prompt`` asks every question about
+            that many observations per prompt, the answer being split per observation, and
+            the observations missing from it asked again one at a time.
         report_params (tp.Dict[str, tp.Any]): Parameters specific to the report.
+            ``checkpoint`` writes every answer to disk as soon as it completes, so a failed
+            run resumes from the completed answers instead of asking them again, see
+            ``ReportCheckpoint``. It is deleted once the report completes unless
+            ``clear_on_success`` is false. The report is rendered locally by
+            ``render_markdown_report``, ``llm_polish`` sends it back to the language model
+            with the ``formatting_question`` to be rewritten.
+        clusters_df (pd.DataFrame): Cluster, size and share of the predictions represented by
+            every row of ``shap_df``, in the same order, see ``cluster_shap_values``. The report
+            then states the share of the predictions every explanation applies to.
 
     Returns:
-        tp.Dict[str, str]: A dictionary containing the report and final answer.
+        tp.Dict[str, tp.Any]: A dictionary containing the ``report``, the metrics of every
+        question in ``llm_call_metrics`` (see ``LLMCallMetrics``) and their aggregates in
+        ``llm_run_summary``.
 
     Example:
         shap_df = pd.DataFrame(...)  # Provide SHAP values DataFrame
@@ -100,10 +324,16 @@ def generate_explainability_report(
         print(result["final_answer"])
     """
     number_of_observations_to_explain = report_params["number_of_observations_to_explain"]
-    feature_description = parameters["feature_description"]
+    if isinstance(shap_df, LazyParquetFrame):
+        shap_df = shap_df.head(number_of_observations_to_explain)
 
-    # define llm
-    llm = OpenAI(temperature=0)
+    # one language model shared by all the questions, answered concurrently
+    cache = load_response_cache(parameters.get("response_cache"))
+    llm = load_llm(parameters, replay=cache is not None and cache.replay)
+    max_concurrency = parameters.get("max_concurrency", 1)
+    checkpoint_params = report_params.get("checkpoint") or {}
+    checkpoint = load_report_checkpoint(checkpoint_params)
+    scheduler = load_scheduler(parameters.get("scheduler"))
 
     # template information
     template = parameters["conversation_chain"]["prompt_template"]
@@ -111,75 +341,262 @@ def generate_explainability_report(
     starter_questions = report_params["starter_questions"]
 
     # starting messages
-    feature_importance_df["description"] = feature_importance_df.index.map(feature_description)
-    feature_description_msg = generate_msg_by_index(
-        df=feature_importance_df, column="description", additional_msg=""
+    feature_importance_df["description"] = feature_importance_df.index.map(
+        parameters["feature_description"]
     )
-    feature_importance_msg = generate_msg_by_index(
-        df=feature_importance_df, column="feature_importance", additional_msg="[%]"
+    observation_shap_df = shap_df.iloc[:number_of_observations_to_explain]
+    messages = _build_messages(
+        shap_df=observation_shap_df,
+        feature_importance_df=feature_importance_df,
+        prompt_budget=parameters.get("prompt_budget") or {},
     )
 
-    # Initial part of the report
-    final_answer = ""
-    for question_key, question in starter_questions.items():
-        answer = answer_question_with_llm(
-            template=template,
-            feature_description_msg=feature_description_msg,
-            feature_importance_msg=feature_importance_msg,
-            shap_prediction_msg="",
-            llm=llm,
-            question=question,
-        )
-        logging_str = f"{question_key} / {question}: {answer}"
-        logger.info(logging_str)
-        final_answer += answer
+    # one chain per set of messages, every question of the report being a task. With
+    # batching a task asks a question about several observations at once
+    build = dict(
+        template=template, feature_importance_msg=messages["feature_importance_msg"], llm=llm
+    )
+    starter_chain = build_chain(
+        feature_description_msg=messages["feature_description_msg"],
+        shap_prediction_msg="",
+        **build,
+    )
+    observation_chain = functools.partial(_observation_chain, messages=messages, build=build)
 
-    # answer all the particular question to the inference
-    for prediction_index in range(number_of_observations_to_explain):
+    metrics = LLMCallMetrics()
+    services = dict(cache=cache, checkpoint=checkpoint, scheduler=scheduler, metrics=metrics)
+    tasks = _question_tasks(starter_chain, starter_questions, services)
+    batch_size = max(1, (parameters.get("batching") or {}).get("observations_per_prompt", 1))
+    indices = list(range(len(messages["shap_prediction_msgs"])))
+    batches = [indices[start : start + batch_size] for start in range(0, len(indices), batch_size)]
+    batch_questions = [(batch, question_key) for batch in batches for question_key in questions]
+    tasks.extend(
+        task
+        for batch in batches
+        for task in _question_tasks(observation_chain(batch), questions, services, batch)
+    )
+    # the starter questions first, the observations can be explained from their answers
+    priorities = [0] * len(starter_questions) + [1] * (len(tasks) - len(starter_questions))
+    metrics.submit()
+    results = run_concurrently(
+        run_chain, tasks, max_concurrency=max_concurrency, priorities=priorities
+    )
 
-        shap_info = shap_df.iloc[prediction_index].to_frame().T
-        shap_prediction_msg = generate_shap_message(shap_info=shap_info)
+    # answers of the starter questions, then of every question of every observation
+    starter_answers = _label_answers(starter_questions, results)
+    answers_by_observation = _split_batched_answers(
+        batch_questions, results[len(starter_questions) :]
+    )
 
-        for question_key, question in questions.items():
-            # define llm
-            llm = OpenAI(temperature=0)
-            # template information
-            template = parameters["conversation_chain"]["prompt_template"]
+    # the observations missing from the answer of their batch are asked one by one
+    missing = [
+        (index, question_key)
+        for index in indices
+        for question_key in questions
+        if (index, question_key) not in answers_by_observation
+    ]
+    if missing:
+        logger.warning(
+            "%s answers missing from the batched answers, asked one observation at a time.",
+            len(missing),
+        )
+        chains = {index: observation_chain([index]) for index, _ in missing}
+        fallback_tasks = [
+            task
+            for index, question_key in missing
+            for task in _question_tasks(
+                chains[index], {question_key: questions[question_key]}, services
+            )
+        ]
+        answers_by_observation.update(
+            zip(missing, run_concurrently(run_chain, fallback_tasks, max_concurrency))
+        )
 
-            final_answer += f"Prediction inference number {prediction_index} {question_key}" + "\n"
+    observation_answers = [
+        _label_answers(
+            questions,
+            [answers_by_observation[index, question_key] for question_key in questions],
+            prefix=f"Prediction {index} ",
+        )
+        for index in indices
+    ]
 
-            answer = answer_question_with_llm(
-                template=template,
-                feature_description_msg=feature_description_msg,
-                feature_importance_msg=feature_importance_msg,
-                shap_prediction_msg=shap_prediction_msg,
-                llm=llm,
-                question=question,
-            )
-            answer = answer.replace(
-                "SHAP Values Explanation",
-                f"### SHAP Values Explanation Prediction index {prediction_index} / question: {question}",
-            )
-            logger.info("==================== Final Anser  ====================")
-            logging_str = f"{question_key} / {question}: {answer}"
-            logger.info(logging_str)
-            final_answer += answer
+    final_answer = render_markdown_report(
+        answers={"starter": starter_answers, "observations": observation_answers},
+        shap_df=observation_shap_df,
+        feature_importance_df=feature_importance_df,
+        clusters_df=clusters_df,
+    )
 
-    logger.info("==================== Final Anser  ====================")
+    if report_params.get("llm_polish", False):
+        # opt-in rewriting of the rendered report by the language model
+        final_answer = _polish_report(
+            report=final_answer,
+            question=report_params["formatting_question"],
+            template=template,
+            llm=llm,
+            services=services,
+        )
+    logger.info("==================== Final Answer ====================")
     logger.info(final_answer)
-    final_answer = final_answer.replace("\n\n", "\n")
+    _log_services(services)
+    if checkpoint is not None and checkpoint_params.get("clear_on_success", True):
+        checkpoint.clear()
+    run_summary = metrics.summary()
+    logger.info("LLM run summary: %s", run_summary)
+    return dict(
+        report=final_answer,
+        llm_call_metrics=metrics.to_frame(),
+        llm_run_summary=run_summary,
+    )
+
+
+def _build_messages(
+    shap_df: pd.DataFrame, feature_importance_df: pd.DataFrame, prompt_budget: tp.Dict[str, tp.Any]
+) -> tp.Dict[str, tp.Any]:
+    """Messages of the prompts: the ``feature_description_msg`` of the starter questions, the
+    ``observation_description_msg`` of the observations, the ``feature_importance_msg`` and the
+    ``shap_prediction_msgs`` of every row of ``shap_df``, compact if ``prompt_budget`` is
+    enabled."""
+    if prompt_budget.get("enabled", False):
+        feature_description_msg = generate_compact_msg_by_index(
+            df=feature_importance_df, column="description", header="description"
+        )
+        feature_importance_msg = generate_compact_msg_by_index(
+            df=feature_importance_df, column="feature_importance", header="importance[%]"
+        )
+        shap_prediction_msgs = generate_compact_shap_messages(
+            shap_df=shap_df,
+            top_k=prompt_budget.get("top_k", 5),
+            max_tokens=prompt_budget.get("max_shap_tokens"),
+        )
+        observation_description_msg = (
+            feature_description_msg
+            if prompt_budget.get("repeat_feature_description", False)
+            else ""
+        )
+    else:
+        feature_description_msg = generate_msg_by_index(
+            df=feature_importance_df, column="description", additional_msg=""
+        )
+        feature_importance_msg = generate_msg_by_index(
+            df=feature_importance_df, column="feature_importance", additional_msg="[%]"
+        )
+        shap_prediction_msgs = generate_shap_messages(shap_df=shap_df)
+        observation_description_msg = feature_description_msg
+    logger.info(
+        "Prompt messages: ~%s tokens of features, ~%s tokens per SHAP message.",
+        estimate_tokens(observation_description_msg + feature_importance_msg),
+        max(map(estimate_tokens, shap_prediction_msgs), default=0),
+    )
+    return dict(
+        feature_description_msg=feature_description_msg,
+        observation_description_msg=observation_description_msg,
+        feature_importance_msg=feature_importance_msg,
+        shap_prediction_msgs=shap_prediction_msgs,
+    )
+
+
+def _observation_chain(
+    batch: tp.List[int], messages: tp.Dict[str, tp.Any], build: tp.Dict[str, tp.Any]
+) -> "LLMChain":
+    """Chain asking about the observations of ``batch``, built from ``messages`` (see
+    ``_build_messages``) and the other arguments of ``build_chain`` in ``build``."""
+    shap_prediction_msgs = messages["shap_prediction_msgs"]
+    if len(batch) == 1:
+        shap_prediction_msg = shap_prediction_msgs[batch[0]]
+    else:
+        shap_prediction_msg = build_batched_shap_message(
+            {index: shap_prediction_msgs[index] for index in batch}
+        )
+    return build_chain(
+        feature_description_msg=messages["observation_description_msg"],
+        shap_prediction_msg=shap_prediction_msg,
+        **build,
+    )
 
-    formatting_question = report_params["formatting_question"] + "\n" + final_answer
 
-    # TODO: add a final formatter of the text
-    _ = answer_question_with_llm(
+def _polish_report(
+    report: str, question: str, template: str, llm: tp.Any, services: tp.Dict[str, tp.Any]
+) -> str:
+    """Rewrite the rendered ``report`` by the language model, asked the formatting
+    ``question``."""
+    polish_chain = build_chain(
         template=template,
         feature_description_msg="",
         feature_importance_msg="",
         shap_prediction_msg="",
         llm=llm,
-        question=formatting_question,
     )
-    return dict(
-        report=final_answer,
+    services["metrics"].submit()
+    return run_chain(
+        chain=polish_chain,
+        question=question + "\n" + report,
+        question_key="llm_polish",
+        services=services,
     )
+
+
+def _question_tasks(
+    chain: "LLMChain",
+    questions: tp.Dict[str, str],
+    services: tp.Dict[str, tp.Any],
+    batch: tp.Optional[tp.List[int]] = None,
+) -> tp.List[tp.Dict[str, tp.Any]]:
+    """Tasks of ``run_chain`` asking every question of ``questions`` to ``chain``, about every
+    observation of ``batch`` if it has several."""
+    return [
+        dict(
+            chain=chain,
+            question=(
+                question
+                if batch is None or len(batch) == 1
+                else build_batched_question(question, batch)
+            ),
+            question_key=question_key,
+            services=services,
+        )
+        for question_key, question in questions.items()
+    ]
+
+
+def _label_answers(
+    questions: tp.Dict[str, str], answers: tp.List[str], prefix: str = ""
+) -> tp.List[tp.Tuple[str, str, str]]:
+    """``(question_key, question, answer)`` of every question, logged after ``prefix``."""
+    labelled = []
+    for (question_key, question), answer in zip(questions.items(), answers):
+        logger.info(f"{prefix}{question_key} / {question}: {answer}")
+        labelled.append((question_key, question, answer))
+    return labelled
+
+
+def _split_batched_answers(
+    batch_questions: tp.List[tp.Tuple[tp.List[int], str]], answers: tp.List[str]
+) -> tp.Dict[tp.Tuple[int, str], str]:
+    """Answer of every ``(observation, question_key)`` from the answers of the batches, without
+    the observations missing from the answer of their batch."""
+    answers_by_observation = {}
+    for (batch, question_key), answer in zip(batch_questions, answers):
+        if len(batch) == 1:
+            answers_by_observation[batch[0], question_key] = answer
+            continue
+        for index, observation_answer in split_batched_answer(answer, batch).items():
+            answers_by_observation[index, question_key] = observation_answer
+    return answers_by_observation
+
+
+def _log_services(services: tp.Dict[str, tp.Any]) -> None:
+    cache, scheduler, checkpoint = (services[name] for name in ("cache", "scheduler", "checkpoint"))
+    if cache is not None:
+        logger.info("LLM response cache: %s hits, %s misses.", cache.hits, cache.misses)
+    if scheduler is not None:
+        logger.info(
+            "LLM scheduler: %s retries, %.1fs throttled.",
+            scheduler.retries,
+            scheduler.throttled_seconds,
+        )
+    if checkpoint is not None:
+        logger.info(
+            "Report checkpoint: %s of %s answers resumed.", checkpoint.resumed, len(checkpoint)
+        )
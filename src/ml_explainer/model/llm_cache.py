@@ -0,0 +1,117 @@
+"""Persistent cache of the LLM responses keyed by prompt and model settings."""
+import hashlib
+import json
+import logging
+import typing as tp
+
+from ml_explainer.model.cache import SqliteCache
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_key(prompt: str, llm: tp.Any) -> str:
+    """Hash of a prompt, the class of the model it is sent to and its identifying settings."""
+    settings = {
+        "prompt": prompt,
+        "llm": type(llm).__name__,
+        "params": getattr(llm, "_identifying_params", {}),
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMCacheMissError(KeyError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+class LLMResponseCache:
+    """
+    Disk-backed cache of the responses of a language model.
+
+    Every response is keyed by a hash of the fully formatted prompt, the class of the model
+    and its identifying settings (model name, temperature, ...), so changing the prompt or the
+    model never reuses a stale response. In replay mode the model is never called and a
+    prompt missing from the cache raises ``LLMCacheMissError``, so runs can be reproduced
+    without network access.
+
+    Args:
+        filepath (str): Path of the SQLite file of the cache.
+        max_size_mb (float): Maximum size of the responses, least recently used ones are
+            evicted beyond it.
+        ttl_hours (float): Maximum age of the responses, unbounded if None.
+        replay (bool): Only read the responses from the cache.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        max_size_mb: tp.Optional[float] = None,
+        ttl_hours: tp.Optional[float] = None,
+        replay: bool = False,
+    ):
+        self._store = SqliteCache(
+            filepath=filepath,
+            max_size_bytes=None if max_size_mb is None else int(max_size_mb * 2**20),
+            ttl_seconds=None if ttl_hours is None else ttl_hours * 3600,
+        )
+        self.replay = replay
+
+    @property
+    def hits(self) -> int:
+        return self._store.hits
+
+    @property
+    def misses(self) -> int:
+        return self._store.misses
+
+    def key(self, prompt: str, llm: tp.Any) -> str:
+        """Return the cache key of a prompt sent to ``llm``."""
+        return prompt_key(prompt=prompt, llm=llm)
+
+    def generate(self, prompt: str, llm: tp.Any, call: tp.Callable[[], str]) -> str:
+        """
+        Return the cached response of ``prompt``, calling the model only on a cache miss.
+
+        Args:
+            prompt (str): The fully formatted prompt.
+            llm: The language model answering the prompt.
+            call (callable): Sends the prompt to the model and returns its response.
+
+        Returns:
+            str: The response of the model.
+
+        Raises:
+            LLMCacheMissError: In replay mode, if the prompt isn't cached.
+        """
+        key = self.key(prompt=prompt, llm=llm)
+        cached = self._store.get(key)
+        if cached is not None:
+            return cached.decode()
+        if self.replay:
+            raise LLMCacheMissError(f"No cached response for the prompt {key} in replay mode.")
+
+        response = call()
+        self._store.set(key, response.encode())
+        return response
+
+
+def load_response_cache(
+    cache_params: tp.Optional[tp.Dict[str, tp.Any]]
+) -> tp.Optional[LLMResponseCache]:
+    """
+    Build the response cache from its parameters.
+
+    Args:
+        cache_params (tp.Dict[str, tp.Any]): ``enabled``, ``filepath``, ``max_size_mb``,
+            ``ttl_hours`` and ``replay``.
+
+    Returns:
+        LLMResponseCache: The cache, None if missing or disabled.
+    """
+    if not cache_params or not cache_params.get("enabled", False):
+        return None
+    return LLMResponseCache(
+        filepath=cache_params["filepath"],
+        max_size_mb=cache_params.get("max_size_mb"),
+        ttl_hours=cache_params.get("ttl_hours"),
+        replay=cache_params.get("replay", False),
+    )
@@ -0,0 +1,121 @@
+"""Metrics of the calls to the language model answering the questions of the report."""
+import threading
+import time
+import typing as tp
+
+import numpy as np
+import pandas as pd
+
+from ml_explainer.model.prompt_builder import estimate_tokens
+
+# where an answer comes from: the language model, the response cache or the report checkpoint
+SOURCES = ("llm", "cache", "checkpoint")
+
+
+class LLMCallMetrics:
+    """
+    Thread-safe recorder of one row of metrics per question of the report.
+
+    Every row holds the question key, the source of the answer (see ``SOURCES``), the time
+    waited for a worker since the questions were submitted, the time throttled by the rate
+    limits, the latency of the request including its retries, and the numbers of tokens of
+    the prompt and of the completion, estimated by ``estimate_tokens``.
+    """
+
+    COLUMNS = [
+        "question_key",
+        "source",
+        "queue_wait_seconds",
+        "throttle_seconds",
+        "latency_seconds",
+        "retries",
+        "prompt_tokens",
+        "completion_tokens",
+    ]
+
+    def __init__(self):
+        self._rows = []
+        self._lock = threading.Lock()
+        self.created = time.perf_counter()
+        self.submitted = self.created
+
+    def submit(self) -> None:
+        """Mark the time the questions are submitted, origin of the queue waits."""
+        self.submitted = time.perf_counter()
+
+    def record(
+        self, question_key: str, prompt: str, answer: str, stats: tp.Dict[str, tp.Any]
+    ) -> None:
+        """
+        Record the metrics of one question.
+
+        Args:
+            question_key (str): Key of the question in the report parameters.
+            prompt (str): The formatted prompt.
+            answer (str): The answer.
+            stats (tp.Dict[str, tp.Any]): The ``source`` of the answer, one of ``SOURCES``, the
+                ``time.perf_counter()`` when the question was ``started`` and, if a request was
+                sent, its ``latency_seconds``, the ``throttle_seconds`` waited for the rate
+                limits and its number of ``retries``.
+        """
+        row = (
+            question_key,
+            stats["source"],
+            max(0.0, stats["started"] - self.submitted),
+            stats.get("throttle_seconds", 0.0),
+            stats.get("latency_seconds", np.nan),
+            stats.get("retries", 0),
+            estimate_tokens(prompt),
+            estimate_tokens(answer),
+        )
+        with self._lock:
+            self._rows.append(row)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the metrics of every question, in the order they completed."""
+        with self._lock:
+            return pd.DataFrame(self._rows, columns=self.COLUMNS)
+
+    def summary(self) -> tp.Dict[str, tp.Any]:
+        """
+        Aggregate the metrics of the run.
+
+        Returns:
+            tp.Dict[str, tp.Any]: Number of questions per source, percentiles of the queue
+            waits and of the latencies of the requests, token totals, largest prompt and
+            throughput of the requests over the wall time of the run.
+        """
+        df = self.to_frame()
+        sent = df[df["source"] == "llm"]
+        wall_seconds = time.perf_counter() - self.created
+        minutes = wall_seconds / 60
+
+        def percentiles(values: pd.Series) -> tp.Dict[str, float]:
+            if values.empty:
+                return {}
+            quantiles = np.percentile(values, [50, 95])
+            return {
+                "mean": float(values.mean()),
+                "p50": float(quantiles[0]),
+                "p95": float(quantiles[1]),
+                "max": float(values.max()),
+            }
+
+        return {
+            "wall_seconds": wall_seconds,
+            "questions": len(df),
+            "by_source": {source: int((df["source"] == source).sum()) for source in SOURCES},
+            "queue_wait_seconds": percentiles(df["queue_wait_seconds"]),
+            "latency_seconds": percentiles(sent["latency_seconds"]),
+            "throttle_seconds": float(sent["throttle_seconds"].sum()),
+            "retries": int(sent["retries"].sum()),
+            "prompt_tokens": int(sent["prompt_tokens"].sum()),
+            "completion_tokens": int(sent["completion_tokens"].sum()),
+            "max_prompt_tokens": int(df["prompt_tokens"].max()) if len(df) else 0,
+            "requests_per_minute": len(sent) / minutes if minutes else 0.0,
+            "tokens_per_minute": (
+                float(sent["prompt_tokens"].sum() + sent["completion_tokens"].sum()) / minutes
+                if minutes
+                else 0.0
+            ),
+        }
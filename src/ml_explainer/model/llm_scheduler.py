@@ -0,0 +1,206 @@
+"""Rate-limited, retrying scheduling of the calls to a language model."""
+import logging
+import random
+import threading
+import time
+import typing as tp
+
+from ml_explainer.model.object_inyection import _load_obj
+
+logger = logging.getLogger(__name__)
+
+T = tp.TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    Args:
+        rate_per_minute (float): Number of tokens added per minute.
+        capacity (float): Maximum number of tokens of the bucket, ``rate_per_minute`` if None,
+            i.e. at most a minute of quota spent in a burst.
+        clock (callable): Monotonic clock in seconds, ``time.monotonic`` by default.
+        sleep (callable): Waits a number of seconds, ``time.sleep`` by default.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: tp.Optional[float] = None,
+        clock: tp.Callable[[], float] = time.monotonic,
+        sleep: tp.Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate_per_minute / 60
+        self.capacity = rate_per_minute if capacity is None else capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Take ``amount`` tokens, waiting until the bucket holds them.
+
+        Args:
+            amount (float): Number of tokens, capped to the capacity of the bucket.
+
+        Returns:
+            float: Number of seconds waited.
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # tolerance for the float rounding of the refill, a clock not advanced by a
+                # tiny sleep would wait forever
+                if self._tokens >= amount - 1e-9:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class LLMScheduler:
+    """
+    Send the calls to a language model within its rate limits, retrying the transient errors.
+
+    Every call first takes one request from the request bucket and its estimated number of
+    tokens from the token bucket, so the calls are spread to stay under the quota of the
+    provider instead of failing on it. A call failing with a ``retry_on`` error is retried
+    after an exponential backoff with full jitter, up to ``max_retries`` times, so concurrent
+    callers don't retry in lockstep.
+
+    The calls aren't timed out by the scheduler, a thread can't be interrupted so a call
+    abandoned on timeout would keep running and be billed while its retry is sent. The
+    timeout is the one of the client, e.g. ``request_timeout`` of the OpenAI model, which
+    cancels the request and raises an error retried if in ``retry_on``, e.g.
+    ``openai.error.Timeout``.
+
+    Args:
+        requests_per_minute (float): Request quota, unlimited if None.
+        tokens_per_minute (float): Token quota (prompt and completion), unlimited if None.
+        completion_tokens (int): Number of tokens of a completion, added to the prompt tokens.
+        max_retries (int): Maximum number of retries of a call.
+        backoff_seconds (float): Maximum delay before the first retry, doubled at every retry.
+        max_backoff_seconds (float): Cap of the maximum delay.
+        retry_on (tuple of exception types): Errors retried, on top of ``TimeoutError`` and
+            ``ConnectionError``.
+        seed (int): Seed of the jitter.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        requests_per_minute: tp.Optional[float] = None,
+        tokens_per_minute: tp.Optional[float] = None,
+        completion_tokens: int = 256,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        retry_on: tp.Tuple[tp.Type[BaseException], ...] = (),
+        seed: tp.Optional[int] = None,
+    ):
+        self._requests = None if requests_per_minute is None else TokenBucket(requests_per_minute)
+        self._tokens = None if tokens_per_minute is None else TokenBucket(tokens_per_minute)
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retry_on = (TimeoutError, ConnectionError, *retry_on)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.throttled_seconds = 0.0
+
+    def call(
+        self,
+        func: tp.Callable[[], T],
+        prompt_tokens: int = 0,
+        stats: tp.Optional[tp.Dict[str, tp.Any]] = None,
+    ) -> T:
+        """
+        Call ``func`` within the rate limits, retrying it on the transient errors.
+
+        Args:
+            func (callable): Sends one request to the model and returns its response.
+            prompt_tokens (int): Estimated number of tokens of the prompt.
+            stats (dict): Filled with the ``throttle_seconds`` and ``retries`` of the call.
+
+        Returns:
+            The result of ``func``.
+
+        Raises:
+            The error of the last attempt once ``max_retries`` retries failed, or any error
+            not in ``retry_on`` right away.
+        """
+        stats = {} if stats is None else stats
+        stats.update(throttle_seconds=0.0, retries=0)
+        for attempt in range(self.max_retries + 1):
+            stats["throttle_seconds"] += self._throttle(prompt_tokens + self.completion_tokens)
+            try:
+                return func()
+            except self.retry_on as error:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._random.uniform(
+                    0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+                )
+                logger.warning(
+                    "LLM call failed (%s: %s), retry %s/%s in %.1fs.",
+                    type(error).__name__,
+                    error,
+                    attempt + 1,
+                    self.max_retries,
+                    delay,
+                )
+                with self._lock:
+                    self.retries += 1
+                stats["retries"] += 1
+                time.sleep(delay)
+
+    def _throttle(self, tokens: int) -> float:
+        waited = 0.0
+        if self._requests is not None:
+            waited += self._requests.acquire(1)
+        if self._tokens is not None:
+            waited += self._tokens.acquire(tokens)
+        if waited:
+            with self._lock:
+                self.throttled_seconds += waited
+        return waited
+
+
+def load_scheduler(
+    scheduler_params: tp.Optional[tp.Dict[str, tp.Any]]
+) -> tp.Optional[LLMScheduler]:
+    """
+    Build the scheduler of the LLM calls from its parameters.
+
+    Args:
+        scheduler_params (tp.Dict[str, tp.Any]): ``enabled`` and the arguments of
+            ``LLMScheduler``, ``retry_on`` holding the import paths of the errors, the paths
+            not found being skipped with a warning.
+
+    Returns:
+        LLMScheduler: The scheduler, None if missing or disabled.
+    """
+    if not scheduler_params or not scheduler_params.get("enabled", False):
+        return None
+    kwargs = {key: value for key, value in scheduler_params.items() if key != "enabled"}
+    kwargs["retry_on"] = tuple(_load_errors(kwargs.get("retry_on") or []))
+    return LLMScheduler(**kwargs)
+
+
+def _load_errors(paths: tp.List[str]) -> tp.Iterator[tp.Type[BaseException]]:
+    # the error classes move between versions of the clients, e.g. openai.error is gone in
+    # openai>=1, a missing one isn't retried instead of failing the report
+    for path in paths:
+        try:
+            yield _load_obj(path)
+        except (ImportError, AttributeError):
+            logger.warning("Error class %s not found, it won't be retried.", path)
@@ -0,0 +1,116 @@
+"""Memoized predictions of the stacked regressor."""
+import logging
+import pickle
+import typing as tp
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+
+class MemoizedPredictor:
+    """
+    Bounded memo of the predictions of a regressor, keyed by the content of the rows.
+
+    Predictions already known, e.g. the base value plus the sum of the SHAP values of an
+    explained row, can be added with ``prime`` so the model is only evaluated on rows it never
+    saw. When the base estimators of a stack share an identical preprocessing, it is applied
+    once and its output is fed to every branch.
+
+    Parameters:
+    - regressor (RegressorMixin): The fitted regression model.
+    - max_size (int): Maximum number of memoized rows, least recently used rows are dropped.
+    - predict (callable): Faster equivalent of ``regressor.predict`` used for the rows that
+      are not memoized, e.g. the one of a ``CompiledStack``.
+    """
+
+    def __init__(
+        self,
+        regressor: tp.Any,
+        max_size: int = 1_000_000,
+        predict: tp.Optional[tp.Callable[[pd.DataFrame], np.ndarray]] = None,
+    ):
+        self.regressor = regressor
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._memo: "OrderedDict[int, float]" = OrderedDict()
+        self._predict = predict or shared_preprocessing_predict(regressor) or regressor.predict
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Predict the rows of ``X``, evaluating the model only on the rows not memoized yet.
+
+        Parameters:
+        - X (pd.DataFrame): Data to predict.
+
+        Returns:
+        - numpy.ndarray: The prediction of every row.
+        """
+        keys = _row_keys(X)
+        predictions = np.array([self._memo.get(key, np.nan) for key in keys], dtype=float)
+        missing = np.array([key not in self._memo for key in keys], dtype=bool)
+
+        self.hits += int((~missing).sum())
+        self.misses += int(missing.sum())
+        if missing.any():
+            predictions[missing] = np.ravel(self._predict(X[missing]))
+        self._store(keys, predictions)
+        return predictions
+
+    def prime(self, X: pd.DataFrame, predictions: np.ndarray) -> None:
+        """Memoize known predictions of the rows of ``X``."""
+        self._store(_row_keys(X), np.ravel(predictions))
+
+    def prime_from_explanation(self, X: pd.DataFrame, shap_values: tp.Any) -> None:
+        """Memoize the predictions implied by an explanation: base value plus SHAP values."""
+        predictions = np.ravel(shap_values.base_values) + np.asarray(shap_values.values).sum(axis=1)
+        self.prime(X, predictions)
+
+    def _store(self, keys: np.ndarray, predictions: np.ndarray) -> None:
+        for key, prediction in zip(keys, predictions):
+            self._memo[key] = prediction
+            self._memo.move_to_end(key)
+        while len(self._memo) > self.max_size:
+            self._memo.popitem(last=False)
+
+
+def shared_preprocessing_predict(regressor: tp.Any) -> tp.Optional[tp.Callable]:
+    """
+    Build a predict function that runs the preprocessing shared by all branches of a stack once.
+
+    Parameters:
+    - regressor (RegressorMixin): The fitted regression model.
+
+    Returns:
+    - callable: Same predictions as ``regressor.predict``, or None if the regressor is not a
+      stack whose branches are pipelines with an identical fitted preprocessing.
+    """
+    estimators = getattr(regressor, "estimators_", None)
+    if not estimators or getattr(regressor, "passthrough", True):
+        return None
+    if any(method != "predict" for method in regressor.stack_method_):
+        return None
+    if not all(isinstance(estimator, Pipeline) and len(estimator) > 1 for estimator in estimators):
+        return None
+    preprocessors = [pickle.dumps(estimator[:-1]) for estimator in estimators]
+    if len(set(preprocessors)) > 1:
+        return None
+
+    preprocessor = estimators[0][:-1]
+    models = [estimator[-1] for estimator in estimators]
+
+    def predict(X: pd.DataFrame) -> np.ndarray:
+        Z = preprocessor.transform(X)
+        predictions = np.column_stack([model.predict(Z) for model in models])
+        return regressor.final_estimator_.predict(predictions)
+
+    logger.info("Sharing the preprocessing of the %s stack branches.", len(models))
+    return predict
+
+
+def _row_keys(X: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(X.astype(float), index=False).to_numpy()
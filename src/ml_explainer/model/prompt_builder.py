@@ -0,0 +1,104 @@
+"""Compact encodings of the messages of the prompts, sized to a token budget."""
+import math
+import typing as tp
+
+import numpy as np
+import pandas as pd
+
+from ml_explainer.model.shap_values import SHAP_META_COLUMNS
+
+# rough number of characters of an English or numeric token of the OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of ``text`` from its length, without a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def generate_compact_shap_messages(
+    shap_df: pd.DataFrame,
+    top_k: int = 5,
+    max_tokens: tp.Optional[int] = None,
+    decimals: int = 2,
+) -> tp.List[str]:
+    """
+    Generate a compact message of the SHAP values of every row of a DataFrame.
+
+    Only the ``top_k`` features with the largest absolute SHAP value of the row are listed,
+    one ``feature|value`` line each by decreasing magnitude, the other features being summed
+    in a single ``other`` line. The base value and the prediction are stated once in the
+    first line instead of as features. While a message is longer than ``max_tokens`` its
+    number of listed features is reduced, down to one.
+
+    Parameters:
+    - shap_df (pd.DataFrame): DataFrame containing SHAP values, one row per observation, and
+      optionally the ``base_value`` and ``prediction`` columns.
+    - top_k (int): Maximum number of features listed per message.
+    - max_tokens (int): Token budget of every message, see ``estimate_tokens``.
+    - decimals (int): Number of decimals of the values.
+
+    Returns:
+    - list of str: The message of every row.
+    """
+    features = np.array([column for column in shap_df.columns if column not in SHAP_META_COLUMNS])
+    values = shap_df[features].to_numpy(dtype=float)
+    base = (
+        shap_df["base_value"].to_numpy(dtype=float)
+        if "base_value" in shap_df
+        else np.full(len(shap_df), np.nan)
+    )
+    prediction = (
+        shap_df["prediction"].to_numpy(dtype=float)
+        if "prediction" in shap_df
+        else base + values.sum(axis=1)
+    )
+    order = np.argsort(-np.abs(values), axis=1, kind="stable")
+
+    messages = []
+    for row in range(len(shap_df)):
+        header = f"prediction={prediction[row]:.{decimals}f}"
+        if not np.isnan(base[row]):
+            header += f" base={base[row]:.{decimals}f}"
+        # features by decreasing magnitude of their SHAP value
+        ranked = (features[order[row]], values[row, order[row]])
+        k = max(1, min(top_k, len(features)))
+        message = _compact_shap_message(header, *ranked, k=k, decimals=decimals)
+        while max_tokens is not None and k > 1 and estimate_tokens(message) > max_tokens:
+            k -= 1
+            message = _compact_shap_message(header, *ranked, k=k, decimals=decimals)
+        messages.append(message)
+    return messages
+
+
+def generate_compact_msg_by_index(
+    df: pd.DataFrame, column: str, header: str, decimals: int = 2
+) -> str:
+    """
+    Generate a ``feature|value`` table of a column indexed by feature.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame indexed by feature name.
+    - column (str): Column of the values.
+    - header (str): Name of the values in the header line.
+    - decimals (int): Number of decimals of the numeric values.
+
+    Returns:
+    - str: The table, one line per feature.
+    """
+    values = df[column]
+    if pd.api.types.is_float_dtype(values.dtype):
+        values = values.map(lambda value: f"{value:.{decimals}f}")
+    lines = [f"feature|{header}"]
+    lines.extend(f"{feature}|{value}" for feature, value in zip(df.index, values))
+    return "\n".join(lines) + "\n"
+
+
+def _compact_shap_message(
+    header: str, features: np.ndarray, values: np.ndarray, k: int, decimals: int
+) -> str:
+    lines = [header, "feature|SHAP"]
+    lines.extend(f"{feature}|{value:+.{decimals}f}" for feature, value in zip(features[:k], values))
+    if len(values) > k:
+        lines.append(f"other({len(values) - k})|{values[k:].sum():+.{decimals}f}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,127 @@
+"""Checkpoint of the sections of a report, written as soon as they are generated."""
+import json
+import logging
+import os
+import threading
+import typing as tp
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ReportCheckpoint:
+    """
+    Append-only record of the completed sections of a report, used to resume a failed run.
+
+    Every section is appended to ``sections.md`` as soon as it is generated, then a line with
+    its key, byte offset and length is appended to ``manifest.jsonl``, both flushed to disk.
+    A section is only resumed once its manifest line is complete, so a run killed in the
+    middle of a write at worst regenerates that section. The sections are stored in the order
+    they complete, the report being assembled in its own order from their keys.
+
+    Args:
+        directory (str): Directory of the checkpoint, created if missing.
+    """
+
+    SECTIONS_FILE = "sections.md"
+    MANIFEST_FILE = "manifest.jsonl"
+
+    def __init__(self, directory: str):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._sections_path = self._directory / self.SECTIONS_FILE
+        self._manifest_path = self._directory / self.MANIFEST_FILE
+        self._lock = threading.Lock()
+        self._sections = self._read_manifest()
+        self.resumed = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sections
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def get(self, key: str) -> str:
+        """Return the text of a completed section."""
+        offset, length = self._sections[key]
+        with open(self._sections_path, "rb") as file:
+            file.seek(offset)
+            return file.read(length).decode()
+
+    def append(self, key: str, text: str, label: str = "") -> None:
+        """
+        Write a completed section to disk.
+
+        Args:
+            key (str): Key of the section, e.g. a hash of its prompt.
+            text (str): Text of the section.
+            label (str): Description of the section, only informative.
+        """
+        data = text.encode()
+        with self._lock:
+            with open(self._sections_path, "ab") as file:
+                offset = file.tell()
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            entry = {"key": key, "offset": offset, "length": len(data), "label": label}
+            with open(self._manifest_path, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self._sections[key] = (offset, len(data))
+
+    def run(self, key: str, call: tp.Callable[[], str], label: str = "") -> str:
+        """Return the section ``key`` if completed, otherwise generate it with ``call`` and
+        write it to disk."""
+        if key in self._sections:
+            with self._lock:
+                self.resumed += 1
+            return self.get(key)
+        text = call()
+        self.append(key=key, text=text, label=label)
+        return text
+
+    def clear(self) -> None:
+        """Delete the checkpoint files."""
+        with self._lock:
+            for path in (self._manifest_path, self._sections_path):
+                path.unlink(missing_ok=True)
+            self._sections = {}
+
+    def _read_manifest(self) -> tp.Dict[str, tp.Tuple[int, int]]:
+        if not self._manifest_path.exists() or not self._sections_path.exists():
+            return {}
+        size = self._sections_path.stat().st_size
+        sections = {}
+        with open(self._manifest_path) as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # line cut by a crash, its section is regenerated
+                    continue
+                if entry["offset"] + entry["length"] <= size:
+                    sections[entry["key"]] = (entry["offset"], entry["length"])
+        if sections:
+            logger.info(
+                "Report checkpoint %s: %s completed sections.", self._directory, len(sections)
+            )
+        return sections
+
+
+def load_report_checkpoint(
+    checkpoint_params: tp.Optional[tp.Dict[str, tp.Any]]
+) -> tp.Optional[ReportCheckpoint]:
+    """
+    Build the report checkpoint from its parameters.
+
+    Args:
+        checkpoint_params (tp.Dict[str, tp.Any]): ``enabled`` and ``directory``.
+
+    Returns:
+        ReportCheckpoint: The checkpoint, None if missing or disabled.
+    """
+    if not checkpoint_params or not checkpoint_params.get("enabled", False):
+        return None
+    return ReportCheckpoint(directory=checkpoint_params["directory"])
@@ -0,0 +1,155 @@
+"""Deterministic Markdown rendering of the explainability report."""
+import re
+import typing as tp
+
+import numpy as np
+import pandas as pd
+
+from ml_explainer.model.shap_values import SHAP_META_COLUMNS
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+
+
+def render_markdown_report(
+    answers: tp.Dict[str, tp.Any],
+    shap_df: pd.DataFrame,
+    feature_importance_df: pd.DataFrame,
+    clusters_df: tp.Optional[pd.DataFrame] = None,
+    title: str = "Explainability report",
+) -> str:
+    """
+    Render the answers of the report as a Markdown document.
+
+    The report has a section for the model, with the table of the feature importance, then
+    a section per explained observation with the table of its SHAP values, and the answers of
+    every question under its own heading. The headings of the answers are shifted under the
+    heading of their question and their whitespace is normalized, so the rendering is the
+    same for the same answers.
+
+    Parameters:
+    - answers (dict): Answers of the report, with the keys:
+        - starter (list of tuple): ``(question_key, question, answer)`` of the starter
+          questions.
+        - observations (list of list of tuple): ``(question_key, question, answer)`` of the
+          questions of every explained observation.
+    - shap_df (pd.DataFrame): SHAP values of the explained observations, in the same order.
+    - feature_importance_df (pd.DataFrame): ``feature_importance`` and optionally
+      ``description`` of every feature, indexed by feature.
+    - clusters_df (pd.DataFrame): Cluster, size and share of the predictions represented by
+      every observation, see ``cluster_shap_values``.
+    - title (str): Title of the report.
+
+    Returns:
+    - str: The report.
+    """
+    sections = [f"# {title}", "## Model", _feature_importance_table(feature_importance_df)]
+    sections.extend(_question_section(*answer) for answer in answers["starter"])
+
+    for index, observation_answers in enumerate(answers["observations"]):
+        sections.append(f"## Prediction {index}{_cluster_msg(clusters_df, index)}")
+        sections.append(_shap_table(shap_df.iloc[index]))
+        sections.extend(_question_section(*answer) for answer in observation_answers)
+
+    if clusters_df is not None and not clusters_df.empty:
+        sections.append("## Predictions coverage")
+        sections.append(
+            markdown_table(
+                pd.DataFrame(
+                    {
+                        "prediction": np.arange(len(clusters_df)),
+                        "cluster": clusters_df["cluster"].to_numpy(),
+                        "predictions": clusters_df["size"].to_numpy(),
+                        "share": clusters_df["share"].map("{:.1%}".format).to_numpy(),
+                    }
+                )
+            )
+        )
+    return "\n\n".join(section for section in sections if section) + "\n"
+
+
+def normalize_markdown(text: str, heading_level: int = 1) -> str:
+    """
+    Normalize the whitespace of a Markdown text and shift its headings.
+
+    Trailing spaces are removed, runs of blank lines are collapsed into one and the headings
+    are shifted so the highest one is of level ``heading_level`` (at most 6). Code blocks are
+    left untouched.
+
+    Parameters:
+    - text (str): Markdown text.
+    - heading_level (int): Level of the highest heading of the result.
+
+    Returns:
+    - str: The normalized text, without leading or trailing blank lines.
+    """
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    in_code = np.cumsum([line.lstrip().startswith("```") for line in lines]) % 2 == 1
+    levels = [
+        len(match.group(1))
+        for line, code in zip(lines, in_code)
+        if not code and (match := _HEADING.match(line))
+    ]
+    shift = heading_level - min(levels) if levels else 0
+
+    normalized = []
+    for line, code in zip(lines, in_code):
+        match = None if code else _HEADING.match(line)
+        output = line
+        if match:
+            output = "#" * min(6, len(match.group(1)) + shift) + " " + match.group(2)
+        if output or code or (normalized and normalized[-1]):
+            normalized.append(output)
+    return "\n".join(normalized)
+
+
+def markdown_table(df: pd.DataFrame) -> str:
+    """Render a DataFrame as a Markdown table, without its index."""
+    cells = df.astype(str).apply(lambda column: column.str.replace("|", r"\|", regex=False))
+    lines = [
+        "| " + " | ".join(map(str, df.columns)) + " |",
+        "|" + "|".join("---" for _ in df.columns) + "|",
+    ]
+    lines.extend("| " + " | ".join(row) + " |" for row in cells.itertuples(index=False))
+    return "\n".join(lines)
+
+
+def _question_section(question_key: str, question: str, answer: str) -> str:
+    question = " ".join(question.split())
+    return f"### {question_key}\n\n> {question}\n\n{normalize_markdown(answer, heading_level=4)}"
+
+
+def _feature_importance_table(feature_importance_df: pd.DataFrame) -> str:
+    table = pd.DataFrame(
+        {
+            "feature": feature_importance_df.index,
+            "importance [%]": feature_importance_df["feature_importance"].map("{:.2f}".format),
+        }
+    )
+    if "description" in feature_importance_df:
+        table["description"] = feature_importance_df["description"].fillna("").to_numpy()
+    return markdown_table(table)
+
+
+def _shap_table(shap_row: pd.Series) -> str:
+    features = shap_row.drop([column for column in SHAP_META_COLUMNS if column in shap_row])
+    features = features.astype(float)
+    features = features.iloc[np.argsort(-features.abs().to_numpy(), kind="stable")]
+    table = pd.DataFrame(
+        {"feature": features.index, "SHAP": features.map("{:+.3f}".format).to_numpy()}
+    )
+    summary = []
+    if "base_value" in shap_row:
+        summary.append(f"base value {float(shap_row['base_value']):.3f}")
+    if "prediction" in shap_row:
+        summary.append(f"prediction {float(shap_row['prediction']):.3f}")
+    return ("**" + ", ".join(summary) + "**\n\n" if summary else "") + markdown_table(table)
+
+
+def _cluster_msg(clusters_df: tp.Optional[pd.DataFrame], prediction_index: int) -> str:
+    if clusters_df is None or prediction_index >= len(clusters_df):
+        return ""
+    cluster = next(clusters_df.iloc[[prediction_index]].itertuples())
+    return (
+        f" (cluster {cluster.cluster}, represents {cluster.size} predictions,"
+        f" {cluster.share:.1%} of the test set)"
+    )
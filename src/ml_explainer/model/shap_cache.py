@@ -0,0 +1,239 @@
+"""Persistent cache of SHAP values keyed by explainer and row content."""
+import hashlib
+import json
+import logging
+import pickle
+import typing as tp
+
+import numpy as np
+import pandas as pd
+import shap
+
+from ml_explainer.model.cache import SqliteCache
+from ml_explainer.model.shap_parallel import explain_in_chunks, iter_explained_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class ShapValueCache:
+    """
+    Disk-backed cache of the SHAP values of single rows.
+
+    Every entry holds the base value, the SHAP values and their standard errors of a row, and
+    is keyed by a hash of the explainer (model, background set, backend and options of the
+    model agnostic explainer) and a hash of the feature values of the row, so re-runs only
+    explain new or changed rows and a new model version, background set or explainer never
+    reuses stale or approximate values.
+
+    Parameters:
+    - filepath (str): Path of the SQLite file of the cache.
+    - explain_params (dict): Parameters of ``explain_in_chunks`` whose values are cached: the
+      fitted ``regressor``, the ``background`` data, the ``backend`` and the
+      ``permutation_params``. The other ones, e.g. the chunk size or the number of workers,
+      don't change the values and are ignored.
+    - max_size_mb (float): Maximum size of the cache, keys included, least recently used rows
+      are evicted beyond it.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        explain_params: tp.Dict[str, tp.Any],
+        max_size_mb: tp.Optional[float] = None,
+    ):
+        max_size_bytes = None if max_size_mb is None else int(max_size_mb * 2**20)
+        self._store = SqliteCache(filepath=filepath, max_size_bytes=max_size_bytes)
+        background = explain_params["background"]
+        self.features = list(background.columns)
+        explainer = json.dumps(
+            {
+                "backend": explain_params.get("backend", "auto"),
+                "permutation_params": explain_params.get("permutation_params") or {},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        self.namespace = hashlib.sha256(
+            "|".join(
+                [
+                    model_fingerprint(explain_params["regressor"]),
+                    frame_fingerprint(background),
+                    explainer,
+                    *self.features,
+                ]
+            ).encode()
+        ).hexdigest()[:32]
+
+    def keys(self, X: pd.DataFrame) -> np.ndarray:
+        """Return the cache key of every row of ``X``."""
+        row_hashes = pd.util.hash_pandas_object(X[self.features].astype(float), index=False)
+        return np.array([f"{self.namespace}:{row_hash:016x}" for row_hash in row_hashes])
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the keys that are cached."""
+        cached = self._store.contains_many(keys)
+        return np.array([key in cached for key in keys], dtype=bool)
+
+    def get(self, keys: np.ndarray) -> tp.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the SHAP values, base values and standard errors of the SHAP values of ``keys``,
+        NaN for the keys that aren't cached, and a boolean mask of the keys that are.
+        """
+        n_features = len(self.features)
+        found = self._store.get_many(keys)
+        rows = np.full((len(keys), 2 * n_features + 1), np.nan)
+        hit = np.array([key in found for key in keys], dtype=bool)
+        if hit.any():
+            rows[hit] = np.stack([np.frombuffer(found[key]) for key in keys[hit]])
+        return rows[:, 1 : n_features + 1], rows[:, 0], rows[:, n_features + 1 :], hit
+
+    def put(
+        self,
+        keys: np.ndarray,
+        values: np.ndarray,
+        base_values: np.ndarray,
+        error_std: np.ndarray,
+    ) -> None:
+        """Store the SHAP values, base values and standard errors of ``keys``."""
+        rows = np.column_stack([base_values, values, error_std]).astype(np.float64)
+        self._store.set_many({key: row.tobytes() for key, row in zip(keys, rows)})
+
+
+def model_fingerprint(regressor: tp.Any) -> str:
+    """Hash of the pickled model, which changes with every retrained version."""
+    return hashlib.sha256(pickle.dumps(regressor)).hexdigest()
+
+
+def frame_fingerprint(frame: pd.DataFrame) -> str:
+    """Hash of the content of a DataFrame, row order included."""
+    row_hashes = pd.util.hash_pandas_object(frame.astype(float), index=False)
+    return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+
+
+def cached_explain_in_chunks(
+    cache: ShapValueCache, frames: tp.List[pd.DataFrame], explain_params: tp.Dict[str, tp.Any]
+) -> tp.List[shap.Explanation]:
+    """
+    Same as ``explain_in_chunks``, but only the rows missing from ``cache`` are explained.
+
+    Parameters:
+    - cache (ShapValueCache): Cache of the SHAP values.
+    - frames (list of pd.DataFrame): DataFrames to explain.
+    - explain_params (dict): Parameters of the explainer and of the computation, see
+      ``explain_in_chunks``.
+
+    Returns:
+    - list of shap.Explanation: The explanation of every DataFrame, rows in the input order.
+    """
+    keys = [cache.keys(frame) for frame in frames]
+    # read before the new rows are stored, which may evict the cached ones
+    cached = [cache.get(frame_keys) for frame_keys in keys]
+    hits = [hit for *_, hit in cached]
+    logger.info("SHAP cache hits: %s of %s rows.", sum(map(np.sum, hits)), sum(map(len, frames)))
+    misses = explain_in_chunks(
+        frames=[frame[~hit] for frame, hit in zip(frames, hits)], explain_params=explain_params
+    )
+
+    explanations = []
+    for frame, frame_keys, (values, base_values, error_std, hit), miss in zip(
+        frames, keys, cached, misses
+    ):
+        miss_rows = (miss.values, miss.base_values, _error_std(miss))
+        if (~hit).any():
+            values[~hit], base_values[~hit], error_std[~hit] = miss_rows
+        cache.put(frame_keys[~hit], *miss_rows)
+        explanations.append(_explanation(frame, values, base_values, error_std))
+    return explanations
+
+
+def cached_iter_explained_chunks(
+    cache: ShapValueCache, X: pd.DataFrame, explain_params: tp.Dict[str, tp.Any]
+) -> tp.Iterator[shap.Explanation]:
+    """
+    Same as ``iter_explained_chunks``, but only the rows missing from ``cache`` are explained.
+
+    Cached and newly explained rows are merged back into chunks of ``chunk_size`` rows, one of
+    the ``explain_params``, in the order of ``X``, reading the cached values one chunk at a time. The cached rows evicted by
+    the rows stored for the previous chunks are explained again.
+
+    Parameters:
+    - cache (ShapValueCache): Cache of the SHAP values.
+    - X (pd.DataFrame): Data to explain.
+    - explain_params (dict): Parameters of the explainer and of the computation, see
+      ``iter_explained_chunks``.
+
+    Returns:
+    - iterator of shap.Explanation: The explanation of every chunk.
+    """
+    keys = cache.keys(X)
+    hit = cache.contains(keys)
+    logger.info("SHAP cache hits: %s of %s rows.", hit.sum(), len(X))
+    misses = _RowStream(iter_explained_chunks(X=X[~hit], explain_params=explain_params))
+    chunk_size = explain_params.get("chunk_size", 1000)
+
+    for start in range(0, len(X), chunk_size):
+        rows = slice(start, start + chunk_size)
+        chunk_keys, chunk_hit = keys[rows], hit[rows]
+        values, base_values, error_std, found = cache.get(chunk_keys)
+        if (~chunk_hit).any():
+            rows_taken = misses.take(int((~chunk_hit).sum()))
+            values[~chunk_hit], base_values[~chunk_hit], error_std[~chunk_hit] = rows_taken
+        evicted = chunk_hit & ~found
+        if evicted.any():
+            (explanation,) = explain_in_chunks(
+                frames=[X.iloc[rows][evicted]], explain_params=explain_params
+            )
+            values[evicted] = explanation.values
+            base_values[evicted] = explanation.base_values
+            error_std[evicted] = _error_std(explanation)
+        new = ~chunk_hit | evicted
+        cache.put(chunk_keys[new], values[new], base_values[new], error_std[new])
+        yield _explanation(X.iloc[rows], values, base_values, error_std)
+
+
+class _RowStream:
+    """Re-chunk a stream of explanations into arbitrary numbers of rows."""
+
+    def __init__(self, explanations: tp.Iterator[shap.Explanation]):
+        self._explanations = explanations
+        self._arrays = []
+        self._n_rows = 0
+
+    def take(self, n_rows: int) -> tp.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the SHAP values, base values and standard errors of the next ``n_rows``."""
+        while self._n_rows < n_rows:
+            explanation = next(self._explanations)
+            self._arrays.append(
+                (
+                    np.asarray(explanation.values),
+                    np.asarray(explanation.base_values),
+                    _error_std(explanation),
+                )
+            )
+            self._n_rows += len(explanation.values)
+        if not self._arrays:
+            return np.empty((0, 0)), np.empty(0), np.empty((0, 0))
+
+        arrays = [np.concatenate(parts) for parts in zip(*self._arrays)]
+        self._arrays = [tuple(array[n_rows:] for array in arrays)]
+        self._n_rows -= n_rows
+        return tuple(array[:n_rows] for array in arrays)
+
+
+def _error_std(explanation: shap.Explanation) -> np.ndarray:
+    """Standard errors of the SHAP values, NaN when the explainer doesn't estimate them."""
+    if explanation.error_std is None:
+        return np.full(np.shape(explanation.values), np.nan)
+    return np.asarray(explanation.error_std, dtype=float)
+
+
+def _explanation(
+    X: pd.DataFrame, values: np.ndarray, base_values: np.ndarray, error_std: np.ndarray
+) -> shap.Explanation:
+    return shap.Explanation(
+        values=values,
+        base_values=base_values,
+        data=X.to_numpy(dtype=float),
+        feature_names=list(X.columns),
+        error_std=error_std,
+    )
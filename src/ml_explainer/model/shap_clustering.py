@@ -0,0 +1,136 @@
+"""Selection of representative observations by clustering their SHAP values."""
+import logging
+import typing as tp
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from ml_explainer.datasets import LazyParquetFrame
+from ml_explainer.model.shap_values import shap_value_columns
+
+logger = logging.getLogger(__name__)
+
+
+def cluster_shap_values(
+    shap_df: tp.Union[pd.DataFrame, LazyParquetFrame],
+    n_clusters: int,
+    batch_size: int = 10000,
+    sample_size: int = 100000,
+    seed: int = 42,
+) -> tp.Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Cluster the observations by their SHAP values and pick one representative per cluster.
+
+    The SHAP vectors, all in the units of the prediction, are clustered with a mini-batch
+    k-means fitted on a uniform sample of the rows, then every row is assigned to its closest
+    centroid batch by batch, so a lazy frame is read twice but never held in memory. The
+    representative of a cluster is its real observation closest to the centroid, an
+    approximate medoid whose explanation applies to every observation of the cluster.
+
+    Parameters:
+    - shap_df (pd.DataFrame or LazyParquetFrame): SHAP values, one row per observation.
+    - n_clusters (int): Number of clusters, so of observations to explain.
+    - batch_size (int): Number of rows of every k-means and assignment batch.
+    - sample_size (int): Approximate number of rows the k-means is fitted on.
+    - seed (int): Random seed.
+
+    Returns:
+    - pd.DataFrame: The rows of ``shap_df`` of the representatives, indexed by their position,
+      the representative of the biggest cluster first.
+    - pd.DataFrame: ``cluster``, ``observation`` (position of the representative), ``size`` and
+      ``share`` of the predictions of every cluster, in the same order.
+    - pd.DataFrame: ``observation``, ``cluster`` and ``distance`` to the centroid of every row.
+    """
+    n_rows = len(shap_df)
+    columns = list(shap_df.columns)
+    features = shap_value_columns(columns)
+    if n_rows == 0 or n_clusters < 1:
+        return (
+            pd.DataFrame(columns=columns),
+            pd.DataFrame(columns=["cluster", "observation", "size", "share"]),
+            pd.DataFrame(columns=["observation", "cluster", "distance"]),
+        )
+
+    # uniform sample of the rows, whatever their order in the data
+    rng = np.random.default_rng(seed)
+    fraction = min(1.0, sample_size / n_rows)
+    sample = np.concatenate(
+        [
+            batch[features].to_numpy(dtype=float)[rng.random(len(batch)) < fraction]
+            for batch in _iter_batches(shap_df, batch_size=batch_size)
+        ]
+    )
+    kmeans = MiniBatchKMeans(
+        n_clusters=max(1, min(n_clusters, len(sample))),
+        batch_size=batch_size,
+        random_state=seed,
+        n_init=3,
+    ).fit(sample)
+
+    labels, distances, best = [], [], {}
+    for batch in _iter_batches(shap_df, batch_size=batch_size):
+        values = batch[features].to_numpy(dtype=float)
+        batch_labels = kmeans.predict(values)
+        batch_distances = np.linalg.norm(values - kmeans.cluster_centers_[batch_labels], axis=1)
+        labels.append(batch_labels)
+        distances.append(batch_distances)
+
+        # closest row of every cluster of the batch, kept if closer than the previous ones
+        order = np.lexsort((batch_distances, batch_labels))
+        clusters = np.unique(batch_labels)
+        for position in order[np.searchsorted(batch_labels[order], clusters)]:
+            cluster = batch_labels[position]
+            if cluster not in best or batch_distances[position] < best[cluster][0]:
+                best[cluster] = (batch_distances[position], batch.iloc[[position]])
+
+    labels, distances = np.concatenate(labels), np.concatenate(distances)
+    sizes = np.bincount(labels, minlength=kmeans.n_clusters)
+
+    # clusters numbered by decreasing size, empty ones dropped
+    ranked = [cluster for cluster in np.argsort(-sizes, kind="stable") if sizes[cluster] > 0]
+    renumber = np.full(kmeans.n_clusters, -1)
+    renumber[ranked] = np.arange(len(ranked))
+
+    representatives = pd.concat([best[cluster][1] for cluster in ranked])
+    clusters_df = pd.DataFrame(
+        {
+            "cluster": np.arange(len(ranked)),
+            "observation": representatives.index.to_numpy(),
+            "size": sizes[ranked],
+            "share": sizes[ranked] / n_rows,
+        }
+    )
+    assignments_df = pd.DataFrame(
+        {"observation": np.arange(n_rows), "cluster": renumber[labels], "distance": distances}
+    )
+    logger.info(
+        "%s representative observations cover %s predictions, the biggest cluster %.1f%%.",
+        len(ranked),
+        n_rows,
+        100 * clusters_df["share"].max(),
+    )
+    return representatives, clusters_df, assignments_df
+
+
+def _iter_batches(
+    shap_df: tp.Union[pd.DataFrame, LazyParquetFrame], batch_size: int
+) -> tp.Iterator[pd.DataFrame]:
+    """Batches of ``batch_size`` rows (the last one excepted), indexed by row position."""
+    if isinstance(shap_df, LazyParquetFrame):
+        # the Parquet batches stop at the end of every file, so they are merged back
+        pending, n_pending = [], 0
+        for batch in shap_df.iter_batches(batch_size=batch_size):
+            pending.append(batch)
+            n_pending += len(batch)
+            if n_pending >= batch_size:
+                merged = pd.concat(pending)
+                yield merged.iloc[:batch_size]
+                pending, n_pending = [merged.iloc[batch_size:]], n_pending - batch_size
+        if n_pending:
+            yield pd.concat(pending)
+        return
+
+    for start in range(0, len(shap_df), batch_size):
+        batch = shap_df.iloc[start : start + batch_size]
+        yield batch.set_axis(pd.RangeIndex(start, start + len(batch)))
@@ -0,0 +1,197 @@
+"""Chunked and multi-process SHAP computation."""
+import collections
+import logging
+import multiprocessing
+import os
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shap
+from threadpoolctl import threadpool_limits
+
+from ml_explainer.model.stacking_shap import build_shap_explainer
+
+logger = logging.getLogger(__name__)
+
+# state of a worker process of the pool: its ``explainer``, built once by ``_init_worker``
+_WORKER: tp.Dict[str, tp.Any] = {}
+
+
+def explain_in_chunks(
+    frames: tp.List[pd.DataFrame], explain_params: tp.Dict[str, tp.Any]
+) -> tp.List[shap.Explanation]:
+    """
+    Calculate the SHAP values of several DataFrames by chunks of rows, optionally in parallel.
+
+    The explainer is built once per worker process and every chunk is explained with its own
+    random seed derived from ``seed`` and the position of the chunk, so the result doesn't
+    depend on the number of workers nor on the order in which the chunks are processed.
+
+    Parameters:
+    - frames (list of pd.DataFrame): DataFrames to explain.
+    - explain_params (dict): Parameters of the explainer and of the computation:
+        - regressor (RegressorMixin): The fitted regression model to explain.
+        - background (pd.DataFrame): Background data for the explainer.
+        - backend (str): SHAP backend, see ``build_shap_explainer``, ``auto`` by default.
+        - predict (callable): Faster equivalent of ``regressor.predict``, see
+          ``build_shap_explainer``.
+        - permutation_params (dict): Options of the model agnostic explainer, see
+          ``build_shap_explainer``.
+        - chunk_size (int): Number of rows explained by each task, 1000 by default.
+        - n_jobs (int): Number of worker processes, ``-1`` uses all the cores and ``1``, the
+          default, explains the chunks sequentially in the current process.
+        - seed (int): Random seed, 42 by default.
+
+    Returns:
+    - list of shap.Explanation: The explanation of every DataFrame, rows in the input order.
+    """
+    chunk_size = explain_params.get("chunk_size", 1000)
+    seed = explain_params.get("seed", 42)
+    tasks = [_chunk_tasks(frame=frame, chunk_size=chunk_size, seed=seed) for frame in frames]
+    results = _run_tasks(
+        tasks=[task for frame_tasks in tasks for task in frame_tasks],
+        explainer_params=_explainer_params(explain_params),
+        n_jobs=explain_params.get("n_jobs", 1),
+    )
+
+    explanations = []
+    for frame, frame_tasks in zip(frames, tasks):
+        frame_results = [next(results) for _ in frame_tasks]
+        explanations.append(_concatenate(frame_results, features=list(frame.columns)))
+    return explanations
+
+
+def iter_explained_chunks(
+    X: pd.DataFrame, explain_params: tp.Dict[str, tp.Any]
+) -> tp.Iterator[shap.Explanation]:
+    """
+    Lazily calculate the SHAP values of a DataFrame by chunks of rows, optionally in parallel.
+
+    Same as ``explain_in_chunks`` for a single DataFrame, but the explanation of every chunk is
+    yielded as soon as it is ready, in row order, and only a few chunks are in flight at any
+    time, so memory stays bounded whatever the number of rows.
+
+    Parameters:
+    - X (pd.DataFrame): Data to explain.
+    - explain_params (dict): Parameters of the explainer and of the computation, see
+      ``explain_in_chunks``, ``chunk_size`` being the number of rows of every chunk.
+
+    Returns:
+    - iterator of shap.Explanation: The explanation of every chunk.
+    """
+    results = _run_tasks(
+        tasks=_chunk_tasks(
+            frame=X,
+            chunk_size=explain_params.get("chunk_size", 1000),
+            seed=explain_params.get("seed", 42),
+        ),
+        explainer_params=_explainer_params(explain_params),
+        n_jobs=explain_params.get("n_jobs", 1),
+    )
+    for result in results:
+        yield _concatenate([result], features=list(X.columns))
+
+
+def _explainer_params(explain_params: tp.Dict[str, tp.Any]) -> tp.Dict[str, tp.Any]:
+    """Arguments of ``build_shap_explainer`` among the ``explain_params``."""
+    return dict(
+        regressor=explain_params["regressor"],
+        background=explain_params["background"],
+        backend=explain_params.get("backend", "auto"),
+        predict=explain_params.get("predict"),
+        permutation_params=explain_params.get("permutation_params"),
+    )
+
+
+def _chunk_tasks(frame: pd.DataFrame, chunk_size: int, seed: int):
+    return [
+        (_chunk_seed(seed, start), frame.iloc[start : start + chunk_size])
+        for start in range(0, len(frame), chunk_size)
+    ]
+
+
+def _run_tasks(
+    tasks: tp.List[tp.Tuple[int, pd.DataFrame]],
+    explainer_params: tp.Dict[str, tp.Any],
+    n_jobs: int,
+) -> tp.Iterator[tp.Tuple[np.ndarray, ...]]:
+    """Explain the chunks in order, keeping at most two tasks per worker in flight."""
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    n_jobs = max(1, min(n_jobs, len(tasks)))
+    logger.info("Explaining %s chunks with %s workers.", len(tasks), n_jobs)
+
+    if n_jobs == 1:
+        # the explainer is passed along rather than kept in the module state, which would
+        # hold the model and the background once the chunks are explained
+        explainer = build_shap_explainer(**explainer_params)
+        for task in tasks:
+            yield _explain_chunk(task, explainer=explainer)
+        return
+
+    # spawn avoids forking a parent that already started the xgboost / OpenMP threads
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(explainer_params, True),
+    ) as executor:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(executor.submit(_explain_chunk, task))
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _init_worker(explainer_params: tp.Dict[str, tp.Any], single_threaded: bool = False):
+    if single_threaded:
+        # one process per core, so the OpenMP / BLAS pools of every worker would oversubscribe
+        threadpool_limits(limits=1)
+    _WORKER["explainer"] = build_shap_explainer(**explainer_params)
+
+
+def _explain_chunk(
+    task: tp.Tuple[int, pd.DataFrame],
+    explainer: tp.Optional[tp.Callable[[pd.DataFrame], shap.Explanation]] = None,
+) -> tp.Tuple[np.ndarray, ...]:
+    chunk_seed, X = task
+    explainer = _WORKER["explainer"] if explainer is None else explainer
+    # the model agnostic explainers draw their permutations from the global numpy state
+    np.random.seed(chunk_seed)
+    explanation = explainer(X.astype(float))
+    values = np.asarray(explanation.values)
+    # only the sampling explainers estimate the error of their SHAP values
+    error_std = explanation.error_std
+    return (
+        values,
+        np.asarray(explanation.base_values),
+        np.asarray(explanation.data),
+        np.full(values.shape, np.nan) if error_std is None else np.asarray(error_std),
+    )
+
+
+def _chunk_seed(seed: int, start: int) -> int:
+    return int(np.random.SeedSequence([seed, start]).generate_state(1)[0])
+
+
+def _concatenate(results: tp.List[tp.Tuple[np.ndarray, ...]], features: tp.List[str]):
+    if not results:
+        empty = np.empty((0, len(features)))
+        return shap.Explanation(
+            values=empty,
+            base_values=np.empty(0),
+            data=empty,
+            feature_names=features,
+            error_std=empty,
+        )
+    values, base_values, data, error_std = (np.concatenate(arrays) for arrays in zip(*results))
+    return shap.Explanation(
+        values=values,
+        base_values=base_values,
+        data=data,
+        feature_names=features,
+        error_std=error_std,
+    )
@@ -0,0 +1,118 @@
+"""Background and explain set selection for SHAP."""
+import logging
+import typing as tp
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_background(X: pd.DataFrame, background_params: tp.Dict[str, tp.Any]) -> pd.DataFrame:
+    """
+    Summarize a (possibly very large) dataset into a small, reproducible SHAP background set.
+
+    Parameters:
+    - X (pd.DataFrame): Data to summarize, usually the training data.
+    - background_params (dict): Parameters of the summarization:
+        - method (str): ``sample``, the default, for a seeded uniform sample, ``stratified``
+          for a seeded sample stratified on the quantiles of ``stratify_by`` or ``kmeans`` for
+          the real rows closest to the k-means centroids, repeated proportionally to the size
+          of their cluster.
+        - size (int): Number of rows of the background set, 100 by default.
+        - seed (int): Random seed, 42 by default.
+        - n_clusters (int): Number of clusters used by the ``kmeans`` method, 20 by default.
+        - stratify_by (str): Column used by the ``stratified`` method.
+        - n_bins (int): Number of quantile bins used by the ``stratified`` method, 10 by
+          default.
+
+    Returns:
+    - pd.DataFrame: The background set, with the columns and dtypes of ``X``.
+    """
+    method = background_params.get("method", "sample")
+    size = background_params.get("size", 100)
+    seed = background_params.get("seed", 42)
+    if len(X) <= size:
+        return X.copy()
+
+    if method == "sample":
+        background = X.sample(size, random_state=seed)
+    elif method == "stratified":
+        background = _stratified_sample(
+            X=X,
+            size=size,
+            seed=seed,
+            stratify_by=background_params.get("stratify_by"),
+            n_bins=background_params.get("n_bins", 10),
+        )
+    elif method == "kmeans":
+        background = _kmeans_representatives(
+            X=X, size=size, seed=seed, n_clusters=background_params.get("n_clusters", 20)
+        )
+    else:
+        raise ValueError(f"Unknown background summarization method `{method}`.")
+
+    logger.info("Summarized %s rows into a %s background of %s rows.", len(X), method, size)
+    return background
+
+
+def sample_explain_set(X: pd.DataFrame, size: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Draw the seeded sample of rows whose SHAP values are calculated.
+
+    Parameters:
+    - X (pd.DataFrame): Data to sample from.
+    - size (int): Number of rows to explain, the whole data is used when it is smaller.
+    - seed (int): Random seed.
+
+    Returns:
+    - pd.DataFrame: The rows to explain.
+    """
+    if len(X) <= size:
+        return X
+    return X.sample(size, random_state=seed)
+
+
+def _stratified_sample(
+    X: pd.DataFrame, size: int, seed: int, stratify_by: tp.Optional[str], n_bins: int
+) -> pd.DataFrame:
+    if stratify_by is None:
+        return X.sample(size, random_state=seed)
+
+    strata = pd.qcut(X[stratify_by].rank(method="first"), q=n_bins, labels=False).to_numpy()
+    counts = _allocate(weights=np.bincount(strata) / len(strata), size=size)
+    background = [
+        X[strata == stratum].sample(count, random_state=seed)
+        for stratum, count in enumerate(counts)
+        if count > 0
+    ]
+    return pd.concat(background)
+
+
+def _kmeans_representatives(X: pd.DataFrame, size: int, seed: int, n_clusters: int):
+    # standardize so that no feature dominates the distances because of its units
+    values = X.astype(float)
+    values = values.fillna(values.median())
+    values = ((values - values.mean()) / values.std(ddof=0).replace(0, 1)).to_numpy()
+
+    kmeans = MiniBatchKMeans(n_clusters=min(n_clusters, size), random_state=seed, n_init=3)
+    labels = kmeans.fit_predict(values)
+    distances = np.linalg.norm(values - kmeans.cluster_centers_[labels], axis=1)
+
+    # closest real row of every cluster, so binary and integer features stay valid
+    clusters = np.unique(labels)
+    order = np.lexsort((distances, labels))
+    first = np.searchsorted(labels[order], clusters)
+    representatives = order[first]
+
+    counts = _allocate(weights=np.bincount(labels)[clusters] / len(labels), size=size)
+    return X.iloc[np.repeat(representatives, counts)]
+
+
+def _allocate(weights: np.ndarray, size: int) -> np.ndarray:
+    """Split ``size`` rows proportionally to ``weights`` with the largest remainder method."""
+    counts = np.floor(weights * size).astype(int)
+    remainder = np.argsort(-(weights * size - counts), kind="stable")
+    counts[remainder[: size - counts.sum()]] += 1
+    return counts
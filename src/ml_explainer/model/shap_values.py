@@ -1,8 +1,18 @@
 import typing as tp
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import shap
+
+from ml_explainer.datasets import LazyParquetFrame
+
+if tp.TYPE_CHECKING:
+    import shap
+
+# columns of the SHAP DataFrames that are not SHAP values
+SHAP_META_COLUMNS = ("base_value", "prediction")
+# prefix of the columns of the standard error of the SHAP values, see
+# ``create_shap_error_dataframe``
+SHAP_ERROR_PREFIX = "std_error:"
 
 
 def generate_shap_beeswarm_plot(shap_values: tp.List[list], max_display=20):
@@ -16,6 +26,9 @@ def generate_shap_beeswarm_plot(shap_values: tp.List[list], max_display=20):
     Returns:
     - matplotlib.figure.Figure: The generated figure.
     """
+    import matplotlib.pyplot as plt
+    import shap
+
     fig, _ = plt.subplots()
     shap.plots.beeswarm(
         shap_values,
@@ -41,38 +54,130 @@ def create_shap_dataframe(shap_values: tp.List[list], features: tp.List[str]):
     Returns:
     - pandas.DataFrame: The resulting DataFrame containing base values and SHAP values.
     """
-    shap_df = pd.DataFrame(shap_values.values, columns=features)
-    shap_df = pd.concat(
-        [pd.DataFrame(shap_values.base_values, columns=["base_value"]), shap_df], axis=1
-    )
-    return shap_df.reset_index(drop=True)
+    values = np.column_stack([np.ravel(shap_values.base_values), shap_values.values])
+    return pd.DataFrame(values, columns=["base_value", *features])
+
+
+def create_shap_error_dataframe(shap_values: "shap.Explanation", features: tp.List[str]):
+    """
+    Create a DataFrame of the standard error of the SHAP values.
 
+    Parameters:
+    - shap_values (shap.Explanation): SHAP values, with their standard error in ``error_std``
+      when estimated by sampling.
+    - features (list of str): The feature names, in the column order of the SHAP values.
+
+    Returns:
+    - pandas.DataFrame: The standard error of every SHAP value in ``std_error:<feature>`` and
+      the largest one of each row in ``std_error:max``, NaN when the explainer doesn't estimate
+      it. The columns can be stored next to the SHAP values, see ``shap_value_columns``.
+    """
+    errors = shap_values.error_std
+    if errors is None:
+        errors = np.full(np.shape(shap_values.values), np.nan)
+    columns = [f"{SHAP_ERROR_PREFIX}{feature}" for feature in features]
+    errors_df = pd.DataFrame(np.asarray(errors, dtype=float), columns=columns)
+    errors_df[f"{SHAP_ERROR_PREFIX}max"] = errors_df[columns].max(axis=1, skipna=False)
+    return errors_df
+
+
+def shap_value_columns(columns: tp.Iterable[str]) -> tp.List[str]:
+    """Return the columns of a SHAP DataFrame holding SHAP values, without the base value, the
+    prediction and the standard errors."""
+    return [
+        column
+        for column in columns
+        if column not in SHAP_META_COLUMNS and not str(column).startswith(SHAP_ERROR_PREFIX)
+    ]
+
+
+class FeatureImportanceAccumulator:
+    """
+    Running state of the SHAP feature importance, updated one batch of SHAP values at a time.
+
+    The importance of a feature is the mean over the rows of its share of the total absolute
+    SHAP movement of the row, in percentage, so only a running sum and a count per feature are
+    kept and any number of rows can be aggregated in constant memory.
 
-def calculate_feature_importance_df(shap_values: tp.List[list], features: tp.List[str]):
+    Parameters:
+    - features (list of str): The feature names, in the column order of the SHAP values.
+    - dtype (numpy dtype): Floating point type of the computation, ``float32`` halves the
+      memory of every batch.
+    """
+
+    def __init__(self, features: tp.List[str], dtype: tp.Any = np.float64):
+        self.features = list(features)
+        self.dtype = np.dtype(dtype)
+        self.shares_sum = np.zeros(len(self.features), dtype=self.dtype)
+        self.count = np.zeros(len(self.features), dtype=np.int64)
+
+    def update(self, shap_values: np.ndarray) -> "FeatureImportanceAccumulator":
+        """
+        Add a batch of SHAP values to the state.
+
+        Parameters:
+        - shap_values (numpy.ndarray): SHAP values with one row per observation and one column
+          per feature.
+
+        Returns:
+        - FeatureImportanceAccumulator: The updated state.
+        """
+        movement = np.abs(np.asarray(shap_values, dtype=self.dtype))
+        total = np.nansum(movement, axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = movement / total * 100
+
+        # rows without any movement have undefined shares and are skipped, as pandas' mean does
+        valid = ~np.isnan(shares)
+        self.shares_sum += np.where(valid, shares, 0).sum(axis=0, dtype=self.dtype)
+        self.count += valid.sum(axis=0)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the feature importances DataFrame sorted by importance."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            importance = self.shares_sum.astype(np.float64) / self.count
+        feature_importance_df = pd.DataFrame(
+            {"feature_importance": importance}, index=pd.Index(self.features)
+        )
+        return feature_importance_df.sort_values(by=["feature_importance"], ascending=False)
+
+
+def calculate_feature_importance_df(
+    shap_values: tp.Any, features: tp.List[str], dtype: tp.Any = np.float64
+) -> pd.DataFrame:
     """
     Calculate feature importances DataFrame from SHAP values.
 
     Parameters:
-    - shap_values (shap.Explanation or pd.DataFrame): SHAP values or DataFrame with SHAP values.
-    - X_train (pd.DataFrame): The original training data with column names.
+    - shap_values (shap.Explanation, pd.DataFrame, LazyParquetFrame or iterable of them): SHAP
+      values, batches are aggregated one at a time so they never have to fit in memory at once.
+    - features (list of str): The feature names.
+    - dtype (numpy dtype): Floating point type of the aggregation.
 
     Returns:
     - pd.DataFrame: The feature importances DataFrame sorted by importance.
     """
-    shap_df = create_shap_dataframe(shap_values=shap_values, features=features)
-
-    shap_df[features] = shap_df[features].apply(abs)
-    shap_df["shap_movement"] = shap_df[features].apply(abs).sum(axis=1)
+    accumulator = FeatureImportanceAccumulator(features=features, dtype=dtype)
+    for values in _iter_shap_arrays(shap_values=shap_values, features=features):
+        accumulator.update(values)
+    return accumulator.to_frame()
 
-    for col in features:
-        shap_df[col] = shap_df[col] / shap_df["shap_movement"] * 100
 
-    feature_importance_df = pd.DataFrame(shap_df[features].mean(), columns=["feature_importance"])
-    feature_importance_df = feature_importance_df.sort_values(
-        by=["feature_importance"], ascending=False
-    )
+def _iter_shap_arrays(shap_values: tp.Any, features: tp.List[str]) -> tp.Iterator[np.ndarray]:
+    """Yield the SHAP values of every batch as a NumPy array with the columns of ``features``."""
+    import shap
 
-    return feature_importance_df
+    if isinstance(shap_values, shap.Explanation):
+        yield np.asarray(shap_values.values)
+    elif isinstance(shap_values, pd.DataFrame):
+        yield shap_values[features].to_numpy()
+    elif isinstance(shap_values, LazyParquetFrame):
+        for batch in shap_values.iter_batches(columns=features):
+            yield batch.to_numpy()
+    else:
+        for batch in shap_values:
+            yield from _iter_shap_arrays(shap_values=batch, features=features)
 
 
 def generate_shap_message(
@@ -87,16 +192,33 @@ def generate_shap_message(
     Returns:
     - str: The generated message explaining the SHAP values.
     """
-    msg = ""
-    shap_info = shap_info.reset_index(drop=True)
-    for col in shap_info.columns:
-        value = str(round(shap_info[col].iloc[0], 3))
-        if value.startswith("-"):
-            msg += f"{col} (has negative influence on the prediction) = {value}\n"
-        else:
-            msg += f"{col} (has positive influence on the prediction) = {value}\n"
+    return generate_shap_messages(shap_df=shap_info.iloc[:1])[0]
+
+
+def generate_shap_messages(shap_df: pd.DataFrame) -> tp.List[str]:
+    """
+    Generate the message explaining the SHAP values of every row of a DataFrame at once.
 
-    return msg
+    The messages are built column by column over NumPy string arrays, so the cost doesn't grow
+    with a Python loop over the cells, and each message is the same as ``generate_shap_message``
+    of its row.
+
+    Parameters:
+    - shap_df (pd.DataFrame): DataFrame containing SHAP values, one row per observation.
+
+    Returns:
+    - list of str: The message of every row.
+    """
+    messages = np.full(len(shap_df), "", dtype=object)
+    for col in shap_df.columns:
+        values = _format_values(shap_df[col])
+        influence = np.where(
+            np.char.startswith(values.astype(str), "-"),
+            f"{col} (has negative influence on the prediction) = ",
+            f"{col} (has positive influence on the prediction) = ",
+        ).astype(object)
+        messages = messages + influence + values + "\n"
+    return messages.tolist()
 
 
 def generate_msg_by_index(df: pd.DataFrame, column: str, additional_msg: str = ""):
@@ -110,14 +232,17 @@ def generate_msg_by_index(df: pd.DataFrame, column: str, additional_msg: str = "
     Returns:
     - str: The generated message explaining feature importance values.
     """
-    msg = ""
-    for feature in df.index:
-        value = df.loc[feature, column]
-        if isinstance(value, float) or isinstance(value, int):
-            value = str(round(df.loc[feature, column], 3))
-        if value.startswith("-"):
-            msg += f"{feature} = {value} {additional_msg}\n"
-        else:
-            msg += f"{feature} = {value} {additional_msg}\n"
-
-    return msg
+    values = _format_values(df[column])
+    return "".join(
+        f"{feature} = {value} {additional_msg}\n" for feature, value in zip(df.index, values)
+    )
+
+
+def _format_values(values: pd.Series) -> np.ndarray:
+    """Round numbers to 3 decimals and format every value as a string, as ``str(round(x, 3))``."""
+    if pd.api.types.is_float_dtype(values.dtype):
+        return np.round(values.to_numpy(dtype=float), 3).astype(str).astype(object)
+    return np.array(
+        [str(round(value, 3)) if isinstance(value, (float, int)) else value for value in values],
+        dtype=object,
+    )
@@ -0,0 +1,238 @@
+"""Model-aware SHAP explainers for stacked regressors."""
+import logging
+import typing as tp
+
+import numpy as np
+import pandas as pd
+import shap
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import (
+    MaxAbsScaler,
+    MinMaxScaler,
+    RobustScaler,
+    StandardScaler,
+)
+
+from ml_explainer.model.adaptive_shap import AdaptivePermutationExplainer
+
+logger = logging.getLogger(__name__)
+
+# transformers that map every input column to exactly one output column, so the SHAP values
+# computed on the transformed matrix are also the SHAP values of the original features
+_FEATURE_WISE_TRANSFORMERS = (
+    SimpleImputer,
+    StandardScaler,
+    MinMaxScaler,
+    MaxAbsScaler,
+    RobustScaler,
+)
+
+
+class StackingDecompositionError(ValueError):
+    """Raised when a regressor cannot be decomposed into explainable branches."""
+
+
+class StackedShapExplainer:
+    """
+    Exact interventional SHAP values for a linear stack of feature-wise pipelines.
+
+    A ``StackingRegressor`` whose ``final_estimator`` is linear predicts
+    ``intercept + sum_k c_k * f_k(x)``, and SHAP values are linear in the model, so the
+    attribution of the stack is the Ridge-weighted sum of the attribution of each branch.
+    Each branch is explained with the fastest exact algorithm available for its estimator:
+    TreeSHAP for tree ensembles (e.g. ``XGBRegressor``) and the closed form
+    ``coef * (z - E[z])`` for linear models (e.g. ``TheilSenRegressor``).
+
+    Parameters:
+    - regressor (StackingRegressor): The fitted stacked model.
+    - background (pd.DataFrame): Background data used to integrate out missing features.
+
+    Raises:
+    - StackingDecompositionError: If the regressor is not a decomposable stack.
+    """
+
+    def __init__(self, regressor: tp.Any, background: pd.DataFrame):
+        self.features = list(background.columns)
+        self.background = background.astype(float)
+        coefficients, intercept = _linear_combination(regressor)
+        self.coefficients = coefficients
+        self.intercept = intercept
+        self.branches = [
+            _build_branch(estimator, self.background) for estimator in regressor.estimators_
+        ]
+        self.expected_value = self.intercept + float(
+            np.dot(self.coefficients, [branch.expected_value for branch in self.branches])
+        )
+
+    def __call__(self, X: pd.DataFrame) -> shap.Explanation:
+        """
+        Calculate the SHAP values of the stack for the rows of ``X``.
+
+        Parameters:
+        - X (pd.DataFrame): Data to explain.
+
+        Returns:
+        - shap.Explanation: SHAP values, base values and data of every row.
+        """
+        X = X[self.features].astype(float)
+        values = np.zeros(X.shape, dtype=float)
+        for coefficient, branch in zip(self.coefficients, self.branches):
+            values += coefficient * branch.shap_values(X)
+
+        return shap.Explanation(
+            values=values,
+            base_values=np.full(X.shape[0], self.expected_value),
+            data=X.to_numpy(),
+            feature_names=self.features,
+        )
+
+
+class _TreeBranch:
+    """Interventional TreeSHAP over the output of the branch preprocessing."""
+
+    def __init__(self, preprocessor: tp.Optional[Pipeline], model: tp.Any, background):
+        self.preprocessor = preprocessor
+        self.explainer = shap.TreeExplainer(
+            model,
+            data=_transform(preprocessor, background),
+            feature_perturbation="interventional",
+            model_output="raw",
+        )
+        self.expected_value = float(np.ravel(self.explainer.expected_value)[0])
+
+    def shap_values(self, X: pd.DataFrame) -> np.ndarray:
+        return self.explainer.shap_values(_transform(preprocessor=self.preprocessor, X=X))
+
+
+class _LinearBranch:
+    """Closed form interventional SHAP values of a linear model."""
+
+    def __init__(self, preprocessor: tp.Optional[Pipeline], model: tp.Any, background):
+        self.preprocessor = preprocessor
+        self.coef = np.ravel(model.coef_).astype(float)
+        self.mean = _transform(preprocessor, background).mean(axis=0)
+        self.expected_value = float(np.ravel(model.intercept_)[0] + self.mean @ self.coef)
+
+    def shap_values(self, X: pd.DataFrame) -> np.ndarray:
+        return (_transform(preprocessor=self.preprocessor, X=X) - self.mean) * self.coef
+
+
+def build_shap_explainer(
+    regressor: tp.Any,
+    background: pd.DataFrame,
+    backend: str = "auto",
+    predict: tp.Optional[tp.Callable[[pd.DataFrame], np.ndarray]] = None,
+    permutation_params: tp.Optional[tp.Dict[str, tp.Any]] = None,
+) -> tp.Callable[[pd.DataFrame], shap.Explanation]:
+    """
+    Build the SHAP explainer used by the explainer pipeline.
+
+    Parameters:
+    - regressor (RegressorMixin): The fitted regression model to explain.
+    - background (pd.DataFrame): Background data for the explainer, used as is, so it should
+      already be summarized to a small set of rows.
+    - backend (str): ``stacking`` for the decomposed explainer, ``permutation`` for the
+      model agnostic explainer over ``regressor.predict`` or ``auto`` to use the decomposed
+      explainer when possible and fall back to the model agnostic one otherwise.
+    - predict (callable): Faster equivalent of ``regressor.predict`` evaluated by the model
+      agnostic explainer, e.g. the one of a ``CompiledStack``.
+    - permutation_params (dict): Options of the model agnostic explainer. With ``adaptive``
+      it is an ``AdaptivePermutationExplainer`` built with the other options, otherwise the
+      default SHAP explainer of ``predict``.
+
+    Returns:
+    - callable: An explainer that maps a DataFrame to a ``shap.Explanation``.
+    """
+    if backend not in ("auto", "stacking", "permutation"):
+        raise ValueError(f"Unknown SHAP backend `{backend}`.")
+
+    background = background.astype(float)
+    if backend != "permutation":
+        try:
+            explainer = StackedShapExplainer(regressor=regressor, background=background)
+            logger.info("Using the decomposed stacking SHAP explainer.")
+            return explainer
+        except StackingDecompositionError as error:
+            if backend == "stacking":
+                raise
+            logger.info("Falling back to the permutation SHAP explainer: %s", error)
+
+    permutation_params = dict(permutation_params or {})
+    if permutation_params.pop("adaptive", False):
+        return AdaptivePermutationExplainer(
+            predict=predict or regressor.predict, background=background, **permutation_params
+        )
+    masker = shap.maskers.Independent(background, max_samples=len(background))
+    return shap.Explainer(predict or regressor.predict, masker)
+
+
+def _linear_combination(regressor: tp.Any) -> tp.Tuple[np.ndarray, float]:
+    """Return the coefficients and intercept of the final estimator of a stack."""
+    final_estimator = getattr(regressor, "final_estimator_", None)
+    if final_estimator is None or not hasattr(regressor, "estimators_"):
+        raise StackingDecompositionError("the regressor is not a fitted stacking model")
+    if getattr(regressor, "passthrough", False):
+        raise StackingDecompositionError("stacks with passthrough=True are not supported")
+    if any(method != "predict" for method in regressor.stack_method_):
+        raise StackingDecompositionError("only stack_method='predict' is supported")
+    if not _is_linear_model(final_estimator):
+        raise StackingDecompositionError("the final estimator is not a linear model")
+
+    coefficients = np.ravel(final_estimator.coef_).astype(float)
+    if coefficients.shape[0] != len(regressor.estimators_):
+        raise StackingDecompositionError("the final estimator has an unexpected number of inputs")
+    return coefficients, float(np.ravel(final_estimator.intercept_)[0])
+
+
+def _build_branch(estimator: tp.Any, background: pd.DataFrame):
+    """Split a base estimator into its preprocessing and its model and wrap them."""
+    steps = _flatten_steps(estimator)
+    preprocessing, (_, model) = steps[:-1], steps[-1]
+    for name, step in preprocessing:
+        if not _is_feature_wise(step):
+            raise StackingDecompositionError(f"step `{name}` is not a feature-wise transformer")
+    preprocessor = Pipeline(preprocessing) if preprocessing else None
+
+    if _is_linear_model(model):
+        return _LinearBranch(preprocessor=preprocessor, model=model, background=background)
+    try:
+        return _TreeBranch(preprocessor=preprocessor, model=model, background=background)
+    except Exception as error:  # shap raises several types for unsupported models
+        raise StackingDecompositionError(
+            f"`{type(model).__name__}` is not supported by TreeSHAP: {error}"
+        ) from error
+
+
+def _flatten_steps(estimator: tp.Any) -> tp.List[tp.Tuple[str, tp.Any]]:
+    """Flatten nested sklearn pipelines into a single list of steps."""
+    if not isinstance(estimator, Pipeline):
+        return [("model", estimator)]
+    steps = []
+    for name, step in estimator.steps:
+        if step is None or step == "passthrough":
+            continue
+        if isinstance(step, Pipeline):
+            steps.extend(_flatten_steps(step))
+        else:
+            steps.append((name, step))
+    return steps
+
+
+def _is_feature_wise(step: tp.Any) -> bool:
+    if not isinstance(step, _FEATURE_WISE_TRANSFORMERS):
+        return False
+    if isinstance(step, SimpleImputer):
+        # an imputer that adds indicators or drops empty columns changes the feature layout
+        return not step.add_indicator and not np.isnan(step.statistics_.astype(float)).any()
+    return True
+
+
+def _is_linear_model(model: tp.Any) -> bool:
+    return type(model).__module__.startswith("sklearn.linear_model") and hasattr(model, "coef_")
+
+
+def _transform(preprocessor: tp.Optional[Pipeline], X: pd.DataFrame) -> np.ndarray:
+    if preprocessor is None:
+        return X.to_numpy(dtype=float)
+    return np.asarray(preprocessor.transform(X), dtype=float)
@@ -12,5 +12,9 @@ def register_pipelines() -> Dict[str, Pipeline]:
         A mapping from pipeline names to ``Pipeline`` objects.
     """
     pipelines = find_pipelines()
-    pipelines["__default__"] = sum(pipelines.values())
+    # the incremental data processing replaces data_processing in daily runs, it isn't part of
+    # the default run
+    pipelines["__default__"] = sum(
+        pipeline for name, pipeline in pipelines.items() if name != "data_processing_incremental"
+    )
     return pipelines
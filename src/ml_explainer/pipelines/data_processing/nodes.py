@@ -1,78 +1,158 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
 
 
-def _is_true(x: pd.Series) -> pd.Series:
+def _is_true(x: pd.Series, engine: str = "pandas") -> pd.Series:
     """
     The function `_is_true` checks if each element in a pandas Series is equal to the string "t".
 
     Args:
       x (pd.Series): pd.Series - a pandas Series object containing values
+      engine (str): "arrow" to compare with a pyarrow compute kernel, "pandas" otherwise.
 
     Returns:
       The function `_is_true` returns a pandas Series object where each element is a boolean value
     indicating whether the corresponding element in the input Series `x` is equal to the string "t".
     """
+    strings = _to_arrow_strings(x) if engine == "arrow" else None
+    if strings is not None:
+        return _from_arrow(pc.fill_null(pc.equal(strings, "t"), False), x)
     return x == "t"
 
 
-def _parse_percentage(x: pd.Series) -> pd.Series:
+def _parse_percentage(x: pd.Series, engine: str = "pandas") -> pd.Series:
     """
     The function `_parse_percentage` removes the percentage sign from a pandas Series and converts the
     values to floats.
 
     Args:
       x (pd.Series): pd.Series - a pandas Series object containing percentage values as strings.
+      engine (str): "arrow" to parse with pyarrow compute kernels, "pandas" otherwise.
 
     Returns:
       a pandas Series object.
     """
+    parsed = _parse_float_arrow(x, "%") if engine == "arrow" else None
+    if parsed is not None:
+        return _from_arrow(pc.divide(parsed, 100), x)
     x = x.str.replace("%", "")
     x = x.astype(float) / 100
     return x
 
 
-def _parse_money(x: pd.Series) -> pd.Series:
+def _parse_money(x: pd.Series, engine: str = "pandas") -> pd.Series:
     """
     The function `_parse_money` removes dollar signs and commas from a pandas Series of strings
     representing money values, and converts them to floats.
 
     Args:
       x (pd.Series): x is a pandas Series object containing strings representing monetary values.
+      engine (str): "arrow" to parse with pyarrow compute kernels, "pandas" otherwise.
 
     Returns:
       a pandas Series object.
     """
+    parsed = _parse_float_arrow(x, "$", ",") if engine == "arrow" else None
+    if parsed is not None:
+        return _from_arrow(parsed, x)
     x = x.str.replace("$", "").str.replace(",", "")
     x = x.astype(float)
     return x
 
 
-def preprocess_companies(companies: pd.DataFrame) -> pd.DataFrame:
+def _to_arrow_strings(x: pd.Series) -> Optional[pa.Array]:
+    """
+    Convert a column of strings to an Arrow array, without copy if it is already Arrow-backed.
+
+    Returns:
+      The array, None if the column doesn't only hold strings and missing values, the caller
+    then falling back to the pandas path.
+    """
+    try:
+        strings = pa.array(x, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if not (pa.types.is_string(strings.type) or pa.types.is_large_string(strings.type)):
+        return None
+    return strings
+
+
+def _parse_float_arrow(x: pd.Series, *symbols: str) -> Optional[pa.Array]:
+    """
+    Remove the ``symbols`` from every string and parse them as floats with pyarrow compute
+    kernels, without creating Python objects. Literal replacements are several times faster
+    than one regex.
+
+    Returns:
+      The floats, None if the column isn't made of strings or one of them isn't a number,
+    the caller then falling back to the pandas path, which raises the usual error.
+    """
+    strings = _to_arrow_strings(x)
+    if strings is None:
+        return None
+    for symbol in symbols:
+        strings = pc.replace_substring(strings, symbol, "")
+    try:
+        return pc.cast(strings, pa.float64())
+    except pa.ArrowInvalid:
+        return None
+
+
+def _from_arrow(values: pa.Array, x: pd.Series) -> pd.Series:
+    """Convert a result of the Arrow path to a NumPy-backed Series like ``x``, the missing
+    floats becoming NaN as in the pandas path."""
+    return pd.Series(values.to_numpy(zero_copy_only=False), index=x.index, name=x.name)
+
+
+def _parsing_engine(parameters: Optional[Dict]) -> str:
+    return ((parameters or {}).get("parsing") or {}).get("engine", "pandas")
+
+
+def preprocess_companies(
+    companies: pd.DataFrame, parameters: Optional[Dict] = None
+) -> pd.DataFrame:
     """Preprocesses the data for companies.
 
     Args:
         companies: Raw data.
+        parameters: Parameters defined in parameters/data_processing.yml, ``parsing.engine``
+            selects the "arrow" or "pandas" parsing of the strings, with the same results.
     Returns:
         Preprocessed data, with `company_rating` converted to a float and
-        `iata_approved` converted to boolean.
+        `iata_approved` converted to boolean, when they were loaded.
     """
-    companies["iata_approved"] = _is_true(companies["iata_approved"])
-    companies["company_rating"] = _parse_percentage(companies["company_rating"])
+    engine = _parsing_engine(parameters)
+    if "iata_approved" in companies:
+        companies["iata_approved"] = _is_true(companies["iata_approved"], engine=engine)
+    if "company_rating" in companies:
+        companies["company_rating"] = _parse_percentage(companies["company_rating"], engine=engine)
     return companies
 
 
-def preprocess_shuttles(shuttles: pd.DataFrame) -> pd.DataFrame:
+def preprocess_shuttles(shuttles: pd.DataFrame, parameters: Optional[Dict] = None) -> pd.DataFrame:
     """Preprocesses the data for shuttles.
 
     Args:
         shuttles: Raw data.
+        parameters: Parameters defined in parameters/data_processing.yml, ``parsing.engine``
+            selects the "arrow" or "pandas" parsing of the strings, with the same results.
     Returns:
         Preprocessed data, with `price` converted to a float and `d_check_complete`,
-        `moon_clearance_complete` converted to boolean.
+        `moon_clearance_complete` converted to boolean, when they were loaded.
     """
-    shuttles["d_check_complete"] = _is_true(shuttles["d_check_complete"])
-    shuttles["moon_clearance_complete"] = _is_true(shuttles["moon_clearance_complete"])
-    shuttles["price"] = _parse_money(shuttles["price"])
+    engine = _parsing_engine(parameters)
+    for column in ["d_check_complete", "moon_clearance_complete"]:
+        if column in shuttles:
+            shuttles[column] = _is_true(shuttles[column], engine=engine)
+    if "price" in shuttles:
+        shuttles["price"] = _parse_money(shuttles["price"], engine=engine)
     return shuttles
 
 
@@ -95,3 +175,81 @@ def create_model_input_table(
     model_input_table = rated_shuttles.merge(companies, left_on="company_id", right_on="id")
     model_input_table = model_input_table.dropna()
     return model_input_table
+
+
+def optimize_dtypes(
+    data: pd.DataFrame, parameters: Optional[Dict] = None, table: str = "model_input_table"
+) -> pd.DataFrame:
+    """Casts the columns of a table to compact dtypes, logging the memory saved.
+
+    Args:
+        data: Table to optimize.
+        parameters: Parameters defined in parameters/data_processing.yml, ``dtypes.schema``
+            maps the tables to the dtypes of their columns, cast with a check that the
+            numbers fit, the other columns are optimized
+            without loss: integral numbers downcast to the smallest integer type, floats to
+            float32 when exact, flags to bool (nullable boolean with missing values) and
+            strings to category when their distinct values are at most
+            ``dtypes.max_category_ratio`` of the rows.
+        table: Name of the table in ``dtypes.schema`` and in the logs.
+    Returns:
+        The table with its optimized dtypes, unchanged if ``dtypes.enabled`` is false.
+    """
+    dtypes = (parameters or {}).get("dtypes") or {}
+    if not dtypes.get("enabled", False):
+        return data
+    schema = (dtypes.get("schema") or {}).get(table) or {}
+    max_category_ratio = dtypes.get("max_category_ratio", 0.5)
+
+    before = data.memory_usage(deep=True).sum()
+    optimized = data.copy()
+    for column in optimized.columns:
+        if column in schema:
+            optimized[column] = _checked_astype(optimized[column], schema[column])
+        else:
+            optimized[column] = _optimize_column(optimized[column], max_category_ratio)
+    after = optimized.memory_usage(deep=True).sum()
+    logger.info(
+        "Optimized the dtypes of %s: %.1f MB -> %.1f MB (%.0f%% saved).",
+        table,
+        before / 2**20,
+        after / 2**20,
+        100 * (1 - after / before) if before else 0,
+    )
+    return optimized
+
+
+def _checked_astype(x: pd.Series, dtype: str) -> pd.Series:
+    """Casts ``x`` to ``dtype``, raising a ValueError instead of wrapping the numbers an
+    integer type can't hold or truncating the decimals."""
+    if pd.api.types.is_integer_dtype(dtype) and pd.api.types.is_numeric_dtype(x):
+        values = x.dropna()
+        target = pd.api.types.pandas_dtype(dtype)
+        limits = np.iinfo(getattr(target, "numpy_dtype", target))
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise ValueError(
+                f"{x.name} holds values from {values.min()} to {values.max()}, out of the "
+                f"range of {dtype}."
+            )
+        if not (values == np.round(values)).all():
+            raise ValueError(f"{x.name} holds decimals, it can't be cast to {dtype}.")
+    return x.astype(dtype)
+
+
+def _optimize_column(x: pd.Series, max_category_ratio: float) -> pd.Series:
+    """Returns ``x`` with the most compact dtype holding its values without loss."""
+    values = x.dropna()
+    if values.empty or pd.api.types.is_bool_dtype(x):
+        return x
+    if pd.api.types.is_numeric_dtype(x):
+        if not x.hasnans and (values == np.round(values)).all():
+            downcast = "integer" if values.min() < 0 else "unsigned"
+            return pd.to_numeric(x.astype("int64"), downcast=downcast)
+        if pd.api.types.is_float_dtype(x) and (values.astype("float32") == values).all():
+            return x.astype("float32")
+    elif x.dtype == object:
+        if values.map(type).eq(bool).all():
+            return x.astype("boolean" if x.hasnans else "bool")
+        if values.map(type).eq(str).all() and x.nunique() <= max_category_ratio * len(x):
+            return x.astype("category")
+    return x
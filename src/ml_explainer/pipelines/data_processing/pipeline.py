@@ -1,6 +1,11 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import create_model_input_table, preprocess_companies, preprocess_shuttles
+from .nodes import (
+    create_model_input_table,
+    optimize_dtypes,
+    preprocess_companies,
+    preprocess_shuttles,
+)
 
 
 def create_pipeline(**kwargs) -> Pipeline:
@@ -8,21 +13,27 @@ def create_pipeline(**kwargs) -> Pipeline:
         [
             node(
                 func=preprocess_companies,
-                inputs="companies",
+                inputs=["companies", "params:data_processing"],
                 outputs="preprocessed_companies",
                 name="preprocess_companies_node",
             ),
             node(
                 func=preprocess_shuttles,
-                inputs="shuttles",
+                inputs=["shuttles", "params:data_processing"],
                 outputs="preprocessed_shuttles",
                 name="preprocess_shuttles_node",
             ),
             node(
                 func=create_model_input_table,
                 inputs=["preprocessed_shuttles", "preprocessed_companies", "reviews"],
-                outputs="model_input_table",
+                outputs="merged_model_input_table",
                 name="create_model_input_table_node",
             ),
+            node(
+                func=optimize_dtypes,
+                inputs=["merged_model_input_table", "params:data_processing"],
+                outputs="model_input_table",
+                name="optimize_model_input_table_dtypes_node",
+            ),
         ]
     )
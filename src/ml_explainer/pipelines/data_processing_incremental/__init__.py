@@ -0,0 +1,4 @@
+"""Incremental Data Processing pipeline, appending the rows of the new raw data to the
+partitioned model input table"""
+
+from .pipeline import create_pipeline  # NOQA
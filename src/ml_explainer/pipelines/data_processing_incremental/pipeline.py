@@ -0,0 +1,50 @@
+from kedro.pipeline import Pipeline, node, pipeline
+
+from ml_explainer.pipelines.data_processing.nodes import (
+    create_model_input_table,
+    optimize_dtypes,
+    preprocess_companies,
+    preprocess_shuttles,
+)
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    """Preprocesses the rows appended to the raw companies and reviews since the last run and
+    appends their model input rows to the partitioned ``model_input_table``.
+
+    The new companies are appended to the preprocessed companies history, which the new reviews
+    are joined to with the shuttles. The watermark of every raw input moves once its new rows
+    are saved, the companies one as soon as they are in the history, so a failure of the next
+    nodes doesn't append them twice. ``data_processing.incremental.full_refresh`` rebuilds
+    everything from the first rows. Reviews are expected after their shuttle and company.
+    """
+    return pipeline(
+        [
+            node(
+                func=preprocess_companies,
+                inputs=["companies_delta", "params:data_processing"],
+                outputs="preprocessed_companies_history",
+                name="preprocess_companies_delta_node",
+                confirms=["companies_delta"],
+            ),
+            node(
+                func=preprocess_shuttles,
+                inputs=["shuttles", "params:data_processing"],
+                outputs="preprocessed_shuttles",
+                name="preprocess_shuttles_node",
+            ),
+            node(
+                func=create_model_input_table,
+                inputs=["preprocessed_shuttles", "preprocessed_companies_history", "reviews_delta"],
+                outputs="merged_model_input_table_delta",
+                name="create_model_input_table_delta_node",
+            ),
+            node(
+                func=optimize_dtypes,
+                inputs=["merged_model_input_table_delta", "params:data_processing"],
+                outputs="model_input_table_increment",
+                name="optimize_model_input_table_delta_dtypes_node",
+                confirms=["reviews_delta"],
+            ),
+        ]
+    )
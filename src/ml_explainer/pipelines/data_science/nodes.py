@@ -1,16 +1,14 @@
 import logging
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 import pandas as pd
-from sklearn.base import RegressorMixin
-from sklearn.ensemble import StackingRegressor
-from sklearn.linear_model import LinearRegression, Ridge
-from sklearn.metrics import r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
 
 from ml_explainer.model.object_inyection import load_estimator, load_object
 
+# scikit-learn is imported by the nodes using it, registering the pipelines stays fast
+if TYPE_CHECKING:
+    from sklearn.base import RegressorMixin
+
 
 def split_data(data: pd.DataFrame, parameters: Dict) -> Tuple:
     """Splits data into features and targets training and test sets.
@@ -21,6 +19,8 @@ def split_data(data: pd.DataFrame, parameters: Dict) -> Tuple:
     Returns:
         Split data.
     """
+    from sklearn.model_selection import train_test_split
+
     X = data[parameters["features"]]
     y = data[[parameters["target"]]]
     X_train, X_test, y_train, y_test = train_test_split(
@@ -29,7 +29,7 @@ def split_data(data: pd.DataFrame, parameters: Dict) -> Tuple:
     return X_train, X_test, y_train, y_test
 
 
-def train_model(X_train: pd.DataFrame, y_train: pd.Series, parameters: Dict) -> RegressorMixin:
+def train_model(X_train: pd.DataFrame, y_train: pd.Series, parameters: Dict) -> "RegressorMixin":
     """Trains the linear regression model.
 
     Args:
@@ -56,14 +56,37 @@ def train_model(X_train: pd.DataFrame, y_train: pd.Series, parameters: Dict) ->
     return regressor
 
 
-def evaluate_model(regressor: LinearRegression, X_test: pd.DataFrame, y_test: pd.Series):
-    """Calculates and logs the coefficient of determination.
+def compile_model(regressor: "RegressorMixin", X_test: pd.DataFrame) -> Any:
+    """Compiles the trained stack into a flat predictor for fast scoring.
 
     Args:
         regressor: Trained model.
+        X_test: Testing data on which the compiled predictions are checked against the
+            ones of the model.
+
+    Returns:
+        The compiled predictor, or the model itself if it can't be compiled.
+    """
+    from ml_explainer.model.compiled_stack import StackCompilationError, compile_stack
+
+    logger = logging.getLogger(__name__)
+    try:
+        return compile_stack(regressor, X_check=X_test)
+    except StackCompilationError as error:
+        logger.warning("Using the sklearn model to predict, it can't be compiled: %s", error)
+        return regressor
+
+
+def evaluate_model(regressor: "RegressorMixin", X_test: pd.DataFrame, y_test: pd.Series):
+    """Calculates and logs the coefficient of determination.
+
+    Args:
+        regressor: Trained model, or its compiled predictor.
         X_test: Testing data of independent features.
         y_test: Testing data for price.
     """
+    from sklearn.metrics import r2_score
+
     y_pred = regressor.predict(X_test)
     score = r2_score(y_test, y_pred)
     logger = logging.getLogger(__name__)
@@ -73,9 +96,9 @@ def evaluate_model(regressor: LinearRegression, X_test: pd.DataFrame, y_test: pd
 def build_model(
     scaler: Any,
     imputer: Any,
-    model1: RegressorMixin,
-    model2: RegressorMixin,
-    final_estimator: RegressorMixin = Ridge(),
+    model1: "RegressorMixin",
+    model2: "RegressorMixin",
+    final_estimator: Optional["RegressorMixin"] = None,
 ):
     """
     Build a stacked ensemble regression model using two base regression models.
@@ -86,6 +109,8 @@ def build_model(
     Parameters:
     - model1 (RegressorMixin): The first base regression model to include in the ensemble.
     - model2 (RegressorMixin): The second base regression model to include in the ensemble.
+    - final_estimator (RegressorMixin): The model combining their predictions, ``Ridge()``
+      if None.
 
     Returns:
     - StackingRegressor: A stacked ensemble regression model combining the two base models.
@@ -107,6 +132,12 @@ def build_model(
     predictions = stacked_model.predict(X_test)
     ```
     """
+    from sklearn.ensemble import StackingRegressor
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import Pipeline
+
+    if final_estimator is None:
+        final_estimator = Ridge()
     numeric_transformer = Pipeline(
         steps=[
             ("imputer", imputer),
@@ -1,6 +1,6 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import evaluate_model, split_data, train_model
+from .nodes import compile_model, evaluate_model, split_data, train_model
 
 
 def create_pipeline(**kwargs) -> Pipeline:
@@ -22,9 +22,15 @@ def create_pipeline(**kwargs) -> Pipeline:
                 outputs="regressor",
                 name="train_model_node",
             ),
+            node(
+                func=compile_model,
+                inputs=["regressor", "X_test"],
+                outputs="compiled_regressor",
+                name="compile_model_node",
+            ),
             node(
                 func=evaluate_model,
-                inputs=["regressor", "X_test", "y_test"],
+                inputs=["compiled_regressor", "X_test", "y_test"],
                 outputs=None,
                 name="evaluate_model_node",
             ),
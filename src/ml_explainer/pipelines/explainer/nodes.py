@@ -1,18 +1,33 @@
+import itertools
 import typing as tp
+from functools import partial
 
 import pandas as pd
-import shap
-from sklearn.base import RegressorMixin
 
+from ml_explainer.datasets import LazyParquetFrame
 from ml_explainer.model.shap_values import (
+    SHAP_ERROR_PREFIX,
     calculate_feature_importance_df,
     create_shap_dataframe,
+    create_shap_error_dataframe,
     generate_shap_beeswarm_plot,
 )
 
+# shap and scikit-learn are imported by the nodes using them, registering the pipelines
+# stays fast
+if tp.TYPE_CHECKING:
+    import shap
+    from sklearn.base import RegressorMixin
+
+    from ml_explainer.model.prediction import MemoizedPredictor
+
 
 def generate_shap_information(
-    regressor: RegressorMixin, X_train: pd.DataFrame, X_test: pd.DataFrame
+    regressor: "RegressorMixin",
+    compiled_regressor: tp.Any,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    shap_params: tp.Dict[str, tp.Any],
 ) -> tp.Dict[str, tp.Any]:
     """
     Generate SHAP values and visualization for a regression model.
@@ -22,12 +37,27 @@ def generate_shap_information(
 
     Parameters:
     - regressor (RegressorMixin): The regression model to explain using SHAP values.
+    - compiled_regressor: Faster equivalent of the regressor, e.g. a ``CompiledStack``, used
+      for the predictions and the model agnostic explainer.
     - X_train (pd.DataFrame): The training data used to fit the regression model.
     - X_test (pd.DataFrame): The test data for which SHAP values are calculated.
+    - shap_params (dict): Parameters of the SHAP explainer. ``backend`` selects the decomposed
+      ``stacking`` explainer, the model agnostic ``permutation`` explainer or ``auto``,
+      ``background`` configures the summarization of X_train into the background set and
+      ``explain_sample`` the size of the sample of X_train that is explained, ``parallel``
+      the chunk size, number of worker processes and seed of the SHAP computation and
+      ``streaming`` whether the SHAP values of X_test are returned as a lazy iterator of chunks
+      and ``cache`` the persistent SHAP value cache, so only new or changed rows are explained.
+      ``prediction_memo_size`` bounds the number of memoized predictions and ``permutation``
+      configures the model agnostic explainer, e.g. its adaptive evaluation budget.
 
     Returns:
     - dict: A dictionary containing the following elements:
         - 'shap_values' (pd.DataFrame): A DataFrame containing base values and SHAP values for each sample.
+          The SHAP values of X_test are followed by their standard error, NaN unless estimated
+          by the explainer, see ``create_shap_error_dataframe``. In streaming mode they are an
+          iterator of DataFrame chunks instead, calculated while the dataset writes them, and
+          the test plot uses the first chunk only.
         - 'fig_shap' (matplotlib.figure.Figure): The generated SHAP beeswarm plot.
 
     Example usage:
@@ -40,7 +70,17 @@ def generate_shap_information(
     regressor.fit(X_train, y_train)
 
     # Generate SHAP values and visualization
-    shap_info = generate_shap_information(regressor, X_train, X_test)
+    shap_params = {
+        "backend": "auto",
+        "background": {"method": "kmeans", "size": 100},
+        "explain_sample": {"size": 2000},
+        "parallel": {"chunk_size": 1000, "n_jobs": -1, "seed": 42},
+        "streaming": False,
+        "cache": {"enabled": False},
+        "prediction_memo_size": 1000000,
+        "permutation": {"adaptive": True, "tolerance": 1.0, "max_evals": 1000},
+    }
+    shap_info = generate_shap_information(regressor, regressor, X_train, X_test, shap_params)
 
     # Access SHAP values DataFrame and display the plot
     shap_values_df = shap_info['shap_values']
@@ -48,24 +88,79 @@ def generate_shap_information(
     plt.show()  # Display the SHAP beeswarm plot
     ```
     """
-    # resampling to speed up computing
-    X_train = X_train.sample(7000, replace=True)
+    from ml_explainer.model.prediction import MemoizedPredictor
+    from ml_explainer.model.shap_cache import (
+        ShapValueCache,
+        cached_explain_in_chunks,
+        cached_iter_explained_chunks,
+    )
+    from ml_explainer.model.shap_parallel import (
+        explain_in_chunks,
+        iter_explained_chunks,
+    )
+    from ml_explainer.model.shap_sampling import (
+        sample_explain_set,
+        summarize_background,
+    )
+
+    # small background set and sample of X_train to explain to speed up computing
+    background = summarize_background(X_train, shap_params["background"])
+    X_train = sample_explain_set(X_train, **shap_params["explain_sample"])
 
-    # shap explainer
+    # shap values, explained by chunks of rows, skipping the rows already in the cache
     features = list(X_train.columns)
-    explainer = shap.Explainer(regressor.predict, X_train.astype(float))
+    explain_params = dict(
+        regressor=regressor,
+        background=background,
+        backend=shap_params["backend"],
+        predict=compiled_regressor.predict,
+        permutation_params=shap_params["permutation"],
+        **shap_params["parallel"],
+    )
+    # predictions are read from the explanations (base value + SHAP values) when possible
+    predictor = MemoizedPredictor(
+        regressor,
+        max_size=shap_params["prediction_memo_size"],
+        predict=compiled_regressor.predict,
+    )
+    explain_frames, iter_chunks = explain_in_chunks, iter_explained_chunks
+    cache_params = shap_params["cache"]
+    if cache_params["enabled"]:
+        cache = ShapValueCache(
+            filepath=cache_params["filepath"],
+            explain_params=explain_params,
+            max_size_mb=cache_params["max_size_mb"],
+        )
+        explain_frames = partial(cached_explain_in_chunks, cache)
+        iter_chunks = partial(cached_iter_explained_chunks, cache)
 
-    # shap values
-    shap_values_train = explainer(X_train.astype(float))
-    shap_values_test = explainer(X_test.astype(float))
+    if shap_params["streaming"]:
+        (shap_values_train,) = explain_frames(frames=[X_train], explain_params=explain_params)
+        # the first chunk is plotted, then streamed with the others instead of explained again
+        chunks = iter_chunks(X=X_test, explain_params=explain_params)
+        shap_values_test = next(chunks)
+        shap_values_df_test = _iter_shap_dataframes(
+            chunks=itertools.chain([shap_values_test], chunks),
+            predictor=predictor,
+            X=X_test,
+            features=features,
+            chunk_size=shap_params["parallel"]["chunk_size"],
+        )
+    else:
+        shap_values_train, shap_values_test = explain_frames(
+            frames=[X_train, X_test], explain_params=explain_params
+        )
+        predictor.prime_from_explanation(X_test, shap_values_test)
+        shap_values_df_test = _shap_test_dataframe(
+            shap_values=shap_values_test, features=features, predictions=predictor.predict(X_test)
+        )
 
     # shap dataframes
     shap_values_df_train = create_shap_dataframe(shap_values=shap_values_train, features=features)
-    shap_values_df_test = create_shap_dataframe(shap_values=shap_values_test, features=features)
 
     # add prediction to the shap values pred
-    shap_values_df_train["prediction"] = regressor.predict(X_train)
-    shap_values_df_test["prediction"] = regressor.predict(X_test)
+    predictor.prime_from_explanation(X_train, shap_values_train)
+    shap_values_df_train["prediction"] = predictor.predict(X_train)
 
     # feature importance df
     feature_importance_df = calculate_feature_importance_df(
@@ -83,3 +178,84 @@ def generate_shap_information(
         fig_shap_train=fig_train,
         feature_importance=feature_importance_df,
     )
+
+
+def select_representative_observations(
+    shap_df: tp.Union[pd.DataFrame, LazyParquetFrame], report_params: tp.Dict[str, tp.Any]
+) -> tp.Dict[str, pd.DataFrame]:
+    """
+    Select the observations of X_test explained in the report.
+
+    With ``representatives`` enabled the SHAP values are clustered in
+    ``number_of_observations_to_explain`` clusters and the observation closest to the centroid
+    of every cluster is explained, so a bounded number of LLM calls covers the whole test set.
+    Otherwise the first ``number_of_observations_to_explain`` observations are explained.
+
+    Parameters:
+    - shap_df (pd.DataFrame or LazyParquetFrame): SHAP values of X_test.
+    - report_params (dict): Parameters of the report, ``representatives`` holds the
+      ``enabled``, ``batch_size``, ``sample_size`` and ``seed`` of the clustering.
+
+    Returns:
+    - dict: A dictionary containing the following elements:
+        - 'representative_shap_df' (pd.DataFrame): SHAP values of the observations to explain,
+          without their standard error.
+        - 'shap_clusters' (pd.DataFrame): Explained observation, size and share of the
+          predictions of every cluster, empty without clustering.
+        - 'shap_cluster_assignments' (pd.DataFrame): Cluster of every observation of X_test
+          and its distance to the centroid, empty without clustering.
+    """
+    n_observations = report_params["number_of_observations_to_explain"]
+    params = report_params.get("representatives") or {}
+    if params.get("enabled", False):
+        from ml_explainer.model.shap_clustering import cluster_shap_values
+
+        representatives, clusters_df, assignments_df = cluster_shap_values(
+            shap_df,
+            n_clusters=n_observations,
+            batch_size=params.get("batch_size", 10000),
+            sample_size=params.get("sample_size", 100000),
+            seed=params.get("seed", 42),
+        )
+    else:
+        if isinstance(shap_df, LazyParquetFrame):
+            shap_df = shap_df.head(n_observations)
+        representatives = shap_df.iloc[:n_observations]
+        clusters_df = pd.DataFrame(columns=["cluster", "observation", "size", "share"])
+        assignments_df = pd.DataFrame(columns=["observation", "cluster", "distance"])
+
+    # the report explains the SHAP values, not their standard error
+    errors = [column for column in representatives.columns if column.startswith(SHAP_ERROR_PREFIX)]
+    return dict(
+        representative_shap_df=representatives.drop(columns=errors),
+        shap_clusters=clusters_df,
+        shap_cluster_assignments=assignments_df,
+    )
+
+
+def _iter_shap_dataframes(
+    chunks: tp.Iterator["shap.Explanation"],
+    predictor: "MemoizedPredictor",
+    X: pd.DataFrame,
+    features: tp.List[str],
+    chunk_size: int,
+) -> tp.Iterator[pd.DataFrame]:
+    """
+    Lazily yield the SHAP DataFrame of every chunk of ``X`` from the explanations of its
+    chunks of ``chunk_size`` rows, predictions and standard errors included.
+    """
+    for start, shap_values in zip(range(0, len(X), chunk_size), chunks):
+        X_chunk = X.iloc[start : start + chunk_size]
+        predictor.prime_from_explanation(X_chunk, shap_values)
+        yield _shap_test_dataframe(
+            shap_values=shap_values, features=features, predictions=predictor.predict(X_chunk)
+        )
+
+
+def _shap_test_dataframe(
+    shap_values: "shap.Explanation", features: tp.List[str], predictions: tp.Any
+) -> pd.DataFrame:
+    shap_values_df = create_shap_dataframe(shap_values=shap_values, features=features)
+    shap_values_df["prediction"] = predictions
+    errors_df = create_shap_error_dataframe(shap_values=shap_values, features=features)
+    return pd.concat([shap_values_df, errors_df], axis=1)
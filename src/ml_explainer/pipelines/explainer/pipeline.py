@@ -1,6 +1,6 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import generate_shap_information
+from .nodes import generate_shap_information, select_representative_observations
 from ml_explainer.model.llm import generate_explainability_report
 
 
@@ -9,7 +9,13 @@ def create_pipeline(**kwargs) -> Pipeline:
         [
             node(
                 func=generate_shap_information,
-                inputs=["regressor", "X_train", "X_test"],
+                inputs=[
+                    "regressor",
+                    "compiled_regressor",
+                    "X_train",
+                    "X_test",
+                    "params:shap_explainer",
+                ],
                 outputs=dict(
                     shap_values_df_train="shap_values_df_train",
                     shap_values_df_test="shap_values_df_test",
@@ -19,16 +25,29 @@ def create_pipeline(**kwargs) -> Pipeline:
                 ),
                 name="shap_information",
             ),
+            node(
+                func=select_representative_observations,
+                inputs=["shap_values_df_test", "params:report_information"],
+                outputs=dict(
+                    representative_shap_df="representative_shap_df",
+                    shap_clusters="shap_clusters",
+                    shap_cluster_assignments="shap_cluster_assignments",
+                ),
+                name="select_representative_observations",
+            ),
             node(
                 func=generate_explainability_report,
                 inputs=dict(
-                    shap_df="shap_values_df_test",
+                    shap_df="representative_shap_df",
+                    clusters_df="shap_clusters",
                     feature_importance_df="feature_importance",
                     parameters="params:chain_config",
                     report_params="params:report_information",
                 ),
                 outputs=dict(
                     report="explainability_report",
+                    llm_call_metrics="llm_call_metrics",
+                    llm_run_summary="llm_run_summary",
                 ),
                 name="explainability_report",
             ),
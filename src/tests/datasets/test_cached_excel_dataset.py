@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ml_explainer.datasets import CachedExcelDataset
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "shuttles.xlsx"
+    pd.DataFrame({"id": [1, 2], "price": ["$1,325.0", "$4,060.0"]}).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def excel_reads(mocker):
+    return mocker.spy(pd, "read_excel")
+
+
+def test_later_loads_use_the_sidecar(tmp_path, workbook, excel_reads):
+    dataset = CachedExcelDataset(filepath=str(workbook), sidecar_dir=str(tmp_path / "sidecar"))
+
+    first = dataset.load()
+    os.utime(workbook)  # touched but unchanged: hashed, not parsed
+    second = CachedExcelDataset(filepath=str(workbook), sidecar_dir=str(tmp_path / "sidecar"))
+
+    pd.testing.assert_frame_equal(second.load(), first)
+    assert excel_reads.call_count == 1
+    assert len(list((tmp_path / "sidecar").glob("*.arrow"))) == 1
+
+
+def test_changed_workbook_is_converted_again(tmp_path, workbook, excel_reads):
+    dataset = CachedExcelDataset(filepath=str(workbook))
+    dataset.load()
+    pd.DataFrame({"id": [3], "price": ["$1.0"]}).to_excel(workbook, index=False)
+
+    assert dataset.load().to_dict("list") == {"id": [3], "price": ["$1.0"]}
+    assert excel_reads.call_count == 2
+    assert len(list((tmp_path / "shuttles.xlsx.sidecar").glob("*.arrow"))) == 1
@@ -0,0 +1,25 @@
+import matplotlib.pyplot as plt
+import pytest
+from kedro.io import DataCatalog, DatasetError
+
+from ml_explainer.datasets import LazyDataset
+
+
+def test_wrapped_dataset_is_built_on_first_use(tmp_path):
+    filepath = tmp_path / "fig.png"
+    dataset = LazyDataset({"type": "matplotlib.MatplotlibWriter", "filepath": str(filepath)})
+    assert dataset._dataset is None
+
+    assert not dataset.exists()
+    dataset.save(plt.figure())
+    assert filepath.stat().st_size > 0
+    assert type(dataset.dataset).__name__ == "MatplotlibWriter"
+
+
+def test_wrong_configuration_fails_on_first_use():
+    catalog = DataCatalog.from_config(
+        {"fig": {"type": "ml_explainer.datasets.LazyDataset", "dataset": {"type": "Missing"}}}
+    )
+
+    with pytest.raises(DatasetError, match="Missing"):
+        catalog.save("fig", plt.figure())
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from kedro.io import DatasetError
+
+from ml_explainer.datasets import LazyParquetFrame, PartitionedParquetDataset
+
+
+def _chunks():
+    for start in range(0, 1000, 250):
+        yield pd.DataFrame({"a": np.arange(start, start + 250), "b": 1.5})
+
+
+def test_streamed_chunks_round_trip(tmp_path):
+    dataset = PartitionedParquetDataset(filepath=str(tmp_path / "shap"))
+    dataset.save(_chunks())
+
+    assert len(list((tmp_path / "shap").glob("part-*.parquet"))) == 4
+    pd.testing.assert_frame_equal(dataset.load(), pd.concat(_chunks(), ignore_index=True))
+
+
+def test_lazy_load_reads_batches_in_order(tmp_path):
+    PartitionedParquetDataset(filepath=str(tmp_path / "shap")).save(_chunks())
+    frame = PartitionedParquetDataset(
+        filepath=str(tmp_path / "shap"), load_args={"lazy": True}
+    ).load()
+
+    assert isinstance(frame, LazyParquetFrame)
+    assert len(frame) == 1000
+    assert frame.head(300)["a"].tolist() == list(range(300))
+    batches = list(frame.iter_batches(columns=["a"], batch_size=64))
+    assert pd.concat(batches)["a"].tolist() == list(range(1000))
+
+
+def test_save_replaces_previous_parts(tmp_path):
+    dataset = PartitionedParquetDataset(filepath=str(tmp_path / "shap"))
+    dataset.save(_chunks())
+    dataset.save(pd.DataFrame({"a": [1], "b": [2.0]}))
+
+    assert dataset.load().to_dict("list") == {"a": [1], "b": [2.0]}
+
+
+def test_append_mode_adds_parts(tmp_path):
+    dataset = PartitionedParquetDataset(
+        filepath=str(tmp_path / "table"), save_args={"mode": "append"}
+    )
+    dataset.save(pd.DataFrame({"a": [1], "b": [2.0]}))
+    dataset.save(pd.DataFrame({"a": [], "b": []}))
+    dataset.save(pd.DataFrame({"a": [3], "b": [4.0]}))
+
+    assert sorted(path.name for path in (tmp_path / "table").iterdir()) == [
+        "part-00000.parquet",
+        "part-00001.parquet",
+    ]
+    projected = PartitionedParquetDataset(
+        filepath=str(tmp_path / "table"), load_args={"columns": ["a"]}
+    ).load()
+    assert projected.to_dict("list") == {"a": [1, 3]}
+    dataset.reset()
+    assert not dataset.exists()
+
+
+@pytest.mark.parametrize("mode", ["overwrite", "append"])
+def test_failing_chunks_leave_the_previous_parts(tmp_path, mode):
+    def failing_chunks():
+        yield pd.DataFrame({"a": [5], "b": [6.0]})
+        raise RuntimeError("explainer failed")
+
+    dataset = PartitionedParquetDataset(filepath=str(tmp_path / "table"), save_args={"mode": mode})
+    dataset.save(pd.DataFrame({"a": [1], "b": [2.0]}))
+
+    with pytest.raises(DatasetError, match="explainer failed"):
+        dataset.save(failing_chunks())
+
+    assert [path.name for path in (tmp_path / "table").iterdir()] == ["part-00000.parquet"]
+    assert dataset.load().to_dict("list") == {"a": [1], "b": [2.0]}
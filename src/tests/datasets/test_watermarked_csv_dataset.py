@@ -0,0 +1,36 @@
+import pytest
+from kedro.io import DatasetError
+
+from ml_explainer.datasets import WatermarkedCSVDataset
+
+
+def test_loads_rows_appended_since_confirmed_watermark(tmp_path):
+    path = tmp_path / "reviews.csv"
+    path.write_text("shuttle_id,rating\n1,9.0\n2,8.0\n")
+    dataset = WatermarkedCSVDataset(filepath=str(path))
+
+    assert dataset.load()["shuttle_id"].tolist() == [1, 2]
+    assert len(dataset.load()) == 2  # not confirmed, loaded again
+    dataset.confirm()
+    with path.open("a") as csv:
+        csv.write("3,7.0\n4,6")  # the last row is still being written
+
+    new_rows = WatermarkedCSVDataset(filepath=str(path)).load()
+    assert new_rows.to_dict("index") == {2: {"shuttle_id": 3, "rating": 7.0}}
+
+    dataset.reset()
+    assert len(dataset.load()) == 3
+
+
+def test_rewritten_file_fails_until_reset(tmp_path):
+    path = tmp_path / "reviews.csv"
+    path.write_text("shuttle_id,rating\n1,9.0\n2,8.0\n")
+    dataset = WatermarkedCSVDataset(filepath=str(path))
+    dataset.load()
+    dataset.confirm()
+    path.write_text("shuttle_id,rating\n5,1.0\n")
+
+    with pytest.raises(DatasetError, match="rewritten"):
+        dataset.load()
+    dataset.reset()
+    assert dataset.load()["shuttle_id"].tolist() == [5]
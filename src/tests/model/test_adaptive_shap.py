@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from ml_explainer.model.adaptive_shap import AdaptivePermutationExplainer
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 4)), columns=["a", "b", "c", "d"])
+    y = X["a"] * X["b"] + np.sin(X["c"]) + rng.normal(scale=0.1, size=200)
+    return X, y
+
+
+def test_additive_model_converges_to_exact_values(data):
+    X, _ = data
+    coefficients = np.array([1.0, -2.0, 0.5, 3.0])
+
+    def predict(frame):
+        return frame.to_numpy() @ coefficients
+
+    background = X.iloc[:20]
+    np.random.seed(0)
+
+    explanation = AdaptivePermutationExplainer(predict, background, tolerance=1e-9)(X.iloc[:10])
+
+    expected = (X.iloc[:10] - background.mean()).to_numpy() * coefficients
+    np.testing.assert_allclose(explanation.values, expected, atol=1e-10)
+    np.testing.assert_allclose(explanation.error_std, 0, atol=1e-10)
+
+
+def test_budget_bounds_unconverged_rows_and_keeps_additivity(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    np.random.seed(0)
+
+    explanation = AdaptivePermutationExplainer(
+        model.predict, X.iloc[:20], tolerance=1e-9, max_evals=50
+    )(X.iloc[:10])
+
+    assert (explanation.error_std > 0).any()
+    np.testing.assert_allclose(
+        explanation.values.sum(axis=1) + explanation.base_values, model.predict(X.iloc[:10])
+    )
@@ -0,0 +1,76 @@
+import pytest
+
+from ml_explainer.model import cache as cache_module
+from ml_explainer.model.cache import SqliteCache
+
+
+class FakeTime:
+    """``time`` module of the cache, whose clock only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(cache_module, "time", fake_time)
+    return fake_time
+
+
+def _size(key, value):
+    return 2 * len(key) + len(value) + cache_module._ENTRY_OVERHEAD
+
+
+def test_size_counts_keys_values_and_row_overhead(tmp_path, clock):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite"))
+    cache.set_many({"short": b"x" * 100, "a much longer key": b"x" * 10})
+    assert cache.total_size == _size("short", b"x" * 100) + _size("a much longer key", b"x" * 10)
+
+    cache.set("short", b"x")
+    assert cache.total_size == _size("short", b"x") + _size("a much longer key", b"x" * 10)
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_cap(tmp_path, clock):
+    entry_size = _size("k0", b"x" * 100)
+    cache = SqliteCache(str(tmp_path / "cache.sqlite"), max_size_bytes=int(6.5 * entry_size))
+    for i in range(6):
+        clock.now += 1
+        cache.set(f"k{i}", b"x" * 100)
+    clock.now += 1
+    assert cache.get("k0") == b"x" * 100
+
+    clock.now += 1
+    cache.set("k6", b"x" * 100)
+
+    # back under 90% of the cap, the oldest accessed entries first
+    assert cache.contains_many([f"k{i}" for i in range(7)]) == {"k0", "k3", "k4", "k5", "k6"}
+    assert cache.total_size == 5 * entry_size
+
+
+def test_expired_entries_are_missing_and_evicted(tmp_path, clock):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=10)
+    cache.set("old", b"1")
+    clock.now = 8
+    cache.set("new", b"2")
+    clock.now = 12
+
+    assert cache.get_many(["old", "new"]) == {"new": b"2"}
+    assert cache.contains_many(["old", "new"]) == {"new"}
+    assert cache.evict() == 1
+    assert cache.total_size == _size("new", b"2")
+
+
+def test_entries_persist_across_connections(tmp_path):
+    filepath = str(tmp_path / "cache.sqlite")
+    cache = SqliteCache(filepath)
+    cache.set("key", b"value")
+    cache.close()
+
+    cache = SqliteCache(filepath)
+    assert cache.get("key") == b"value"
+    assert cache.get("other") is None
+    assert (cache.hits, cache.misses) == (1, 1)
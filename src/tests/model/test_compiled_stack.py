@@ -0,0 +1,60 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge, TheilSenRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from ml_explainer.model.compiled_stack import StackCompilationError, compile_stack
+from ml_explainer.pipelines.data_science.nodes import build_model
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    y = 3 * X["a"] + X["b"] * X["c"] + rng.normal(scale=0.1, size=300)
+    X.iloc[::5, 1] = np.nan
+    return X, y
+
+
+def _stack(model1, scaler=None):
+    return build_model(
+        scaler=StandardScaler() if scaler is None else scaler,
+        imputer=SimpleImputer(strategy="median"),
+        model1=model1,
+        model2=TheilSenRegressor(random_state=0),
+        final_estimator=Ridge(),
+    )
+
+
+def test_compiled_stack_matches_the_sklearn_stack(data):
+    X, y = data
+    regressor = _stack(XGBRegressor(n_estimators=20, max_depth=3, random_state=0)).fit(X, y)
+
+    compiled = pickle.loads(pickle.dumps(compile_stack(regressor, X_check=X)))
+
+    assert len(compiled.preprocessors) == 1
+    np.testing.assert_allclose(compiled.predict(X[["d", "c", "b", "a"]]), regressor.predict(X))
+
+
+@pytest.mark.parametrize("with_mean, with_std", [(False, True), (True, False), (False, False)])
+def test_scaler_options_are_compiled(data, with_mean, with_std):
+    X, y = data
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std)
+    model1 = XGBRegressor(n_estimators=20, max_depth=3, random_state=0)
+    regressor = _stack(model1, scaler=scaler).fit(X, y)
+
+    np.testing.assert_allclose(compile_stack(regressor).predict(X), regressor.predict(X))
+
+
+def test_unsupported_models_are_not_compiled(data):
+    X, y = data
+    regressor = _stack(RandomForestRegressor(n_estimators=5, random_state=0)).fit(X, y)
+
+    with pytest.raises(StackCompilationError, match="RandomForestRegressor"):
+        compile_stack(regressor)
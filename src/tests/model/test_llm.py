@@ -0,0 +1,202 @@
+import os
+import random
+import re
+import threading
+import time
+
+import pandas as pd
+import pytest
+from langchain.llms import OpenAI
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import Generation, LLMResult
+
+from ml_explainer.model.llm_cache import LLMCacheMissError
+
+FEATURES = ["engines", "crew"]
+
+# number of calls of SlowEchoLLM in flight and its peak, recorded under the lock
+IN_FLIGHT = {"current": 0, "peak": 0}
+IN_FLIGHT_LOCK = threading.Lock()
+
+
+class SlowEchoLLM(LLM):
+    """Local stub answering with the question and SHAP message of the prompt after a delay,
+    with the observation markers of batched prompts if ``markers``."""
+
+    latency: float = 0.05
+    markers: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-echo"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs) -> str:
+        with IN_FLIGHT_LOCK:
+            IN_FLIGHT["current"] += 1
+            IN_FLIGHT["peak"] = max(IN_FLIGHT["peak"], IN_FLIGHT["current"])
+        try:
+            # random latencies make the calls complete out of order
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        finally:
+            with IN_FLIGHT_LOCK:
+                IN_FLIGHT["current"] -= 1
+        question = prompt.splitlines()[0]
+        shap_lines = [
+            line
+            for line in prompt.splitlines()
+            if "influence on the prediction" in line
+            or (self.markers and re.fullmatch(r"OBSERVATION \d+", line))
+        ]
+        return "\n".join([question, *shap_lines])
+
+
+# number of calls answered by FlakyEchoLLM and number after which it fails
+FLAKY_CALLS = [0, None]
+
+
+class FlakyEchoLLM(SlowEchoLLM):
+    """``SlowEchoLLM`` failing once ``FLAKY_CALLS[1]`` calls were answered."""
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs) -> str:
+        answered, fail_after = FLAKY_CALLS
+        if fail_after is not None and answered >= fail_after:
+            raise ConnectionError("The connection was reset.")
+        FLAKY_CALLS[0] += 1
+        return super()._call(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class EchoOpenAI(OpenAI):
+    """``OpenAI`` client answering like ``SlowEchoLLM`` instead of calling the API, its
+    settings and credentials are still validated."""
+
+    latency: float = 0.05
+    markers: bool = True
+
+    def _generate(self, prompts, stop=None, run_manager=None, **kwargs) -> LLMResult:
+        echo = SlowEchoLLM(latency=self.latency, markers=self.markers)
+        return LLMResult(generations=[[Generation(text=echo._call(prompt))] for prompt in prompts])
+
+
+@pytest.fixture
+def llm_module(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_API_BASE", "http://localhost")
+    from ml_explainer.model import llm
+
+    return llm
+
+
+def _llm(name="SlowEchoLLM", **kwargs):
+    return {
+        "class": f"tests.model.test_llm.{name}",
+        "kwargs": {"latency": 0.05, "markers": True, **kwargs},
+    }
+
+
+def _report(llm_module, max_concurrency, parameters=None, report_params=None):
+    shap_df = pd.DataFrame(
+        [[100.0, float(i), -float(i)] for i in range(6)], columns=["base_value", *FEATURES]
+    )
+    feature_importance_df = pd.DataFrame({"feature_importance": [60.0, 40.0]}, index=FEATURES)
+    parameters = {
+        "llm": _llm(),
+        "max_concurrency": max_concurrency,
+        "feature_description": {"engines": "Number of engines.", "crew": "Size of the crew."},
+        "conversation_chain": {
+            "prompt_template": "Question: {{question}}\n{feature_importance_msg}\n"
+            "{shap_prediction_msg}"
+        },
+        **(parameters or {}),
+    }
+    report_params = {
+        "number_of_observations_to_explain": 6,
+        "starter_questions": {"question1": "Explain the features"},
+        "questions": {"question1": "Explain the prediction", "question2": "Why?"},
+        "formatting_question": "Format the text",
+        **(report_params or {}),
+    }
+    return llm_module.generate_explainability_report(
+        shap_df, feature_importance_df, parameters, report_params
+    )
+
+
+def _peak_in_flight(llm_module, max_concurrency):
+    IN_FLIGHT.update(current=0, peak=0)
+    report = _report(llm_module, max_concurrency=max_concurrency)["report"]
+    return report, IN_FLIGHT["peak"]
+
+
+def test_concurrent_report_overlaps_calls_and_keeps_report_order(llm_module):
+    sequential, sequential_peak = _peak_in_flight(llm_module, max_concurrency=1)
+    concurrent, concurrent_peak = _peak_in_flight(llm_module, max_concurrency=8)
+
+    assert concurrent == sequential
+    assert sequential_peak == 1
+    assert 1 < concurrent_peak <= 8
+    assert sequential.index("engines (has positive influence on the prediction) = 5.0") > (
+        sequential.index("engines (has positive influence on the prediction) = 4.0")
+    )
+
+
+def test_cached_report_replays_without_the_llm(llm_module, tmp_path):
+    response_cache = {"enabled": True, "filepath": str(tmp_path / "llm.sqlite"), "ttl_hours": 1}
+    report = _report(llm_module, 4, {"response_cache": response_cache})["report"]
+
+    replay_cache = {**response_cache, "replay": True}
+    replayed = _report(llm_module, 4, {"response_cache": replay_cache})
+    assert replayed["report"] == report
+    assert replayed["llm_run_summary"]["by_source"] == {"llm": 0, "cache": 13, "checkpoint": 0}
+    assert replayed["llm_call_metrics"]["latency_seconds"].isna().all()
+    with pytest.raises(LLMCacheMissError):
+        _report(
+            llm_module,
+            4,
+            {"response_cache": replay_cache},
+            {"questions": {"question1": "Explain the prediction", "question2": "How?"}},
+        )
+
+
+def test_replay_needs_no_credentials(llm_module, tmp_path, monkeypatch):
+    response_cache = {"enabled": True, "filepath": str(tmp_path / "llm.sqlite"), "ttl_hours": 1}
+    echo = {"llm": _llm("EchoOpenAI")}
+    report = _report(llm_module, 4, {"response_cache": response_cache, **echo})["report"]
+
+    monkeypatch.delenv("OPENAI_API_KEY")
+    replay_cache = {**response_cache, "replay": True}
+    replayed = _report(llm_module, 4, {"response_cache": replay_cache, **echo})
+    assert replayed["report"] == report
+    assert replayed["llm_run_summary"]["by_source"] == {"llm": 0, "cache": 13, "checkpoint": 0}
+    assert "OPENAI_API_KEY" not in os.environ
+
+
+def test_failed_report_resumes_from_checkpoint(llm_module, tmp_path):
+    checkpoint = {"enabled": True, "directory": str(tmp_path / "checkpoint")}
+    flaky = {"llm": _llm("FlakyEchoLLM")}
+    expected = _report(llm_module, max_concurrency=1)["report"]
+
+    FLAKY_CALLS[:] = [0, 5]
+    with pytest.raises(ConnectionError):
+        _report(llm_module, 1, flaky, {"checkpoint": checkpoint})
+
+    # 1 starter + 6 observations x 2 questions, 5 already answered
+    FLAKY_CALLS[:] = [0, None]
+    assert _report(llm_module, 1, flaky, {"checkpoint": checkpoint})["report"] == expected
+    assert FLAKY_CALLS[0] == 13 - 5
+    assert not (tmp_path / "checkpoint" / "manifest.jsonl").exists()
+
+
+def test_batched_report_explains_every_observation_in_fewer_calls(llm_module):
+    batching = {"observations_per_prompt": 4}
+    batched = _report(llm_module, 4, {"batching": batching})
+
+    # 1 starter + 2 questions x 2 batches instead of 1 + 2 questions x 6 observations
+    assert batched["llm_run_summary"]["by_source"]["llm"] == 5
+    sections = batched["report"].split("## Prediction ")[1:]
+    for index, section in enumerate(sections):
+        assert section.count(f"engines (has positive influence on the prediction) = {index}.0") == 2
+        assert section.count("engines (has positive influence on the prediction)") == 2
+
+    # answers without the markers are asked again one observation at a time
+    fallback = _report(llm_module, 4, {"batching": batching, "llm": _llm(markers=False)})
+    assert fallback["report"] == _report(llm_module, max_concurrency=4)["report"]
+    assert fallback["llm_run_summary"]["by_source"]["llm"] == 5 + 12
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from ml_explainer.model.llm_scheduler import LLMScheduler, TokenBucket
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def test_retries_transient_errors_with_backoff():
+    attempts = []
+
+    def call():
+        attempts.append(time.perf_counter())
+        if len(attempts) < 3:
+            raise RateLimitError("Rate limit reached.")
+        return "answer"
+
+    scheduler = LLMScheduler(max_retries=3, backoff_seconds=0.01, retry_on=(RateLimitError,))
+    assert scheduler.call(call) == "answer"
+    assert scheduler.retries == 2
+
+    with pytest.raises(ValueError):
+        scheduler.call(lambda: int("not a number"))
+
+    # the timeout is raised by the client once it cancelled the request, only then retried
+    in_flight = []
+
+    def timing_out():
+        assert not in_flight
+        in_flight.append(True)
+        try:
+            time.sleep(0.01)
+            if scheduler.retries < 4:
+                raise TimeoutError("Request timed out.")
+            return "answer"
+        finally:
+            in_flight.pop()
+
+    assert scheduler.call(timing_out) == "answer"
+    assert scheduler.retries == 4
+
+
+class FakeClock:
+    """Clock advanced by its sleeps only."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_spreads_calls_over_the_quota():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=600, capacity=1, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(6)]
+
+    # a burst of one then one token every 0.1s
+    assert waits == pytest.approx([0, 0.1, 0.1, 0.1, 0.1, 0.1])
+    assert clock.now == pytest.approx(0.5)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge, TheilSenRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from ml_explainer.model.prediction import (
+    MemoizedPredictor,
+    shared_preprocessing_predict,
+)
+from ml_explainer.pipelines.data_science.nodes import build_model
+
+
+def _fitted_stack():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=["a", "b", "c"])
+    y = 2 * X["a"] - X["b"] + rng.normal(scale=0.1, size=200)
+    regressor = build_model(
+        scaler=StandardScaler(),
+        imputer=SimpleImputer(strategy="median"),
+        model1=XGBRegressor(n_estimators=10, max_depth=2, random_state=0),
+        model2=TheilSenRegressor(random_state=0),
+        final_estimator=Ridge(),
+    )
+    return regressor.fit(X, y), X
+
+
+def test_shared_preprocessing_matches_the_stack():
+    regressor, X = _fitted_stack()
+    predict = shared_preprocessing_predict(regressor)
+
+    assert predict is not None
+    np.testing.assert_allclose(predict(X), regressor.predict(X))
+
+
+def test_memoized_predictor_reuses_primed_rows_and_stays_bounded():
+    regressor, X = _fitted_stack()
+    predictor = MemoizedPredictor(regressor, max_size=150)
+    primed = np.arange(100, dtype=float)
+    predictor.prime(X.iloc[:100], primed)
+
+    predictions = predictor.predict(X)
+
+    np.testing.assert_array_equal(predictions[:100], primed)
+    np.testing.assert_allclose(predictions[100:], regressor.predict(X.iloc[100:]))
+    assert (predictor.hits, predictor.misses) == (100, 100)
+    assert len(predictor._memo) == 150
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from ml_explainer.model.prompt_builder import (
+    estimate_tokens,
+    generate_compact_shap_messages,
+)
+
+
+def test_compact_message_keeps_top_features_within_budget():
+    shap_df = pd.DataFrame(
+        {"base_value": [100.0], "a": [1.0], "b": [-30.0], "c": [2.5], "d": [20.0]}
+    )
+
+    assert generate_compact_shap_messages(shap_df, top_k=2) == [
+        "prediction=93.50 base=100.00\nfeature|SHAP\nb|-30.00\nd|+20.00\nother(2)|+3.50\n"
+    ]
+    budgeted = generate_compact_shap_messages(shap_df, top_k=4, max_tokens=18)[0]
+    assert estimate_tokens(budgeted) <= 18
+    assert budgeted.endswith("b|-30.00\nother(3)|+23.50\n")
@@ -0,0 +1,9 @@
+from ml_explainer.model.report_formatter import normalize_markdown
+
+
+def test_normalize_markdown_shifts_headings_and_collapses_blank_lines():
+    text = "\n# Title  \n\n\n\ntext\n## Sub\n```\n# comment\n\n\n```\n"
+
+    assert normalize_markdown(text, heading_level=3) == (
+        "### Title\n\ntext\n#### Sub\n```\n# comment\n\n\n```"
+    )
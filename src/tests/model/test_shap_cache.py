@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml_explainer.model import shap_cache
+from ml_explainer.model.shap_cache import (
+    ShapValueCache,
+    cached_explain_in_chunks,
+    cached_iter_explained_chunks,
+)
+from ml_explainer.model.shap_parallel import explain_in_chunks
+from ml_explainer.model.shap_values import create_shap_error_dataframe
+
+
+@pytest.fixture
+def model_and_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 4)), columns=["a", "b", "c", "d"])
+    y = X @ np.array([1.0, -2.0, 0.5, 3.0])
+    return LinearRegression().fit(X, y), X
+
+
+@pytest.fixture
+def explained_rows(monkeypatch):
+    """Count the rows explained through the cache."""
+    counts = []
+
+    def counting_explain_in_chunks(frames, explain_params):
+        counts.append(sum(map(len, frames)))
+        return explain_in_chunks(frames=frames, explain_params=explain_params)
+
+    monkeypatch.setattr(shap_cache, "explain_in_chunks", counting_explain_in_chunks)
+    return counts
+
+
+def _row_size(cache, X):
+    return 2 * len(cache.keys(X.iloc[:1])[0]) + 8 * (2 * X.shape[1] + 1) + 48
+
+
+def _params(model, X, **options):
+    return dict(regressor=model, background=X.iloc[:20], backend="permutation", **options)
+
+
+def test_values_round_trip_and_depend_on_the_explainer(tmp_path, model_and_data):
+    model, X = model_and_data
+    cache = ShapValueCache(str(tmp_path / "shap.sqlite"), _params(model, X))
+    keys = cache.keys(X.iloc[:3])
+    values = np.arange(8.0).reshape(2, 4)
+    cache.put(keys[:2], values, np.array([10.0, 20.0]), values / 10)
+
+    cached_values, base_values, error_std, hit = cache.get(keys)
+
+    np.testing.assert_array_equal(hit, [True, True, False])
+    np.testing.assert_array_equal(cached_values[:2], values)
+    np.testing.assert_array_equal(base_values[:2], [10.0, 20.0])
+    np.testing.assert_array_equal(error_std[:2], values / 10)
+    assert np.isnan(cached_values[2]).all()
+    np.testing.assert_array_equal(cache.contains(keys), hit)
+
+    other_explainers = [
+        _params(LinearRegression().fit(X, X["a"]), X),
+        {**_params(model, X), "background": X.iloc[20:40]},
+        {**_params(model, X), "backend": "stacking"},
+        _params(model, X, permutation_params={"adaptive": True, "max_evals": 60}),
+        _params(model, X, permutation_params={"adaptive": True, "max_evals": 1000}),
+    ]
+    for explain_params in other_explainers:
+        other_cache = ShapValueCache(str(tmp_path / "shap.sqlite"), explain_params)
+        assert not other_cache.contains(other_cache.keys(X.iloc[:3])).any()
+    # the chunking and the workers don't change the values
+    same_cache = ShapValueCache(str(tmp_path / "shap.sqlite"), _params(model, X, n_jobs=2))
+    np.testing.assert_array_equal(same_cache.contains(keys), hit)
+
+
+def test_only_missing_rows_are_explained(tmp_path, model_and_data, explained_rows):
+    model, X = model_and_data
+    params = _params(model, X)
+    cache = ShapValueCache(str(tmp_path / "shap.sqlite"), params)
+
+    (expected,) = explain_in_chunks(frames=[X], explain_params=params)
+    cached_explain_in_chunks(cache, frames=[X.iloc[:200]], explain_params=params)
+    (explanation,) = cached_explain_in_chunks(cache, frames=[X], explain_params=params)
+
+    assert explained_rows == [200, 200]
+    np.testing.assert_allclose(explanation.values, expected.values)
+    np.testing.assert_allclose(explanation.base_values, expected.base_values)
+
+
+def test_hits_evicted_by_the_new_rows_are_still_returned(tmp_path, model_and_data, explained_rows):
+    model, X = model_and_data
+    params = _params(model, X, chunk_size=50)
+    max_size_mb = 300 * _row_size(ShapValueCache(":memory:", params), X) / 2**20
+    (expected,) = explain_in_chunks(frames=[X], explain_params=params)
+
+    cache = ShapValueCache(str(tmp_path / "shap.sqlite"), params, max_size_mb)
+    cached_explain_in_chunks(cache, frames=[X.iloc[:200]], explain_params=params)
+    (explanation,) = cached_explain_in_chunks(cache, frames=[X], explain_params=params)
+    np.testing.assert_allclose(explanation.values, expected.values)
+
+    cache = ShapValueCache(str(tmp_path / "stream.sqlite"), params, max_size_mb)
+    cached_explain_in_chunks(cache, frames=[X.iloc[200:]], explain_params=params)
+    explained_rows.clear()
+    # the new rows come first and evict the rows counted as hits
+    chunks = list(cached_iter_explained_chunks(cache, X=X, explain_params=params))
+    np.testing.assert_allclose(np.concatenate([chunk.values for chunk in chunks]), expected.values)
+    assert sum(explained_rows) > 0
+
+
+def test_standard_errors_are_cached_with_the_values(tmp_path, model_and_data):
+    model, X = model_and_data
+    permutation_params = {"adaptive": True, "tolerance": 1e-9, "max_evals": 40}
+    params = _params(model, X, chunk_size=50, permutation_params=permutation_params)
+    cache = ShapValueCache(str(tmp_path / "shap.sqlite"), params)
+    (fresh,) = cached_explain_in_chunks(cache, frames=[X.iloc[:100]], explain_params=params)
+    chunks = list(cached_iter_explained_chunks(cache, X=X.iloc[:200], explain_params=params))
+
+    streamed = np.concatenate([chunk.error_std for chunk in chunks])
+    assert not np.isnan(fresh.error_std).any()
+    assert not np.isnan(streamed).any()
+    np.testing.assert_array_equal(streamed[:100], fresh.error_std)
+    errors_df = create_shap_error_dataframe(chunks[0], features=list(X.columns))
+    assert errors_df.notna().all().all()
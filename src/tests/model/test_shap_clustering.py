@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from ml_explainer.datasets import PartitionedParquetDataset
+from ml_explainer.model.shap_clustering import cluster_shap_values
+
+
+def test_representatives_cover_well_separated_clusters(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = np.array([[10.0, 0.0, 0.0], [0.0, 10.0, 0.0], [0.0, 0.0, 10.0]])
+    sizes = np.array([3000, 2000, 1000])
+    truth = rng.permutation(np.repeat(np.arange(3), sizes))
+    shap_df = pd.DataFrame(centers[truth] + rng.normal(size=(6000, 3)), columns=["a", "b", "c"])
+    shap_df.insert(0, "base_value", 100.0)
+    shap_df["prediction"] = shap_df.sum(axis=1)
+    dataset = PartitionedParquetDataset(str(tmp_path / "shap"), load_args={"lazy": True})
+    dataset.save(shap_df.iloc[start : start + 700] for start in range(0, 6000, 700))
+
+    representatives, clusters_df, assignments_df = cluster_shap_values(
+        dataset.load(), n_clusters=3, batch_size=1000, sample_size=3000
+    )
+
+    np.testing.assert_array_equal(clusters_df["size"], sizes)
+    np.testing.assert_array_equal(truth[representatives.index], [0, 1, 2])
+    pd.testing.assert_frame_equal(representatives, shap_df.loc[representatives.index])
+    assert len(assignments_df) == 6000
+    assert pd.crosstab(assignments_df["cluster"], truth).to_numpy().max(axis=0).sum() == 6000
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from ml_explainer.model import shap_parallel
+from ml_explainer.model.shap_parallel import explain_in_chunks, iter_explained_chunks
+
+# sampled explanations, so their values depend on the seed of every chunk
+PERMUTATION_PARAMS = {"adaptive": True, "tolerance": 1e-9, "max_evals": 40}
+
+
+@pytest.fixture(scope="module")
+def model_and_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(90, 4)), columns=["a", "b", "c", "d"])
+    y = X["a"] * X["b"] + np.sin(X["c"]) + rng.normal(scale=0.1, size=90)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    return model, X
+
+
+def _explain(model_and_data, **kwargs):
+    model, X = model_and_data
+    explain_params = dict(
+        regressor=model,
+        background=X.iloc[:10],
+        backend="permutation",
+        chunk_size=25,
+        permutation_params=PERMUTATION_PARAMS,
+    )
+    return explain_in_chunks([X, X.iloc[:30]], {**explain_params, **kwargs})
+
+
+def test_chunks_are_explained_in_row_order(model_and_data):
+    _, X = model_and_data
+    explanation, head = _explain(model_and_data)
+
+    np.testing.assert_array_equal(explanation.data, X.to_numpy())
+    np.testing.assert_array_equal(head.data, X.iloc[:30].to_numpy())
+    assert explanation.values.shape == X.shape
+    assert explanation.feature_names == list(X.columns)
+    # the in-process run doesn't keep the explainer, nor its model, in the module state
+    assert not shap_parallel._WORKER
+
+
+def test_chunk_seeds_make_the_values_deterministic(model_and_data):
+    first, _ = _explain(model_and_data, seed=1)
+    again, _ = _explain(model_and_data, seed=1)
+    other_seed, _ = _explain(model_and_data, seed=2)
+
+    np.testing.assert_array_equal(first.values, again.values)
+    assert not np.array_equal(first.values, other_seed.values)
+
+
+def test_iterated_chunks_match_the_whole_explanation(model_and_data):
+    model, X = model_and_data
+    whole, _ = _explain(model_and_data)
+    explain_params = dict(
+        regressor=model,
+        background=X.iloc[:10],
+        backend="permutation",
+        chunk_size=25,
+        permutation_params=PERMUTATION_PARAMS,
+    )
+    chunks = list(iter_explained_chunks(X, explain_params))
+
+    assert [len(chunk.values) for chunk in chunks] == [25, 25, 25, 15]
+    np.testing.assert_array_equal(np.concatenate([chunk.values for chunk in chunks]), whole.values)
+
+
+def test_process_pool_matches_serial_run(model_and_data):
+    serial = _explain(model_and_data, n_jobs=1)
+    parallel = _explain(model_and_data, n_jobs=2)
+
+    for serial_explanation, parallel_explanation in zip(serial, parallel):
+        np.testing.assert_array_equal(serial_explanation.values, parallel_explanation.values)
+        np.testing.assert_array_equal(
+            serial_explanation.base_values, parallel_explanation.base_values
+        )
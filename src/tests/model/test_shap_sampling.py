@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_explainer.model.shap_sampling import sample_explain_set, summarize_background
+
+
+@pytest.fixture(scope="module")
+def X():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1000, 3)), columns=["a", "b", "c"])
+    X["engines"] = rng.integers(1, 5, size=1000).astype("uint8")
+    return X
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"method": "sample"},
+        {"method": "stratified", "stratify_by": "a", "n_bins": 5},
+        {"method": "kmeans", "n_clusters": 8},
+    ],
+)
+def test_background_is_made_of_rows_of_the_data_and_seeded(X, options):
+    background = summarize_background(X, {"size": 50, "seed": 1, **options})
+
+    assert background.shape == (50, X.shape[1])
+    pd.testing.assert_series_equal(background.dtypes, X.dtypes)
+    pd.testing.assert_frame_equal(background, X.loc[background.index])
+    pd.testing.assert_frame_equal(
+        summarize_background(X, {"size": 50, "seed": 1, **options}), background
+    )
+    assert not summarize_background(X, {"size": 50, "seed": 2, **options}).equals(background)
+
+
+def test_kmeans_representatives_are_weighted_by_the_size_of_their_cluster():
+    rng = np.random.default_rng(0)
+    truth = np.repeat(np.arange(3), [600, 300, 100])
+    centers = np.array([[0.0, 0.0], [20.0, 0.0], [0.0, 20.0]])[truth]
+    X = pd.DataFrame(centers + rng.normal(size=centers.shape), columns=["a", "b"])
+
+    background = summarize_background(X, {"method": "kmeans", "size": 20, "n_clusters": 3})
+
+    # one real row per cluster, repeated 20 * 600 / 1000 times etc.
+    counts = background.index.value_counts()
+    assert dict(zip(truth[counts.index], counts)) == {0: 12, 1: 6, 2: 2}
+
+
+def test_stratified_background_covers_every_quantile_of_the_column(X):
+    background = summarize_background(
+        X, {"method": "stratified", "size": 50, "stratify_by": "a", "n_bins": 5}
+    )
+
+    quintiles = pd.qcut(X["a"], q=5, labels=False)
+    assert quintiles.loc[background.index].value_counts().tolist() == [10] * 5
+
+
+def test_small_data_and_unknown_methods(X):
+    background = summarize_background(X.iloc[:30], {"method": "kmeans", "size": 50})
+    pd.testing.assert_frame_equal(background, X.iloc[:30])
+    assert background is not X.iloc[:30]
+
+    with pytest.raises(ValueError, match="Unknown background summarization method"):
+        summarize_background(X, {"method": "centroids", "size": 50})
+
+
+def test_explain_set_is_a_seeded_sample(X):
+    explain_set = sample_explain_set(X, size=200, seed=1)
+
+    assert explain_set.shape == (200, X.shape[1])
+    assert explain_set.index.is_unique
+    pd.testing.assert_frame_equal(explain_set, X.loc[explain_set.index])
+    pd.testing.assert_frame_equal(sample_explain_set(X, size=200, seed=1), explain_set)
+    assert not sample_explain_set(X, size=200, seed=2).equals(explain_set)
+    assert sample_explain_set(X, size=2000) is X
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import shap
+
+from ml_explainer.model.shap_values import (
+    FeatureImportanceAccumulator,
+    calculate_feature_importance_df,
+    create_shap_dataframe,
+    create_shap_error_dataframe,
+    generate_shap_message,
+    generate_shap_messages,
+    shap_value_columns,
+)
+
+FEATURES = ["a", "b", "c"]
+
+
+def _explanation():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(500, 3))
+    values[7] = 0
+    return shap.Explanation(values=values, base_values=np.ones(500), feature_names=FEATURES)
+
+
+def test_feature_importance_is_mean_share_of_movement():
+    explanation = _explanation()
+    movement = np.abs(explanation.values)
+    shares = pd.DataFrame(movement / movement.sum(axis=1, keepdims=True) * 100, columns=FEATURES)
+
+    feature_importance_df = calculate_feature_importance_df(explanation, features=FEATURES)
+
+    expected = shares.mean().sort_values(ascending=False)
+    pd.testing.assert_series_equal(
+        feature_importance_df["feature_importance"], expected, check_names=False
+    )
+
+
+def test_feature_importance_by_chunks_matches_whole_data():
+    explanation = _explanation()
+    shap_df = create_shap_dataframe(explanation, features=FEATURES)
+    chunks = (shap_df.iloc[start : start + 64] for start in range(0, len(shap_df), 64))
+
+    pd.testing.assert_frame_equal(
+        calculate_feature_importance_df(chunks, features=FEATURES),
+        calculate_feature_importance_df(explanation, features=FEATURES),
+    )
+
+
+def test_float32_accumulation_is_close():
+    explanation = _explanation()
+    accumulator = FeatureImportanceAccumulator(features=FEATURES, dtype=np.float32)
+    for start in range(0, 500, 100):
+        accumulator.update(explanation.values[start : start + 100])
+
+    np.testing.assert_allclose(
+        accumulator.to_frame().loc[FEATURES].to_numpy(),
+        calculate_feature_importance_df(explanation, features=FEATURES).loc[FEATURES].to_numpy(),
+        rtol=1e-5,
+    )
+
+
+def test_shap_messages_of_all_rows():
+    shap_df = pd.DataFrame({"base_value": [10.0, 10.0], "a": [1.23456, -0.0004]})
+
+    assert generate_shap_messages(shap_df) == [
+        "base_value (has positive influence on the prediction) = 10.0\n"
+        "a (has positive influence on the prediction) = 1.235\n",
+        "base_value (has positive influence on the prediction) = 10.0\n"
+        "a (has negative influence on the prediction) = -0.0\n",
+    ]
+    assert generate_shap_message(shap_df.iloc[[1]]) == generate_shap_messages(shap_df)[1]
+
+
+def test_standard_errors_are_stored_next_to_the_shap_values():
+    values = _explanation().values
+    explanation = shap.Explanation(
+        values=values, base_values=np.ones(len(values)), error_std=np.abs(values) / 10
+    )
+    shap_df = create_shap_dataframe(explanation, features=FEATURES)
+    shap_df["prediction"] = explanation.values.sum(axis=1) + 1
+
+    errors_df = create_shap_error_dataframe(explanation, features=FEATURES)
+    combined = pd.concat([shap_df, errors_df], axis=1)
+
+    assert list(errors_df.columns) == ["std_error:a", "std_error:b", "std_error:c", "std_error:max"]
+    np.testing.assert_allclose(errors_df["std_error:max"], explanation.error_std.max(axis=1))
+    assert shap_value_columns(combined.columns) == FEATURES
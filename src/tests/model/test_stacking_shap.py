@@ -0,0 +1,82 @@
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge, TheilSenRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from ml_explainer.model.stacking_shap import (
+    StackedShapExplainer,
+    StackingDecompositionError,
+    build_shap_explainer,
+)
+from ml_explainer.pipelines.data_science.nodes import build_model
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    y = 3 * X["a"] + X["b"] * X["c"] + rng.normal(scale=0.1, size=300)
+    return X, y
+
+
+def _interventional_shap(predict, x, background):
+    """Brute force interventional SHAP values of a single row."""
+    n_features = background.shape[1]
+    coalitions = list(itertools.product([False, True], repeat=n_features))
+    masked = pd.DataFrame(
+        np.concatenate(
+            [np.where(mask, x.to_numpy(), background.to_numpy()) for mask in coalitions]
+        ),
+        columns=background.columns,
+    )
+    value = dict(zip(coalitions, predict(masked).reshape(len(coalitions), -1).mean(axis=1)))
+
+    phi = np.zeros(n_features)
+    for mask in coalitions:
+        for i in np.flatnonzero(~np.array(mask)):
+            size = sum(mask)
+            weight = math.factorial(size) * math.factorial(n_features - size - 1)
+            with_i = tuple(True if j == i else m for j, m in enumerate(mask))
+            phi[i] += weight / math.factorial(n_features) * (value[with_i] - value[mask])
+    return phi, value[coalitions[0]]
+
+
+def _stack(final_estimator):
+    return build_model(
+        scaler=StandardScaler(),
+        imputer=SimpleImputer(strategy="median"),
+        model1=XGBRegressor(n_estimators=20, max_depth=3, random_state=0),
+        model2=TheilSenRegressor(random_state=0),
+        final_estimator=final_estimator,
+    )
+
+
+def test_stacked_explainer_matches_brute_force_shap(data):
+    X, y = data
+    regressor = _stack(Ridge()).fit(X, y)
+    background = X.iloc[:20]
+
+    explanation = StackedShapExplainer(regressor=regressor, background=background)(X.iloc[:3])
+
+    for row in range(3):
+        phi, base_value = _interventional_shap(regressor.predict, X.iloc[row], background)
+        np.testing.assert_allclose(explanation.values[row], phi, atol=1e-4)
+        np.testing.assert_allclose(explanation.base_values[row], base_value, atol=1e-4)
+
+
+def test_non_linear_final_estimator_falls_back_to_permutation(data):
+    X, y = data
+    regressor = _stack(RandomForestRegressor(n_estimators=5, random_state=0)).fit(X, y)
+
+    with pytest.raises(StackingDecompositionError):
+        build_shap_explainer(regressor=regressor, background=X, backend="stacking")
+
+    explainer = build_shap_explainer(regressor=regressor, background=X, backend="auto")
+    assert not isinstance(explainer, StackedShapExplainer)
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from ml_explainer.pipelines.data_processing.nodes import (
+    optimize_dtypes,
+    preprocess_companies,
+    preprocess_shuttles,
+)
+
+
+def _shuttles() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "d_check_complete": ["t", "f", None],
+            "moon_clearance_complete": ["f", None, "t"],
+            "price": ["$1,325.0", None, "$4,060,000.5"],
+        }
+    )
+
+
+@pytest.mark.parametrize("arrow_backed", [False, True])
+def test_arrow_parsing_matches_pandas(arrow_backed):
+    shuttles = _shuttles()
+    if arrow_backed:
+        shuttles = shuttles.astype({"price": "string[pyarrow]"})
+    expected = preprocess_shuttles(_shuttles(), {"parsing": {"engine": "pandas"}})
+
+    result = preprocess_shuttles(shuttles, {"parsing": {"engine": "arrow"}})
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["price"].tolist()[::2] == [1325.0, 4060000.5]
+
+
+def test_arrow_parsing_falls_back_to_pandas_errors():
+    companies = pd.DataFrame({"iata_approved": ["t"], "company_rating": ["high%"]})
+
+    with pytest.raises(ValueError):
+        preprocess_companies(companies, {"parsing": {"engine": "arrow"}})
+
+
+def test_optimized_dtypes_survive_the_parquet_round_trip(tmp_path):
+    table = pd.DataFrame(
+        {
+            "engines": [1.0, 2.0, 1.0, 2.0],
+            "company_id": [10, 20000, 10, 3],
+            "company_rating": [0.67, 1.0, 0.5, 0.1],
+            "iata_approved": pd.Series([True, None, False, True], dtype=object),
+            "company_location": ["Niue", "Niue", "Anguilla", "Niue"],
+            "price": [1325.0, 4060.0, 20.0, 1.0],
+        }
+    )
+    parameters = {
+        "dtypes": {
+            "enabled": True,
+            "schema": {"model_input_table": {"engines": "uint8", "price": "float64"}},
+        }
+    }
+
+    optimized = optimize_dtypes(table, parameters)
+    optimized.to_parquet(tmp_path / "model_input_table.pq")
+
+    assert optimized.dtypes.astype(str).to_dict() == {
+        "engines": "uint8",
+        "company_id": "uint16",
+        "company_rating": "float64",
+        "iata_approved": "boolean",
+        "company_location": "category",
+        "price": "float64",
+    }
+    assert optimized.memory_usage(deep=True).sum() < table.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "model_input_table.pq"), optimized)
+
+
+def test_schema_cast_refuses_values_out_of_range():
+    parameters = {"dtypes": {"enabled": True, "schema": {"model_input_table": {"crew": "uint8"}}}}
+
+    with pytest.raises(ValueError, match="out of the range of uint8"):
+        optimize_dtypes(pd.DataFrame({"crew": [1.0, 300.0]}), parameters)
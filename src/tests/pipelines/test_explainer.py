@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from sklearn.ensemble import RandomForestRegressor
+
+from ml_explainer.model import shap_parallel
+from ml_explainer.model.shap_values import SHAP_ERROR_PREFIX
+from ml_explainer.pipelines.explainer.nodes import generate_shap_information
+
+
+def _shap_params(tmp_path):
+    return {
+        "backend": "permutation",
+        "background": {"method": "kmeans", "size": 20, "n_clusters": 5, "seed": 0},
+        "explain_sample": {"size": 60, "seed": 0},
+        "parallel": {"chunk_size": 25, "n_jobs": 1, "seed": 0},
+        "streaming": True,
+        "cache": {
+            "enabled": True,
+            "filepath": str(tmp_path / "shap.sqlite"),
+            "max_size_mb": None,
+        },
+        "prediction_memo_size": 1000,
+        "permutation": {"adaptive": True, "tolerance": 1e-9, "max_evals": 40},
+    }
+
+
+def test_streamed_and_cached_shap_information(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=["engines", "crew", "company_rating"])
+    y = X["engines"] * X["crew"] + X["company_rating"]
+    regressor = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    X_train, X_test = X.iloc[:140], X.iloc[140:]
+
+    def run():
+        info = generate_shap_information(
+            regressor, regressor, X_train, X_test, _shap_params(tmp_path)
+        )
+        return info, pd.concat(list(info["shap_values_df_test"]))
+
+    info, shap_df_test = run()
+
+    features = list(X.columns)
+    errors = [f"{SHAP_ERROR_PREFIX}{feature}" for feature in [*features, "max"]]
+    assert shap_df_test.columns.tolist() == ["base_value", *features, "prediction", *errors]
+    assert len(shap_df_test) == len(X_test)
+    np.testing.assert_allclose(shap_df_test["prediction"], regressor.predict(X_test))
+    np.testing.assert_allclose(
+        shap_df_test[["base_value", *features]].sum(axis=1), shap_df_test["prediction"]
+    )
+    assert shap_df_test[errors].notna().all().all()
+    assert len(info["shap_values_df_train"]) == 60
+    assert sorted(info["feature_importance"].index) == sorted(features)
+    assert isinstance(info["fig_shap_test"], Figure)
+
+    # the second run reads every row from the cache
+    def explain_chunk(task, explainer=None):
+        raise AssertionError("A cached row was explained again.")
+
+    monkeypatch.setattr(shap_parallel, "_explain_chunk", explain_chunk)
+    cached_info, cached_shap_df_test = run()
+    pd.testing.assert_frame_equal(cached_shap_df_test, shap_df_test)
+    pd.testing.assert_frame_equal(cached_info["shap_values_df_train"], info["shap_values_df_train"])
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from kedro.io import DataCatalog, DatasetError, MemoryDataset
+from kedro.pipeline import node, pipeline
+
+from ml_explainer.datasets import PartitionedParquetDataset, WatermarkedCSVDataset
+from ml_explainer.hooks import FullRefreshHooks, ProjectionPushdownHooks
+
+FEED_DICT = {
+    "params:model_hyperparameters": {"features": ["review_scores_rating"], "target": "price"},
+    "params:data_processing": {
+        "projection": {
+            "enabled": True,
+            "join_keys": ["shuttle_id"],
+            "raw_datasets": ["reviews", "missing"],
+            "feature_datasets": ["model_input_table"],
+        }
+    },
+}
+
+
+def test_projection_pushdown_loads_only_model_columns(tmp_path):
+    reviews = pd.DataFrame(
+        {"shuttle_id": [1, 2], "review_scores_rating": [9.0, None], "review_scores_crew": [1, 2]}
+    )
+    reviews.to_csv(tmp_path / "reviews.csv", index=False)
+    reviews.assign(price=1.0).to_parquet(tmp_path / "model_input_table.pq")
+    conf_catalog = {
+        "reviews": {"type": "pandas.CSVDataset", "filepath": str(tmp_path / "reviews.csv")},
+        "model_input_table": {
+            "type": "pandas.ParquetDataset",
+            "filepath": str(tmp_path / "model_input_table.pq"),
+        },
+    }
+    catalog = DataCatalog.from_config(conf_catalog)
+
+    ProjectionPushdownHooks().after_catalog_created(catalog, conf_catalog, {}, FEED_DICT)
+
+    assert list(catalog.load("reviews").columns) == ["shuttle_id", "review_scores_rating"]
+    assert list(catalog.load("model_input_table").columns) == ["review_scores_rating", "price"]
+
+
+def _identity(data):
+    return data
+
+
+def _incremental_catalog(tmp_path, full_refresh):
+    (tmp_path / "companies.csv").write_text("id,iata_approved\n1,t\n")
+    parameters = {
+        "incremental": {
+            "full_refresh": full_refresh,
+            "rebuilt_datasets": ["table"],
+            "reset_datasets": ["companies_delta", "table_increment"],
+        }
+    }
+    return DataCatalog(
+        {
+            "companies_delta": WatermarkedCSVDataset(str(tmp_path / "companies.csv")),
+            "table_increment": PartitionedParquetDataset(
+                str(tmp_path / "table"), save_args={"mode": "append"}
+            ),
+            "table": PartitionedParquetDataset(str(tmp_path / "table")),
+            "params:data_processing": MemoryDataset(parameters),
+        }
+    )
+
+
+def test_incremental_run_without_watermark_needs_a_full_refresh(tmp_path):
+    incremental = pipeline([node(_identity, "companies_delta", "table_increment")])
+    rebuild = pipeline([node(_identity, "companies_delta", "table")])
+    catalog = _incremental_catalog(tmp_path, full_refresh=False)
+
+    # a first run, nothing appended yet
+    FullRefreshHooks().before_pipeline_run(pipeline=incremental, catalog=catalog)
+    catalog.save("table_increment", catalog.load("companies_delta"))
+    catalog.confirm("companies_delta")
+    FullRefreshHooks().before_pipeline_run(pipeline=incremental, catalog=catalog)
+
+    FullRefreshHooks().before_pipeline_run(pipeline=rebuild, catalog=catalog)
+    assert not catalog.datasets.companies_delta.has_watermark()
+    with pytest.raises(DatasetError, match="full refresh"):
+        FullRefreshHooks().before_pipeline_run(pipeline=incremental, catalog=catalog)
+
+    catalog = _incremental_catalog(tmp_path, full_refresh=True)
+    FullRefreshHooks().before_pipeline_run(pipeline=incremental, catalog=catalog)
+    assert not catalog.exists("table_increment")